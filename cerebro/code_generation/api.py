@@ -8,12 +8,20 @@
 
 
 import os
+import sys
+import copy
 import importlib
+import pickle
 import shutil
+import subprocess
 
 from jinja2 import FileSystemLoader, Environment
 
 from cerebro.exceptions import IllegalStateException
+from cerebro.globals import BUILTIN_VARIABLES, BUILD_PROFILES, PGO_TRAINING_STEPS
+from cerebro.enums import VariableScope
+from .cache import BuildCache
+from .integrator import Integrator
 
 
 class CodeGeneration:
@@ -22,7 +30,9 @@ class CodeGeneration:
     """
     def __init__(self, network, populations, connections, network_variable_specs, population_variable_specs,
                  connection_variable_specs, population_equations, population_reset_equations,
-                 population_spike_condition, connection_equations, connection_pre_spike, connection_post_spike):
+                 population_spike_condition, connection_equations, connection_pre_spike, connection_post_spike,
+                 connection_event_driven, population_optimizers, connection_optimizers, cache=None, parameters=None,
+                 profile='default', dt=None):
         """
         :param network: The network object
         :param populations: List of populations in the network
@@ -36,6 +46,13 @@ class CodeGeneration:
         :param connection_equations: Equations defined in connections
         :param connection_pre_spike: Equations to be applied after pre-synaptic neuron's spike
         :param connection_post_spike: Equations to be applied after post-synaptic neuron's spike
+        :param connection_event_driven: Whether connections can update their synapses only on spikes
+        :param population_optimizers: Values computed ahead of the update equations of populations
+        :param connection_optimizers: Values computed ahead of the update equations of connections
+        :param cache: Store of built modules to reuse; `None` uses the default store and `False` disables caching
+        :param parameters: Runtime parameter block to be filled in parametric mode, `None` to paste values as literals
+        :param profile: Build profile, one of `cerebro.globals.BUILD_PROFILES`
+        :param dt: Step size of the training simulation of a profile-guided build
 
         :type network: cerebro.models.network.Network
         :type populations: list
@@ -49,6 +66,13 @@ class CodeGeneration:
         :type connection_equations: collections.defaultdict
         :type connection_pre_spike: collections.defaultdict
         :type connection_post_spike: collections.defaultdict
+        :type connection_event_driven: dict
+        :type population_optimizers: dict
+        :type connection_optimizers: dict
+        :type cache: cerebro.code_generation.cache.BuildCache or bool
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
+        :type profile: str
+        :type dt: float
         """
         print(type(population_equations))
         self.network = network
@@ -63,7 +87,15 @@ class CodeGeneration:
         self.connection_equations = connection_equations
         self.connection_pre_spike = connection_pre_spike
         self.connection_post_spike = connection_post_spike
+        self.connection_event_driven = connection_event_driven
+        self.population_optimizers = population_optimizers
+        self.connection_optimizers = connection_optimizers
+        self.cache = BuildCache() if cache is None else cache
+        self.parameters = parameters
+        self.profile = profile
+        self.dt = dt
         self.base_path = self.create_dirs()
+        self.generated_files = set()
 
         current_dir_path = os.path.dirname(os.path.abspath(__file__))
         self.base_templates_path = os.path.join(current_dir_path, 'templates')
@@ -74,72 +106,236 @@ class CodeGeneration:
     def generate(self):
         """
         Generates the files, compiles them and imports the network module.
+
+        If the generated sources have been built before, the cached module is reused and compilation is skipped.
         """
         self.generate_files()
-        self.compile_files()
+        if self.cache:
+            key = BuildCache.key(self.base_path, sorted(self.generated_files))
+            module_path = os.path.join(self.base_path, BuildCache.MODULE_NAME)
+            cached_path = self.cache.lookup(key)
+            if cached_path is not None:
+                # the module of a former build may be loaded by another process, so it is replaced, not overwritten
+                temp_path = '{}.{}.tmp'.format(module_path, os.getpid())
+                shutil.copyfile(cached_path, temp_path)
+                os.replace(temp_path, module_path)
+            else:
+                self.compile_files()
+                self.cache.store(key, module_path)
+        else:
+            self.compile_files()
         return self.load_module()
 
-    def compile_files(self):
+    def make(self, *arguments):
         """
-        Compiles the files.
+        Runs `make` in the build directory, with one compiler job per available core.
+
+        :param arguments: Targets and variables passed to `make`
+
+        :type arguments: str
 
         :raises: RuntimeError: If it fails to make the files.
         """
+        cwd = os.getcwd()
         os.chdir(self.base_path)
-        return_code = os.system('make')
+        try:
+            return_code = os.system(' '.join(['make', '-j{}'.format(os.cpu_count() or 1)] + list(arguments)))
+        finally:
+            os.chdir(cwd)
         if return_code:
             raise RuntimeError('make process failed')
 
+    def compile_files(self):
+        """
+        Compiles the files.
+
+        Object files of an earlier build of the network are kept, so only the translation units whose sources or
+        included headers have changed are compiled again. A profile-guided build is always made from scratch: the
+        instrumented module is built, trained by `train()` and then rebuilt from the profiles it wrote.
+
+        :raises: RuntimeError: If it fails to make the files or to train the instrumented module.
+        """
+        if self.profile != 'pgo':
+            self.make()
+            return
+
+        self.make('clean', 'clean-profile')
+        self.make('PGO=generate')
+        self.train()
+        self.make('clean')
+        self.make('PGO=use')
+
+    def training_inputs(self):
+        """
+        Collects what the training run of a profile-guided build needs to simulate the network as `Network` does: the
+        runtime parameters, the size of every population, and the calls by which spike sources pass their spikes or
+        rates to their wrappers when they are bound.
+
+        :returns: Parameters as `(index, value)` pairs, population sizes as `(id, size)` pairs and calls as
+            `(population id, method name, arguments)` triples
+
+        :rtype: dict
+        """
+        calls = []
+        for population in self.populations:
+            if population.spike_source is None:
+                continue
+            wrapper = population.wrapper
+            population.wrapper = _CallRecorder(population.id, calls)
+            try:
+                population.bind()
+            finally:
+                population.wrapper = wrapper
+        return {
+            'parameters': [(parameter.index, parameter.value) for parameter in self.parameters]
+            if self.parameters is not None else [],
+            'sizes': [(population.id, population.size) for population in self.populations],
+            'calls': calls,
+        }
+
+    def train(self):
+        """
+        Simulates the network with the instrumented module for `PGO_TRAINING_STEPS` steps of the network's step size
+        in a separate process, as the module cannot be loaded again into this one once rebuilt. Populations are sized
+        and spike sources are bound as by `Network`, so the profile follows the code paths of the real simulation.
+
+        :raises: RuntimeError: If the training run fails or simulates no neurons.
+        """
+        inputs_path = os.path.join(self.base_path, 'training.pickle')
+        with open(inputs_path, 'wb') as file:
+            pickle.dump(self.training_inputs(), file)
+        script = '\n'.join([
+            'import pickle',
+            'import wrapper',
+            'with open("training.pickle", "rb") as file:',
+            '    inputs = pickle.load(file)',
+            'for index, value in inputs["parameters"]:',
+            '    wrapper.set_parameter(index, value)',
+            'populations = {',
+            '    id: getattr(wrapper, "Population{}Wrapper".format(id))(size) for id, size in inputs["sizes"]',
+            '}',
+            'for id, name, arguments in inputs["calls"]:',
+            '    getattr(populations[id], name)(*arguments)',
+            'wrapper.initialize({!r})'.format(float(self.dt)),
+            'wrapper.run({})'.format(PGO_TRAINING_STEPS),
+            'print(sum(population.size for population in populations.values()))',
+        ])
+        try:
+            result = subprocess.run([sys.executable, '-c', script], cwd=self.base_path, stdout=subprocess.PIPE,
+                                    text=True)
+        finally:
+            os.remove(inputs_path)
+        if result.returncode:
+            raise RuntimeError('training run of the profile-guided build failed')
+        if not int(result.stdout.split()[-1]):
+            raise RuntimeError('training run of the profile-guided build simulated no neurons')
+
+    def write_file(self, file_name, content):
+        """
+        Writes a generated file into the build directory.
+
+        A file whose content has not changed is left untouched, so that its modification time tells `make` that the
+        translation units depending on it are up to date.
+
+        :param file_name: Name of the file
+        :param content: Content of the file
+
+        :type file_name: str
+        :type content: str
+        """
+        self.generated_files.add(file_name)
+        full_path = os.path.join(self.base_path, file_name)
+        if os.path.isfile(full_path):
+            with open(full_path) as file:
+                if file.read() == content:
+                    return
+        with open(full_path, 'w') as file:
+            file.write(content)
+
     def generate_files(self):
         """
-        Generates files, namely, the C++ code files, python modules and the MakeFile.
+        Generates files, namely, the C++ code files and the MakeFile.
         """
         self.generate_cpp_codes()
-        self.copy_python_modules()
         self.generate_make_file()
 
     def generate_cpp_codes(self):
         """
         Generates C++ codes.
+
+        The core is generated after populations and connections, so that it knows all of their runtime parameters.
         """
-        self.generate_core()
         self.generate_connectivity()
         self.generate_random_functions()
-        self.generate_delayed_potential()
+        self.generate_monitor()
         self.generate_populations()
         self.generate_connections()
+        self.generate_core()
         self.generate_wrapper()
 
-    def copy_python_modules(self):
-        """
-        Copies python modules needed.
+    def runtime_variables(self, owner, variable_specs):
         """
-        self.copy_monitoring_modules()
+        Replaces initial values of user-defined variables with runtime parameters in parametric mode.
 
-    def copy_monitoring_modules(self):
+        :param owner: Object the variables belong to
+        :param variable_specs: Specifications of the variables
+
+        :type owner: object
+        :type variable_specs: list
+
+        :returns: Specifications of the variables, initialized from the parameter block if there is one
+
+        :rtype: list
         """
-        Copies monitoring modules.
+        if self.parameters is None:
+            return variable_specs
+
+        builtin_names = {variable['name'] for variable in BUILTIN_VARIABLES}
+        runtime_specs = []
+        for variable_spec in variable_specs:
+            if variable_spec.name not in builtin_names:
+                variable_spec = copy.copy(variable_spec)
+                variable_spec.init = self.parameters.define(owner, variable_spec.name, variable_spec.init)
+            runtime_specs.append(variable_spec)
+        return runtime_specs
+
+    @staticmethod
+    def is_parallel(equations):
         """
-        module_to_copy_path = os.path.join(self.base_templates_path, 'monitoring.py')
-        destination_path = os.path.join(self.base_path, 'monitoring.py')
+        Checks whether equations can be applied to different neurons or synapses concurrently.
+
+        Random functions do not prevent it, as their draws are keyed by neuron or synapse index rather than taken from
+        a shared engine.
+
+        :param equations: Equations applied to each neuron or synapse
+
+        :type equations: list
 
-        shutil.copyfile(module_to_copy_path, destination_path)
+        :returns: False if an equation assigns a shared variable
+
+        :rtype: bool
+        """
+        return not any(equation.variable.scope == VariableScope.SHARED.value for equation in equations)
 
     def generate_core(self):
         """
         Generates the `core.h` and `core.cpp` files.
         """
+        network_variables = self.runtime_variables(self.network, self.network_variable_specs)
+        population_sizes = {}
+        for population in self.populations:
+            population_sizes[population] = None if self.parameters is None or self.network.fixed_size(population) \
+                else self.parameters.define(population, 'size', population.size)
+        parameter_count = len(self.parameters) if self.parameters is not None else 0
+
+        self.generate_bare_files(['common.h'])
         for template_name in ['core.h', 'core.cpp']:
             template = self.template_env.get_template(template_name)
             rendered = template.render(populations=self.populations, connections=self.connections,
-                                       network_variables=self.network_variable_specs)
+                                       network_variables=network_variables, population_sizes=population_sizes,
+                                       parameter_count=parameter_count)
 
-            full_path = os.path.join(self.base_path, template_name)
-            file = open(full_path, "w+")
-
-            file.write(rendered)
-
-            file.close()
+            self.write_file(template_name, rendered)
 
     def generate_bare_files(self, file_names):
         """
@@ -153,10 +349,7 @@ class CodeGeneration:
             template = self.template_env.get_template(template_name)
             rendered = template.render({})
 
-            full_path = os.path.join(self.base_path, template_name)
-            file = open(full_path, "w+")
-            file.write(rendered)
-            file.close()
+            self.write_file(template_name, rendered)
 
     def generate_connectivity(self):
         """
@@ -164,72 +357,76 @@ class CodeGeneration:
         """
         self.generate_bare_files(['connectivity.cpp', 'connectivity.h'])
 
-    def generate_delayed_potential(self):
-        """
-        Generates the `delayed_potential.h` and `delayed_potential.cpp` files, responsible for generics for delay.
-        """
-        self.generate_bare_files(['delayed_potential.cpp', 'delayed_potential.h'])
-
     def generate_random_functions(self):
         """
         Generates the `random_functions.h` and `random_functions.cpp` files, responsible for random functions.
         """
         self.generate_bare_files(['random_functions.cpp', 'random_functions.h'])
 
-    def generate_populations(self):
+    def generate_monitor(self):
         """
-        Generates a file for each population in the network.
+        Generates the `monitor.h` file, responsible for recording variables.
         """
-        template = self.template_env.get_template('population.hpp')
+        self.generate_bare_files(['monitor.h'])
 
+    def generate_populations(self):
+        """
+        Generates a header and a translation unit for each population in the network.
+        """
         for population in self.populations:
             update_equations = self.population_equations[population]
             spike_condition = self.population_spike_condition[population]
             reset_equations = self.population_reset_equations[population]
 
-            rendered = template.render(
+            context = dict(
                 population_id=population.id,
                 network_variables=self.network_variable_specs,
-                variables=self.population_variable_specs[population],
+                variables=self.runtime_variables(population, self.population_variable_specs[population]),
                 update_equations=update_equations,
                 spike_condition=spike_condition,
-                reset_equations=reset_equations
+                reset_equations=reset_equations,
+                integrator=Integrator(update_equations, population.neuron.method, 'i'),
+                optimizer=self.population_optimizers[population],
+                monitors=population.monitors,
+                spike_monitors=population.spike_monitors,
+                parallel=self.is_parallel(update_equations + reset_equations),
+                spike_source=population.spike_source
             )
 
-            full_path = os.path.join(self.base_path, 'population{}.hpp'.format(population.id))
-            file = open(full_path, "w+")
-
-            file.write(rendered)
-
-            file.close()
+            for extension in ['hpp', 'cpp']:
+                template = self.template_env.get_template('population.' + extension)
+                self.write_file('population{}.{}'.format(population.id, extension), template.render(context))
 
     def generate_connections(self):
         """
-        Generates a file for each connection in the network.
-        """
-        template = self.template_env.get_template('connection.hpp')
+        Generates a header and a translation unit for each connection in the network.
 
+        Connections of an implicit connection type are generated from the `convolution` templates.
+        """
         for connection in self.connections:
+            template_name = 'convolution' if connection.connection_type.implicit else 'connection'
             update_equations = self.connection_equations[connection]
             update_pre_spike_equations = self.connection_pre_spike[connection]
             update_post_spike_equations = self.connection_post_spike[connection]
-            variables = self.connection_variable_specs[connection]
-            rendered = template.render(
+            variables = self.runtime_variables(connection, self.connection_variable_specs[connection])
+            context = dict(
                 connection=connection,
                 network_variables=self.network_variable_specs,
                 variables=variables,
                 update_equations=update_equations,
                 update_pre_spike_equations=update_pre_spike_equations,
                 update_post_spike_equations=update_post_spike_equations,
-                connect_function=connection.connection_type.get_c_definition(connection)
+                event_driven=self.connection_event_driven[connection],
+                integrator=Integrator(update_equations, connection.synapse.method, 'j'),
+                optimizer=self.connection_optimizers[connection],
+                monitors=connection.monitors,
+                parallel=self.is_parallel(update_equations + update_pre_spike_equations + update_post_spike_equations),
+                connect_function=connection.connection_type.get_c_definition(connection, self.parameters)
             )
-            full_path = os.path.join(self.base_path, 'connection{}.hpp'.format(connection.id))
-
-            file = open(full_path, "w+")
 
-            file.write(rendered)
-
-            file.close()
+            for extension in ['hpp', 'cpp']:
+                template = self.template_env.get_template('{}.{}'.format(template_name, extension))
+                self.write_file('connection{}.{}'.format(connection.id, extension), template.render(context))
 
     def generate_wrapper(self):
         """
@@ -237,18 +434,18 @@ class CodeGeneration:
         """
         template = self.template_env.get_template('wrapper.pyx')
 
+        lazy_synapses = {
+            connection: bool(self.connection_event_driven[connection] and self.connection_equations[connection])
+            for connection in self.connections
+        }
         rendered = template.render(populations=self.populations,
                                    population_variable_specs=self.population_variable_specs,
                                    connections=self.connections,
                                    connection_variable_specs=self.connection_variable_specs,
-                                   network_variable_specs=self.network_variable_specs)
-
-        full_path = os.path.join(self.base_path, 'wrapper.pyx')
-        file = open(full_path, "w+")
+                                   network_variable_specs=self.network_variable_specs,
+                                   lazy_synapses=lazy_synapses)
 
-        file.write(rendered)
-
-        file.close()
+        self.write_file('wrapper.pyx', rendered)
 
     def generate_make_file(self):
         """
@@ -260,30 +457,40 @@ class CodeGeneration:
 
         numpy_includes = "-I" + numpy.get_include()
 
-        rendered = template.render(numpy_includes=numpy_includes)
+        sources = ['core.cpp', 'connectivity.cpp', 'random_functions.cpp', 'wrapper.cpp']
+        sources += ['population{}.cpp'.format(population.id) for population in self.populations]
+        sources += ['connection{}.cpp'.format(connection.id) for connection in self.connections]
 
-        full_path = os.path.join(self.base_path, 'Makefile')
-        file = open(full_path, "w+")
+        rendered = template.render(numpy_includes=numpy_includes, sources=sources, profile=self.profile,
+                                   optimization_flags=BUILD_PROFILES[self.profile])
 
-        file.write(rendered)
+        self.write_file('Makefile', rendered)
 
-        file.close()
+    def module_name(self):
+        """
+        :returns: Name of the network module to be imported
+
+        :rtype: str
+        """
+        return 'build.net{}.wrapper'.format(self.network.id)
 
     def load_module(self):
         """
         Loads the module.
         """
-        return importlib.import_module('build.net{}.wrapper'.format(self.network.id))
+        return importlib.import_module(self.module_name())
 
     def create_dirs(self):
         """
         Creates the directories for files.
 
+        The directory of an earlier build of the network is kept, so that its object files can be reused.
+
         :returns: Base path of the directory
 
         :rtype: str
 
-        :raises: IllegalStateException: If the directory `build` already exists.
+        :raises: IllegalStateException: If the network module is already loaded in this process.
         """
         cwd = os.getcwd()
 
@@ -293,7 +500,20 @@ class CodeGeneration:
             os.mkdir(dir_path)
 
         base_path = os.path.join(dir_path, 'net' + str(self.network.id))
-        if os.path.exists(base_path):
-            raise IllegalStateException("directory {} already exists".format(base_path))
-        os.mkdir(base_path)
+        if self.module_name() in sys.modules:
+            raise IllegalStateException("directory {} is in use".format(base_path))
+        if not os.path.exists(base_path):
+            os.mkdir(base_path)
         return base_path
+
+
+class _CallRecorder:
+    """
+    Stands in for the wrapper of a population and records the calls made to it.
+    """
+    def __init__(self, population_id, calls):
+        self.population_id = population_id
+        self.calls = calls
+
+    def __getattr__(self, name):
+        return lambda *arguments: self.calls.append((self.population_id, name, arguments))
@@ -0,0 +1,249 @@
+"""This module keeps built network modules around so that identical networks are not compiled twice.
+
+*Classes*:
+
+* **BuildCache**:
+    Size-bounded, content-addressed on-disk store of built network modules.
+
+    - **Entry**:
+        Holds information of a single cached module.
+"""
+
+
+import hashlib
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import sysconfig
+import time
+
+from cerebro.globals import PACKAGE_NAME
+
+
+class BuildCache:
+    """
+    Size-bounded, content-addressed on-disk store of built network modules.
+
+    Each entry is keyed on a hash of the generated sources, the build flags and the Python/NumPy ABI, so a network
+    whose generated code has not changed reuses the module built before instead of invoking the compiler again. When
+    the store grows beyond `max_size`, the least recently used entries are evicted.
+    """
+    MODULE_NAME = 'wrapper.so'
+    MODULE_SUFFIX = '.so'
+    DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+    COMPILER = 'g++'
+    _compiler_tag = None
+
+    class Entry:
+        """
+        Holds key, path, size and last use time of a cached module.
+        """
+        def __init__(self, key, path, size, last_used):
+            """
+            :param key: Content hash of the cached module
+            :param path: Path of the cached module file
+            :param size: Size of the cached module in bytes
+            :param last_used: Time of last use, in seconds since the epoch
+
+            :type key: str
+            :type path: str
+            :type size: int
+            :type last_used: float
+            """
+            self.key = key
+            self.path = path
+            self.size = size
+            self.last_used = last_used
+
+        def __repr__(self):
+            return '{}(key={}, size={}, last_used={})'.format(
+                self.__class__.__name__, self.key, self.size, time.ctime(self.last_used)
+            )
+
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param path: Directory of the store. Defaults to `$CEREBRO_CACHE_DIR` or `~/.cache/cerebro`.
+        :param max_size: Upper bound of the total size of the store in bytes.
+
+        :type path: str
+        :type max_size: int
+        """
+        if path is None:
+            path = os.environ.get(
+                'CEREBRO_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.cache', PACKAGE_NAME.lower())
+            )
+        self.path = path
+        self.max_size = max_size
+
+    @classmethod
+    def compiler_tag(cls):
+        """Describes the compiler and the target `-march=native` resolves to, which `-march=native` builds are bound to.
+
+        The compiler is only queried once per process.
+
+        :returns: Full version of the compiler and its target options under `-march=native`, empty if the compiler
+            cannot be run
+
+        :rtype: str
+        """
+        if cls._compiler_tag is None:
+            try:
+                version = subprocess.run([cls.COMPILER, '-dumpfullversion'], capture_output=True, text=True).stdout
+                target = subprocess.run([cls.COMPILER, '-march=native', '-Q', '--help=target'],
+                                        capture_output=True, text=True).stdout
+            except OSError:
+                version, target = '', ''
+            # the resolved architecture and tuning, and every instruction set extension that is enabled
+            options = [' '.join(line.split()) for line in target.splitlines()
+                       if line.split()[:1] in (['-march='], ['-mtune=']) or line.rstrip().endswith('[enabled]')]
+            cls._compiler_tag = '|'.join([version.strip()] + options)
+        return cls._compiler_tag
+
+    @staticmethod
+    def abi_tag():
+        """Describes the environment a built module is bound to.
+
+        :returns: Python implementation and version, extension suffix, machine, NumPy and Cython versions, compiler
+            version and native target
+
+        :rtype: str
+        """
+        import numpy
+        try:
+            import Cython
+            cython_version = Cython.__version__
+        except ImportError:
+            cython_version = ''
+
+        return '|'.join([
+            platform.python_implementation(),
+            sys.version,
+            sysconfig.get_config_var('EXT_SUFFIX') or '',
+            platform.machine(),
+            numpy.__version__,
+            cython_version,
+            BuildCache.compiler_tag()
+        ])
+
+    @staticmethod
+    def key(source_dir, file_names=None):
+        """Computes the key of the generated sources in a directory.
+
+        The rendered C++ and Cython sources are hashed as well as the Makefile, which carries the build flags.
+
+        :param source_dir: Directory of the generated sources
+        :param file_names: Names of the generated sources; `None` hashes every file of the directory
+
+        :type source_dir: str
+        :type file_names: list
+
+        :returns: Hexadecimal digest
+
+        :rtype: str
+        """
+        digest = hashlib.sha256(BuildCache.abi_tag().encode())
+        for name in sorted(os.listdir(source_dir) if file_names is None else file_names):
+            full_path = os.path.join(source_dir, name)
+            if not os.path.isfile(full_path):
+                continue
+            digest.update(name.encode())
+            with open(full_path, 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key + BuildCache.MODULE_SUFFIX)
+
+    def lookup(self, key):
+        """Returns the cached module of a key and marks it as recently used.
+
+        :param key: Content hash of the generated sources
+
+        :type key: str
+
+        :returns: Path of the cached module or None if the key is not cached
+
+        :rtype: str or None
+        """
+        entry_path = self._entry_path(key)
+        if not os.path.isfile(entry_path):
+            return None
+        os.utime(entry_path)
+        return entry_path
+
+    def store(self, key, module_path):
+        """Adds a built module to the store and evicts least recently used entries if the store is full.
+
+        :param key: Content hash of the generated sources
+        :param module_path: Path of the built module
+
+        :type key: str
+        :type module_path: str
+        """
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = '{}.{}.tmp'.format(self._entry_path(key), os.getpid())
+        shutil.copyfile(module_path, temp_path)
+        os.replace(temp_path, self._entry_path(key))
+        self.evict(keep=key)
+
+    def entries(self):
+        """Lists the cached modules, most recently used first.
+
+        :returns: Cached entries
+
+        :rtype: list of cerebro.code_generation.cache.BuildCache.Entry
+        """
+        if not os.path.isdir(self.path):
+            return []
+
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(BuildCache.MODULE_SUFFIX):
+                continue
+            full_path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(full_path)
+            except FileNotFoundError:
+                continue
+            entries.append(BuildCache.Entry(name[:-len(BuildCache.MODULE_SUFFIX)], full_path, stat.st_size,
+                                            stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry.last_used, reverse=True)
+
+    def size(self):
+        """
+        :returns: Total size of the cached modules in bytes
+
+        :rtype: int
+        """
+        return sum(entry.size for entry in self.entries())
+
+    def evict(self, keep=None):
+        """Removes least recently used entries until the store fits in `max_size`.
+
+        :param keep: Key of an entry that must not be evicted
+
+        :type keep: str
+        """
+        entries = self.entries()
+        total_size = sum(entry.size for entry in entries)
+        for entry in reversed(entries):
+            if total_size <= self.max_size:
+                break
+            if entry.key == keep:
+                continue
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total_size -= entry.size
+
+    def clear(self):
+        """Removes all cached modules."""
+        for entry in self.entries():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
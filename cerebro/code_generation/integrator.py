@@ -0,0 +1,140 @@
+"""This module generates the C++ statements that advance the ODEs of a neuron or a synapse by one step.
+
+*Classes*:
+
+* **Integrator**:
+    Generates the integration code of ODEs by a method.
+"""
+
+
+from cerebro.enums import VariableScope
+
+
+class Integrator:
+    """
+    Generates the integration code of ODEs by a method.
+
+    ODEs that are linear with coefficients shared by all neurons or synapses, i.e. `dv/dt = a * v + b`, are solved in
+    closed form unless another method is chosen: `v(t + dt) = v(t) * exp(a * dt) + b * (exp(a * dt) - 1) / a`. The
+    coefficients do not change from one neuron or synapse to another, so `prologue` computes them once per step, before
+    the loop over neurons or synapses. The other ODEs are integrated together by the chosen method in `step`, which
+    evaluates every right-hand side at the values of the previous step before any variable is assigned.
+    """
+    def __init__(self, equations, method=None, index='i'):
+        """
+        :param equations: Equations of a neuron or synapse; equations other than ODEs are ignored.
+        :param method: Integration method, one of `cerebro.globals.ODE_METHODS`, `None` for the default.
+        :param index: Name of the loop index of local variables, `i` for neurons and `j` for synapses.
+
+        :type equations: list
+        :type method: str
+        :type index: str
+        """
+        self.method = method if method is not None else 'euler'
+        self.index = index
+        equations = [equation for equation in equations if equation.equation_type == 'ode']
+        self.exact = [
+            equation for equation in equations if equation.linear is not None and method in (None, 'exact')
+        ]
+        self.stepped = [equation for equation in equations if equation not in self.exact]
+
+    def __bool__(self):
+        return bool(self.exact or self.stepped)
+
+    def _target(self, equation):
+        if equation.variable.scope == VariableScope.LOCAL.value:
+            return '{}[{}]'.format(equation.variable.name, self.index)
+        return equation.variable.name
+
+    @staticmethod
+    def _temporary(equation, name):
+        return '_{}_{}'.format(equation.variable.name, name)
+
+    def _stage(self, name, values):
+        # right-hand sides of all stepped ODEs, evaluated at `values`: the stage variable of each ODE, or its current
+        # value if `values` is None
+        substitutions = {} if values is None else {
+            equation.variable.name: self._temporary(equation, values) for equation in self.stepped
+        }
+        return [
+            'const double {} = {};'.format(self._temporary(equation, name), equation.expression.render(substitutions))
+            for equation in self.stepped
+        ]
+
+    def _midpoint(self, name, slope, fraction):
+        return [
+            'const double {} = {} + {} * dt * {};'.format(
+                self._temporary(equation, name), self._target(equation), fraction, self._temporary(equation, slope)
+            ) for equation in self.stepped
+        ]
+
+    @staticmethod
+    def _phi(rate):
+        # (exp(rate * dt) - 1) / rate, which tends to dt as the rate tends to zero
+        return '({rate} == 0.0 ? dt : expm1({rate} * dt) / {rate})'.format(rate=rate)
+
+    @property
+    def prologue(self):
+        """
+        :returns: Statements computing the coefficients of the ODEs solved in closed form, once per step.
+
+        :rtype: list of str
+        """
+        statements = []
+        for equation in self.exact:
+            rate = self._temporary(equation, 'rate')
+            statements += [
+                'const double {} = {};'.format(rate, equation.linear[0]),
+                'const double {} = exp({} * dt);'.format(self._temporary(equation, 'decay'), rate),
+                'const double {} = ({}) * {};'.format(
+                    self._temporary(equation, 'drive'), equation.linear[1], self._phi(rate)
+                ),
+            ]
+        return statements
+
+    @property
+    def step(self):
+        """
+        :returns: Statements advancing all ODEs by one step, inside the loop over neurons or synapses.
+
+        :rtype: list of str
+        """
+        statements = []
+        increments = {}
+        if self.method in ('euler', 'exact'):
+            statements += self._stage('k1', None)
+            increments = {equation: '{} * dt'.format(self._temporary(equation, 'k1')) for equation in self.stepped}
+        elif self.method == 'exponential_euler':
+            statements += self._stage('k1', None)
+            for equation in self.stepped:
+                rate = self._temporary(equation, 'rate')
+                statements.append('const double {} = {};'.format(rate, equation.jacobian))
+                increments[equation] = '{} * {}'.format(self._temporary(equation, 'k1'), self._phi(rate))
+        elif self.method == 'rk2':
+            statements += self._stage('k1', None)
+            statements += self._midpoint('y2', 'k1', 0.5)
+            statements += self._stage('k2', 'y2')
+            increments = {equation: '{} * dt'.format(self._temporary(equation, 'k2')) for equation in self.stepped}
+        elif self.method == 'rk4':
+            statements += self._stage('k1', None)
+            statements += self._midpoint('y2', 'k1', 0.5)
+            statements += self._stage('k2', 'y2')
+            statements += self._midpoint('y3', 'k2', 0.5)
+            statements += self._stage('k3', 'y3')
+            statements += self._midpoint('y4', 'k3', 1.0)
+            statements += self._stage('k4', 'y4')
+            increments = {
+                equation: '({} + 2.0 * {} + 2.0 * {} + {}) * dt / 6.0'.format(
+                    *(self._temporary(equation, stage) for stage in ('k1', 'k2', 'k3', 'k4'))
+                ) for equation in self.stepped
+            }
+
+        for equation in self.exact:
+            statements.append('{target} = {target} * {decay} + {drive};'.format(
+                target=self._target(equation),
+                decay=self._temporary(equation, 'decay'),
+                drive=self._temporary(equation, 'drive')
+            ))
+        for equation in self.stepped:
+            statements.append('{} += {};'.format(self._target(equation), increments[equation]))
+        return statements
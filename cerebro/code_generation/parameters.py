@@ -0,0 +1,130 @@
+"""This module holds values that a network compiled in parametric mode reads at run time instead of compile time.
+
+*Classes*:
+
+* **ParameterBlock**:
+    Runtime parameter block of a network.
+
+    - **Parameter**:
+        Holds information of a single runtime parameter.
+"""
+
+
+from cerebro.exceptions import IllegalArgumentException
+
+
+class ParameterBlock:
+    """
+    Runtime parameter block of a network.
+
+    Values that would otherwise be pasted into the generated code as literals, e.g. initial values of variables,
+    connection type arguments and population sizes, are kept in a single `_parameters` array of the generated module.
+    The generated code reads the array in `initialize()`, so the same built module serves any choice of values.
+    """
+    class Parameter:
+        """
+        Holds owner, name, value and position of a runtime parameter.
+        """
+        def __init__(self, owner, name, value, index):
+            """
+            :param owner: Object the parameter belongs to, e.g. a population, a connection or a network
+            :param name: Name of the parameter
+            :param value: Current value of the parameter
+            :param index: Position of the parameter in the generated `_parameters` array
+
+            :type owner: object
+            :type name: str
+            :type value: float
+            :type index: int
+            """
+            self.owner = owner
+            self.name = name
+            self.value = value
+            self.index = index
+
+        def __repr__(self):
+            return '{}({}.{}={})'.format(self.__class__.__name__, self.owner.__class__.__name__, self.name, self.value)
+
+    def __init__(self):
+        self.parameters = {}
+        self.module = None
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def __iter__(self):
+        return iter(sorted(self.parameters.values(), key=lambda parameter: parameter.index))
+
+    def define(self, owner, name, value):
+        """Adds a parameter to the block.
+
+        :param owner: Object the parameter belongs to
+        :param name: Name of the parameter
+        :param value: Initial value of the parameter
+
+        :type owner: object
+        :type name: str
+        :type value: float or str
+
+        :returns: C++ expression reading the parameter at run time
+
+        :rtype: str
+        """
+        parameter = self.parameters.get((owner, name))
+        if parameter is None:
+            parameter = ParameterBlock.Parameter(owner, name, float(value), len(self.parameters))
+            self.parameters[(owner, name)] = parameter
+        return '_parameters[{}]'.format(parameter.index)
+
+    def _get_parameter(self, owner, name):
+        parameter = self.parameters.get((owner, name))
+        if parameter is None:
+            raise IllegalArgumentException('{} has no runtime parameter named {}'.format(
+                owner.__class__.__name__, name
+            ))
+        return parameter
+
+    def get(self, owner, name):
+        """
+        :param owner: Object the parameter belongs to
+        :param name: Name of the parameter
+
+        :type owner: object
+        :type name: str
+
+        :returns: Current value of the parameter
+
+        :rtype: float
+
+        :raises IllegalArgumentException: If the parameter is not defined.
+        """
+        return self._get_parameter(owner, name).value
+
+    def set(self, owner, name, value):
+        """Sets the value of a parameter and passes it to the bound module.
+
+        :param owner: Object the parameter belongs to
+        :param name: Name of the parameter
+        :param value: New value of the parameter
+
+        :type owner: object
+        :type name: str
+        :type value: float
+
+        :raises IllegalArgumentException: If the parameter is not defined.
+        """
+        parameter = self._get_parameter(owner, name)
+        parameter.value = float(value)
+        if self.module is not None:
+            self.module.set_parameter(parameter.index, parameter.value)
+
+    def bind(self, module):
+        """Binds the block to a generated module and passes all values to it.
+
+        :param module: The generated network module
+
+        :type module: module
+        """
+        self.module = module
+        for parameter in self:
+            module.set_parameter(parameter.index, parameter.value)
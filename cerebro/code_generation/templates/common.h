@@ -0,0 +1,20 @@
+#pragma once
+
+#include <vector>
+#include <queue>
+#include <map>
+#include <random>
+#include <math.h>
+#include <set>
+#include <algorithm>
+#include <functional>
+#include <unordered_set>
+
+#ifdef _OPENMP
+#include <omp.h>
+#else
+inline int omp_get_thread_num() { return 0; }
+inline int omp_get_num_threads() { return 1; }
+inline int omp_get_max_threads() { return 1; }
+inline void omp_set_num_threads(int) {}
+#endif
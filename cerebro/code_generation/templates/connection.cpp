@@ -0,0 +1,233 @@
+#include "connection{{ connection.id }}.hpp"
+
+{% macro apply_equations(equations) %}
+{% for equation in equations %}
+{% set target = equation.variable.name + ('[j]' if equation.variable.scope == 'local' else '') %}
+{% if equation.equation_type == "ode" %}
+{{ target }} += ({{ equation.expression }}) * dt;
+{% else %}
+{{ target }} = {{ equation.expression }};
+{% endif %}
+{% endfor %}
+{% endmacro %}
+{% set delay = variables | selectattr('name', 'equalto', 'delay') | first %}
+{% set delay_plastic = delay is defined and (update_equations + update_pre_spike_equations + update_post_spike_equations)
+    | selectattr('variable.name', 'equalto', 'delay') | list | length > 0 %}
+{% set lazy_transmission = event_driven and update_equations
+    | selectattr('variable.name', 'in', ['w', 'delay']) | list | length > 0 %}
+
+void Connection{{ connection.id }}::init_connection() {
+    post_rank.clear();
+    for (int rank = 0;rank < population{{ connection.post.id }}.size; rank++)
+        post_rank.push_back(rank);
+
+    if(!keep_connectivity)
+        set_connectivity({{ connect_function }});
+
+    {% for var in variables %}
+        {% if var.scope != 'local' %}
+    {{var.name}} = {{ var.init }};
+        {% endif %}
+    {% endfor %}
+
+    _psp_slots = 0;
+    _psp_buffer.clear();
+    fit_psp_buffer();
+}
+
+void Connection{{ connection.id }}::set_connectivity(SparseConnectivity connectivity) {
+    row_ptr = std::move(connectivity.row_ptr);
+    pre_rank = std::move(connectivity.pre_rank);
+
+    inverse_connectivity_matrix();
+
+    {% for var in variables %}
+        {% if var.scope == 'local' %}
+    {{ var.name }} = std::vector<{{ var.c_type }}>(pre_rank.size(), {{ var.init }});
+        {% endif %}
+    {% endfor %}
+
+    bind_connectivity();
+}
+
+void Connection{{ connection.id }}::generate_delayed_potentiations() {
+    int post_size = population{{ connection.post.id }}.size;
+    const std::vector<int> &spiked = population{{ connection.pre.id }}.spiked;
+
+    // each thread delivers to its own range of post-synaptic rows, so no two threads write the same input and the
+    // order of accumulation does not depend on the number of threads
+    {% if not delay_plastic %}
+    #pragma omp parallel
+    {% endif %}
+    {
+        long int rows = post_rank.size();
+        int first_row = rows * omp_get_thread_num() / omp_get_num_threads();
+        int last_row = rows * (omp_get_thread_num() + 1) / omp_get_num_threads();
+
+        for(const int &rank_pre: spiked) {
+            int k = std::lower_bound(inv_pre_row.begin() + inv_pre_ptr[rank_pre],
+                                     inv_pre_row.begin() + inv_pre_ptr[rank_pre + 1], first_row) - inv_pre_row.begin();
+
+            for(; k < inv_pre_ptr[rank_pre + 1] && inv_pre_row[k] < last_row; k++) {
+                int j = inv_pre_rank[k];
+                int rank_post = post_rank[inv_pre_row[k]];
+                {% if lazy_transmission %}
+                // the weight or delay is integrated lazily, so it is brought up to date before it is read
+                advance_synapse(j);
+                {% endif %}
+                {% if delay is not defined %}
+                int d = 0;
+                {% elif delay.scope == 'local' %}
+                int d = std::max(0, (int)delay[j]);
+                {% else %}
+                int d = std::max(0, (int)delay);
+                {% endif %}
+                {% if delay_plastic %}
+                if(d >= _psp_slots)
+                    resize_psp_buffer(d);
+                {% endif %}
+
+                _psp_buffer[((t + d) % _psp_slots) * post_size + rank_post] += w[j];
+            }
+        }
+    }
+}
+
+void Connection{{ connection.id }}::compute_psp() {
+    int post_size = population{{ connection.post.id }}.size;
+    double *psp = _psp_buffer.data() + (t % _psp_slots) * post_size;
+    std::vector<float> &g_exc = population{{ connection.post.id }}.g_exc;
+
+    #pragma omp parallel for schedule(static)
+    for(int rank_post = 0; rank_post < post_size; rank_post++) {
+        g_exc[rank_post] += psp[rank_post];
+        psp[rank_post] = 0.0;
+    }
+}
+
+{% if event_driven and update_equations %}
+void Connection{{ connection.id }}::advance_synapse(int j) {
+    double _elapsed = (t - _last_update[j]) * dt;
+    if(_elapsed <= 0.0)
+        return;
+
+    {% for equation in update_equations %}
+    {
+        double _decay = {{ equation.linear[0] }};
+        double _drive = {{ equation.linear[1] }};
+        if(_decay == 0.0)
+            {{ equation.variable.name }}[j] += _drive * _elapsed;
+        else
+            {{ equation.variable.name }}[j] = ({{ equation.variable.name }}[j] + _drive / _decay) * exp(_decay * _elapsed) - _drive / _decay;
+    }
+    {% endfor %}
+    _last_update[j] = t;
+}
+
+void Connection{{ connection.id }}::advance_synapses() {
+    #pragma omp parallel for schedule(static)
+    for(int j = 0; j < pre_rank.size(); j++)
+        advance_synapse(j);
+}
+{% endif %}
+
+void Connection{{ connection.id }}::update_synapse() {
+    {% if event_driven %}
+    {% if update_pre_spike_equations %}
+    const std::vector<int> &pre_spiked = population{{ connection.pre.id }}.spiked;
+    {% if parallel %}
+    #pragma omp parallel for schedule(dynamic, 16)
+    {% endif %}
+    for(int spike_idx = 0; spike_idx < pre_spiked.size(); spike_idx++) {
+        int rank_pre = pre_spiked[spike_idx];
+        for(int k = inv_pre_ptr[rank_pre]; k < inv_pre_ptr[rank_pre + 1]; k++) {
+            int j = inv_pre_rank[k];
+            int rank_post = post_rank[inv_pre_row[k]];
+            {% if update_equations %}
+            advance_synapse(j);
+            {% endif %}
+
+            {{ apply_equations(update_pre_spike_equations) | indent(16) }}
+        }
+    }
+    {% endif %}
+
+    {% if update_post_spike_equations %}
+    const std::vector<int> &post_spiked = population{{ connection.post.id }}.spiked;
+    {% if parallel %}
+    #pragma omp parallel for schedule(dynamic, 16)
+    {% endif %}
+    for(int spike_idx = 0; spike_idx < post_spiked.size(); spike_idx++) {
+        int rank_post = post_spiked[spike_idx];
+        int i = inv_post_rank[rank_post];
+        if(i < 0)
+            continue;
+
+        for(int j = row_ptr[i]; j < row_ptr[i + 1]; j++) {
+            int rank_pre = pre_rank[j];
+            {% if update_equations %}
+            advance_synapse(j);
+            {% endif %}
+
+            {{ apply_equations(update_post_spike_equations) | indent(16) }}
+        }
+    }
+    {% endif %}
+    {% else %}
+    std::vector<bool> pre_spiked(population{{ connection.pre.id }}.size, false);
+    for (const int &spiked_idx: population{{ connection.pre.id }}.spiked) {
+        pre_spiked[spiked_idx] = true;
+    }
+
+    // local variables are read through pointers that shadow the vectors; they never alias, which lets the compiler
+    // vectorize the equations
+    {% for var in variables if var.scope == 'local' %}
+    {{ var.c_type }} *__restrict__ {{ var.name }} = this->{{ var.name }}.data();
+    {% endfor %}
+
+    {% for statement in integrator.prologue %}
+    {{ statement }}
+    {% endfor %}
+    {% for name, expression in optimizer.invariants %}
+    const double {{ name }} = {{ expression }};
+    {% endfor %}
+
+    {% if parallel %}
+    #pragma omp parallel for schedule(static)
+    {% endif %}
+    for(int i = 0; i < post_rank.size(); i++) {
+        int rank_post = post_rank[i];
+        bool post_spiked = population{{ connection.post.id }}.last_spike[rank_post] == t;
+
+        {% if parallel and not (update_pre_spike_equations or update_post_spike_equations) %}
+        #pragma omp simd
+        {% endif %}
+        for(int j = row_ptr[i]; j < row_ptr[i + 1]; j++) {
+            int rank_pre = pre_rank[j];
+
+            if(pre_spiked[rank_pre]) {
+                {{ apply_equations(update_pre_spike_equations) | indent(20) }}
+            }
+
+            if(post_spiked) {
+                {{ apply_equations(update_post_spike_equations) | indent(20) }}
+            }
+
+            {% for name, expression in optimizer.temporaries %}
+            const double {{ name }} = {{ expression }};
+            {% endfor %}
+            {% for equation in update_equations if equation.equation_type != "ode" %}
+            double _{{ equation.variable.name }} = {{ equation.expression }};
+            {% endfor %}
+
+            {% for statement in integrator.step %}
+            {{ statement }}
+            {% endfor %}
+
+            {% for equation in update_equations if equation.equation_type != "ode" %}
+            {{ equation.variable.name }}[j] = _{{ equation.variable.name }};
+            {% endfor %}
+        }
+    }
+    {% endif %}
+}
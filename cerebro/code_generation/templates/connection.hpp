@@ -3,64 +3,151 @@
 #include "population{{ connection.pre.id }}.hpp"
 #include "population{{ connection.post.id }}.hpp"
 #include "connectivity.h"
-#include "delayed_potential.h"
 #include "random_functions.h"
-
-extern std::default_random_engine random_generator;
+#include "monitor.h"
 
 extern Population{{ connection.pre.id }} population{{ connection.pre.id }} ;
 extern Population{{ connection.post.id }} population{{ connection.post.id }} ;
 extern long int t;
+extern std::vector<double> _parameters;
 
 {% for var in network_variables %}
 extern {{ var.c_type }} {{ var.name }};
 {% endfor %}
 
+{% set delay = variables | selectattr('name', 'equalto', 'delay') | first %}
 struct Connection{{ connection.id }} {
+    // synapses are kept in compressed sparse row order: the synapses of post-synaptic row `i` are
+    // `row_ptr[i] <= j < row_ptr[i + 1]`, and every local variable is a flat array indexed by `j`.
     std::vector<int> post_rank;
-    std::vector< std::vector< int > > pre_rank;
-    std::map< int, std::vector< std::pair<int, int> > > inv_pre_rank ;
+    std::vector<int> row_ptr;
+    std::vector<int> pre_rank;
+    // inverse (compressed sparse column) order: the synapses of pre-synaptic neuron `rank` are
+    // `inv_pre_rank[k]`, in row `inv_pre_row[k]`, for `inv_pre_ptr[rank] <= k < inv_pre_ptr[rank + 1]`.
+    std::vector<int> inv_pre_ptr;
+    std::vector<int> inv_pre_rank;
+    std::vector<int> inv_pre_row;
     std::vector< int > inv_post_rank ;
-    std::set<DelayedPotentiation> delayed_potentiations;
+    // delayed input is accumulated in a ring buffer of `_psp_slots` rows, one value per post-synaptic neuron; the row
+    // delivered at step `t` is `t % _psp_slots`, so the buffer holds one more row than the longest delay.
+    int _psp_slots;
+    std::vector<double> _psp_buffer;
+    // set when the connectivity and local variables are loaded from saved state after initialization, so that
+    // `init_connection()` does not build them
+    bool keep_connectivity = false;
 
     {% for var in variables %}
     {% if var.scope == 'local' %}
-    std::vector< std::vector< {{ var.c_type}} > > {{ var.name }};
+    std::vector< {{ var.c_type}} > {{ var.name }};
     {% else %}
     {{ var.c_type }} {{ var.name }};
     {% endif %}
     {% endfor %}
 
-    void init_connection() {
-        for (int rank = 0;rank < population{{ connection.post.id }}.size; rank++)
-            post_rank.push_back(rank);
+    {% for monitor in monitors %}
+    {% for var in variables if var.name in monitor.variables %}
+    Recorder< {{ var.c_type }} > _monitor{{ monitor.id }}_{{ var.name }};
+    {% endfor %}
+    {% endfor %}
 
-        pre_rank = {{  connect_function }};
+    // the methods carrying the connectivity and the equations of the synapse are defined in
+    // connection{{ connection.id }}.cpp, so that changing them only recompiles that file
+    void init_connection();
+
+    void fit_psp_buffer() {
+        {% if delay is not defined %}
+        int max_delay = 0;
+        {% elif delay.scope == 'local' %}
+        int max_delay = delay.empty() ? 0 : std::max(0, (int)*std::max_element(delay.begin(), delay.end()));
+        {% else %}
+        int max_delay = std::max(0, (int)delay);
+        {% endif %}
+        if(max_delay >= _psp_slots)
+            resize_psp_buffer(max_delay);
+    }
 
-        inverse_connectivity_matrix();
+    void resize_psp_buffer(int max_delay) {
+        int post_size = population{{ connection.post.id }}.size;
+        int slots = max_delay + 1;
+        std::vector<double> buffer(slots * post_size, 0.0);
 
-        {% for var in variables %}
-            {% if var.scope == 'local' %}
-        {{ var.name }} = std::vector< std::vector<{{ var.c_type }}> >(post_rank.size(), std::vector<{{var.c_type}}>());
-            {% else %}
-        {{var.name}} = {{ var.init }};
-            {% endif %}
-        {% endfor %}
+        for(int d = 0; d < std::min(_psp_slots, slots); d++) {
+            int old_slot = (t + d) % _psp_slots;
+            int new_slot = (t + d) % slots;
+            std::copy(_psp_buffer.begin() + old_slot * post_size, _psp_buffer.begin() + (old_slot + 1) * post_size,
+                      buffer.begin() + new_slot * post_size);
+        }
 
-        {% for var in variables %}
-            {% if var.scope == 'local' %}
-        for(int post_idx = 0;post_idx < post_rank.size(); post_idx++)
-            {{ var.name }}[post_idx] = std::vector<{{var.c_type}}>(pre_rank[post_idx].size(), {{ var.init }});
-            {% endif %}
+        _psp_slots = slots;
+        _psp_buffer = std::move(buffer);
+    }
+
+    void set_connectivity(SparseConnectivity connectivity);
+
+    // resets per-synapse bookkeeping, after the synapses are set or loaded
+    void bind_connectivity() {
+        {% if event_driven and update_equations %}
+        _last_update = std::vector<long int>(pre_rank.size(), t);
+        {% endif %}
+
+        {% for monitor in monitors %}
+        {% for var in variables if var.name in monitor.variables %}
+        {% if var.scope == 'local' %}
+        _monitor{{ monitor.id }}_{{ var.name }}.reset(monitor_indices(_monitor{{ monitor.id }}_{{ var.name }}.ranks));
+        {% else %}
+        _monitor{{ monitor.id }}_{{ var.name }}.reset(std::vector<int>(1, 0));
+        {% endif %}
+        {% endfor %}
         {% endfor %}
+    }
 
+    // synapses of the post-synaptic ranks of a monitor, all synapses if no rank is given
+    std::vector<int> monitor_indices(const std::vector<int> &ranks) {
+        std::vector<int> indices;
+        if(ranks.empty()) {
+            for(int j = 0; j < pre_rank.size(); j++)
+                indices.push_back(j);
+            return indices;
+        }
+        for(const int &rank: ranks) {
+            if(rank < 0 || rank >= inv_post_rank.size() || inv_post_rank[rank] < 0)
+                continue;
+            for(int j = row_ptr[inv_post_rank[rank]]; j < row_ptr[inv_post_rank[rank] + 1]; j++)
+                indices.push_back(j);
+        }
+        return indices;
+    }
+
+    void record() {
+        {% for monitor in monitors %}
+        {% for var in variables if var.name in monitor.variables %}
+        {% if var.scope == 'local' and event_driven and update_equations %}
+        if(_monitor{{ monitor.id }}_{{ var.name }}.due())
+            for(const int &j: _monitor{{ monitor.id }}_{{ var.name }}.indices)
+                advance_synapse(j);
+        {% endif %}
+        _monitor{{ monitor.id }}_{{ var.name }}.record({{ var.name }});
+        {% endfor %}
+        {% endfor %}
     }
 
     void inverse_connectivity_matrix() {
-        inv_pre_rank =  std::map<int, std::vector< std::pair<int, int> > > ();
-        for(int i = 0; i < pre_rank.size(); i++) {
-            for(int j = 0; j <pre_rank[i].size(); j++) {
-                inv_pre_rank[pre_rank[i][j]].push_back(std::pair<int, int>(i, j));
+        int pre_size = population{{ connection.pre.id }}.size;
+
+        inv_pre_ptr = std::vector<int>(pre_size + 1, 0);
+        for(int j = 0; j < pre_rank.size(); j++)
+            inv_pre_ptr[pre_rank[j] + 1]++;
+        for(int rank = 0; rank < pre_size; rank++)
+            inv_pre_ptr[rank + 1] += inv_pre_ptr[rank];
+
+        inv_pre_rank = std::vector<int>(pre_rank.size());
+        inv_pre_row = std::vector<int>(pre_rank.size());
+        std::vector<int> next = std::vector<int>(inv_pre_ptr.begin(), inv_pre_ptr.end() - 1);
+        for(int i = 0; i < post_rank.size(); i++) {
+            for(int j = row_ptr[i]; j < row_ptr[i + 1]; j++) {
+                int k = next[pre_rank[j]]++;
+                inv_pre_rank[k] = j;
+                inv_pre_row[k] = i;
             }
         }
 
@@ -70,91 +157,23 @@ struct Connection{{ connection.id }} {
         }
     }
 
-    void generate_delayed_potentiations(){
-        for(int pre_idx = 0; pre_idx < population{{ connection.pre.id }}.spiked.size(); pre_idx++) {
-            int spiked_idx = population{{ connection.pre.id }}.spiked[pre_idx];
-            auto inv_post_ptr = inv_pre_rank.find(spiked_idx);
-            if (inv_post_ptr == inv_pre_rank.end())
-                continue;
+    void generate_delayed_potentiations();
 
-            std::vector< std::pair<int, int> > &inv_post = inv_post_ptr->second;
+    void compute_psp();
 
-            for(int post_idx = 0; post_idx < inv_post.size(); post_idx++) {
-                int i = inv_post[post_idx].first;
-                int j = inv_post[post_idx].second;
-                population{{ connection.post.id }}.g_exc[post_rank[i]] += w[i][j];
-                delayed_potentiations.insert(
-                    DelayedPotentiation(
-                        post_rank[i],
-                        t + delay[i][j],
-                        w[i][j]
-                    )
-                );
+    {% if event_driven and update_equations %}
+    // continuous equations are linear with loop-invariant coefficients, so each synapse is advanced in closed form
+    // from its last update to the current step only when it is touched.
+    std::vector<long int> _last_update;
 
-            }
-        }
-    }
-
-    void compute_psp() {
-        while(!delayed_potentiations.empty() && delayed_potentiations.begin() -> time_to_apply <= t){
-            delayed_potentiations.begin()->apply(population{{ connection.post.id }}.g_exc);
-            delayed_potentiations.erase(delayed_potentiations.begin());
-        }
-    }
-
-    void update_synapse() {
-        std::unordered_set<int> pre_spiked_set;
-        for (const int &spiked_idx: population{{ connection.pre.id }}.spiked) {
-            pre_spiked_set.insert(spiked_idx);
-        }
+    void advance_synapse(int j);
 
-        std::unordered_set<int> post_spiked_set;
-        for (const int &spiked_idx: population{{ connection.post.id }}.spiked) {
-            post_spiked_set.insert(spiked_idx);
-        }
+    void advance_synapses();
+    {% else %}
+    void advance_synapses() {}
+    {% endif %}
 
-        for(int i = 0; i < post_rank.size(); i++) {
-            int rank_post = post_rank[i];
-
-            for(int j = 0; j < pre_rank[i].size(); j++) {
-                int rank_pre = pre_rank[i][j];
-
-                if(pre_spiked_set.find(i) != pre_spiked_set.end()) {
-                    {% for equation in update_pre_spike_equations %}
-                    double __{{ equation.variable.name }} = {{ equation.expression }};
-                    {% if equation.equation_type == "ode" %}
-                    {{ equation.variable.name }}[i][j] += __{{ equation.variable.name }} * dt;
-                    {% else %}
-                    {{ equation.variable.name }}[i][j] += __{{ equation.variable.name }};
-                    {% endif %}
-                    {% endfor %}
-                }
-
-                if(post_spiked_set.find(j) != post_spiked_set.end()) {
-                    {% for equation in update_post_spike_equations %}
-                    double __{{ equation.variable.name }} = {{ equation.expression }};
-                    {% if equation.equation_type == "ode" %}
-                    {{ equation.variable.name }}[i][j] += __{{ equation.variable.name }} * dt;
-                    {% else %}
-                    {{ equation.variable.name }}[i][j] += __{{ equation.variable.name }};
-                    {% endif %}
-                    {% endfor %}
-                }
-
-                {% for equation in update_equations %}
-                double _{{ equation.variable.name }} = {{ equation.expression }};
-                {% endfor %}
-
-                {% for equation in update_equations %}
-                    {% if equation.equation_type == "ode" %}
-                {{ equation.variable.name }}[i][j] += _{{ equation.variable.name }} * dt;
-                    {% else %}
-                {{ equation.variable.name }}[i][j] += _{{ equation.variable.name }};
-                    {% endif %}
-                {% endfor %}
-            }
-        }
-    }
+    void update_synapse();
 
     std::vector<int> get_post_rank() {
         return post_rank;
@@ -165,41 +184,68 @@ struct Connection{{ connection.id }} {
     }
 
     std::vector< std::vector<int> > get_pre_rank() {
-        return pre_rank;
+        SparseConnectivity connectivity;
+        connectivity.row_ptr = row_ptr;
+        connectivity.pre_rank = pre_rank;
+        return expand_connectivity(connectivity);
     }
 
     void set_pre_rank(std::vector< std::vector<int> > _pre_rank) {
-        pre_rank = _pre_rank;
+        set_connectivity(compress_connectivity(_pre_rank));
+        fit_psp_buffer();
+    }
+
+    std::vector<int> get_row_ptr() {
+        return row_ptr;
     }
 
     int nb_synapses(int n) {
-        return pre_rank[n].size();
+        return row_ptr[n + 1] - row_ptr[n];
     }
 
+    {% for monitor in monitors %}
+    void configure_monitor{{ monitor.id }}(std::vector<int> ranks, long int interval, int capacity) {
+        {% for var in variables if var.name in monitor.variables %}
+        _monitor{{ monitor.id }}_{{ var.name }}.configure(ranks, interval, capacity);
+        {% endfor %}
+    }
+
+    {% endfor %}
+
     {% for var in variables %}
     {% if var.scope == 'local' %}
     std::vector<std::vector< {{var.c_type}} > > get_{{ var.name }}() {
-        return {{ var.name }};
+        std::vector<std::vector< {{var.c_type}} > > value;
+        for(int i = 0; i < post_rank.size(); i++)
+            value.push_back(get_dendrite_{{ var.name }}(i));
+        return value;
     }
 
     std::vector<{{var.c_type}}> get_dendrite_{{ var.name }}(int rank) {
-        return {{ var.name }}[rank];
+        return std::vector<{{var.c_type}}>({{ var.name }}.begin() + row_ptr[rank], {{ var.name }}.begin() + row_ptr[rank + 1]);
     }
 
     {{ var.c_type }} get_synapse_{{ var.name }}(int rank_post, int rank_pre) {
-        return {{ var.name }}[rank_post][rank_pre];
+        return {{ var.name }}[row_ptr[rank_post] + rank_pre];
     }
 
     void set_{{ var.name }}(std::vector<std::vector< {{var.c_type}} > >value) {
-        {{ var.name }} = value;
+        for(int i = 0; i < value.size(); i++)
+            set_dendrite_{{ var.name }}(i, value[i]);
     }
 
     void set_dendrite_{{ var.name }}(int rank, std::vector<{{var.c_type}}> value) {
-        {{ var.name }}[rank] = value;
+        std::copy(value.begin(), value.end(), {{ var.name }}.begin() + row_ptr[rank]);
+        {% if var.name == 'delay' %}
+        fit_psp_buffer();
+        {% endif %}
     }
 
     void set_synapse_{{ var.name }}(int rank_post, int rank_pre, {{var.c_type}} value) {
-        {{ var.name }}[rank_post][rank_pre] = value;
+        {{ var.name }}[row_ptr[rank_post] + rank_pre] = value;
+        {% if var.name == 'delay' %}
+        fit_psp_buffer();
+        {% endif %}
     }
     {% else %}
 
@@ -209,8 +255,11 @@ struct Connection{{ connection.id }} {
 
     void set_{{ var.name }}({{ var.c_type }} value) {
         {{ var.name }} = value;
+        {% if var.name == 'delay' %}
+        fit_psp_buffer();
+        {% endif %}
     }
     {% endif %}
     {% endfor %}
 
-};
+};
\ No newline at end of file
@@ -1,52 +1,190 @@
 #include "connectivity.h"
 
-bool all_to_all_func(int pre_rank_idx, int post_rank_idx){
-    return true;
+// smallest positive draw of `random_uniform_at`; kernel values below it never connect, so kernels are cut there
+static const double MIN_DRAW = 1.0 / 9007199254740992.0;
+
+SparseConnectivity connect_all_to_all(int pre_size, int post_size){
+    SparseConnectivity sparse;
+    sparse.row_ptr = std::vector<int>(post_size + 1, 0);
+    sparse.pre_rank.reserve((long int)pre_size * post_size);
+
+    for (int post_rank_idx = 0; post_rank_idx < post_size; post_rank_idx++) {
+        for (int pre_rank_idx = 0; pre_rank_idx < pre_size; pre_rank_idx++)
+            sparse.pre_rank.push_back(pre_rank_idx);
+        sparse.row_ptr[post_rank_idx + 1] = sparse.pre_rank.size();
+    }
+    return sparse;
+}
+
+// Each row is sampled with geometric skips: the gap to the next connected pre-synaptic rank is drawn directly, so a
+// row costs one draw per synapse instead of one per candidate.
+SparseConnectivity connect_with_probability(int pre_size, int post_size, float prob, uint32_t stream){
+    if (prob >= 1.0)
+        return connect_all_to_all(pre_size, post_size);
+
+    SparseConnectivity sparse;
+    sparse.row_ptr = std::vector<int>(post_size + 1, 0);
+    if (prob > 0.0)
+        sparse.pre_rank.reserve((long int)(1.1 * prob * pre_size * post_size) + 1);
+    double log_q = log(1.0 - (double)prob);
+
+    for (int post_rank_idx = 0; post_rank_idx < post_size; post_rank_idx++) {
+        long int pre_rank_idx = -1;
+        for (uint64_t draw = 0; prob > 0.0; draw++) {
+            double skip = floor(log(1.0 - random_uniform_at(stream, post_rank_idx, draw)) / log_q);
+            if (skip >= pre_size - pre_rank_idx - 1)
+                break;
+            pre_rank_idx += (long int)skip + 1;
+            sparse.pre_rank.push_back(pre_rank_idx);
+        }
+        sparse.row_ptr[post_rank_idx + 1] = sparse.pre_rank.size();
+    }
+    return sparse;
+}
+
+// Draws `k` distinct values of [0, n) with Floyd's algorithm, in O(k), and writes them to `out` in ascending order.
+void sample_without_replacement(int n, int k, uint32_t stream, uint64_t key, int *out){
+    std::unordered_set<int> selected;
+    selected.reserve(2 * k);
+    int count = 0;
+    for (int j = n - k; j < n; j++) {
+        int value = std::min(j, (int)(random_uniform_at(stream, key, j) * (j + 1)));
+        if (!selected.insert(value).second) {
+            selected.insert(j);
+            value = j;
+        }
+        out[count++] = value;
+    }
+    std::sort(out, out + count);
 }
 
-bool probability_func(int pre_rank_idx, int post_rank_idx, float prob){
-    std::uniform_real_distribution<> dis(0.0, 1.0);
-    return dis(random_generator) < prob;
+// Connects each post-synaptic rank to `number` distinct pre-synaptic ranks; every row has the same length, so the
+// synapses are written in place into arrays allocated once.
+SparseConnectivity connect_fixed_pre_number(int pre_size, int post_size, int number, uint32_t stream){
+    int k = std::max(0, std::min(number, pre_size));
+    SparseConnectivity sparse;
+    sparse.row_ptr = std::vector<int>(post_size + 1);
+    sparse.pre_rank = std::vector<int>((long int)post_size * k);
+
+    #pragma omp parallel for schedule(static)
+    for (int post_rank_idx = 0; post_rank_idx < post_size; post_rank_idx++) {
+        sparse.row_ptr[post_rank_idx + 1] = (post_rank_idx + 1) * k;
+        sample_without_replacement(pre_size, k, stream, post_rank_idx, sparse.pre_rank.data() + (long int)post_rank_idx * k);
+    }
+    return sparse;
 }
 
-bool gaussian_func(int pre_rank_idx, int post_rank_idx, float sigma){
-    float gauss = exp(-0.5 *(pow(pre_rank_idx - post_rank_idx, 2.0) / pow(sigma, 2.0)));
-    std::uniform_real_distribution<> dis(0.0, 1.0);
-    return dis(random_generator) < gauss;
+// Connects each pre-synaptic rank to `number` distinct post-synaptic ranks. Targets are drawn per pre-synaptic rank,
+// then counted and scattered into rows; the synapse count is known up front, so no array grows while filling.
+SparseConnectivity connect_fixed_post_number(int pre_size, int post_size, int number, uint32_t stream){
+    int k = std::max(0, std::min(number, post_size));
+    std::vector<int> targets((long int)pre_size * k);
+
+    #pragma omp parallel for schedule(static)
+    for (int pre_rank_idx = 0; pre_rank_idx < pre_size; pre_rank_idx++)
+        sample_without_replacement(post_size, k, stream, pre_rank_idx, targets.data() + (long int)pre_rank_idx * k);
+
+    SparseConnectivity sparse;
+    sparse.row_ptr = std::vector<int>(post_size + 1, 0);
+    for (const int &post_rank_idx: targets)
+        sparse.row_ptr[post_rank_idx + 1]++;
+    for (int post_rank_idx = 0; post_rank_idx < post_size; post_rank_idx++)
+        sparse.row_ptr[post_rank_idx + 1] += sparse.row_ptr[post_rank_idx];
+
+    sparse.pre_rank = std::vector<int>(targets.size());
+    std::vector<int> next(sparse.row_ptr.begin(), sparse.row_ptr.end() - 1);
+    for (long int synapse = 0; synapse < targets.size(); synapse++)
+        sparse.pre_rank[next[targets[synapse]]++] = synapse / k;
+    return sparse;
 }
 
-bool dog_func(int pre_rank_idx, int post_rank_idx, float sigma1, float sigma2){
-    float gauss1 = exp(-0.5 *(pow(pre_rank_idx - post_rank_idx, 2.0) / pow(sigma1, 2.0)));
-    float gauss2 = exp(-0.5 *(pow(pre_rank_idx - post_rank_idx, 2.0) / pow(sigma2, 2.0)));
-    std::uniform_real_distribution<> dis(0.0, 1.0);
-    return dis(random_generator) < gauss1 - gauss2; // FIXME
+// distance at which a Gaussian of deviation `sigma` falls below the smallest draw
+double gaussian_radius(double sigma){
+    return fabs(sigma) * sqrt(-2.0 * log(MIN_DRAW));
 }
 
-std::vector< std::vector<int> > connect_all_to_all(int pre_size, int post_size){
-    return connect_by_func(all_to_all_func, pre_size, post_size);
+// Connects each post-synaptic neuron to pre-synaptic neurons with the probability `sum_m amplitudes[m] *
+// exp(-|d|^2 / (2 sigmas[m]^2))` of their distance `d`. Only pre-synaptic grid points within the radius of the widest
+// Gaussian are visited, and as each Gaussian factorises over the axes, its values are computed once per axis offset
+// of a post-synaptic neuron and only multiplied per candidate.
+SparseConnectivity connect_by_gaussians(const Geometry &pre, const Geometry &post, const std::vector<double> &amplitudes,
+                                        const std::vector<double> &sigmas, uint32_t stream){
+    int terms = sigmas.size();
+    double radius = 0.0;
+    for (const double &sigma: sigmas)
+        radius = std::max(radius, gaussian_radius(sigma));
+
+    int post_size = post.size();
+    SparseConnectivity sparse;
+    sparse.row_ptr = std::vector<int>(post_size + 1, 0);
+
+    double position[3];
+    int first[3], count[3];
+    // factors[axis][term * count[axis] + offset]
+    std::vector<double> factors[3];
+
+    for (int post_rank_idx = 0; post_rank_idx < post_size; post_rank_idx++) {
+        post.position(post_rank_idx, position);
+        for (int axis = 0; axis < 3; axis++) {
+            first[axis] = std::max(0, (int)ceil((position[axis] - radius) / pre.spacing[axis]));
+            int last = std::min(pre.shape[axis] - 1, (int)floor((position[axis] + radius) / pre.spacing[axis]));
+            count[axis] = std::max(0, last - first[axis] + 1);
+
+            factors[axis].resize(terms * count[axis]);
+            for (int term = 0; term < terms; term++)
+                for (int offset = 0; offset < count[axis]; offset++) {
+                    double distance = (first[axis] + offset) * pre.spacing[axis] - position[axis];
+                    factors[axis][term * count[axis] + offset] = exp(-0.5 * (pow(distance, 2.0) / pow(sigmas[term], 2.0)));
+                }
+        }
+
+        for (int x = 0; x < count[0]; x++)
+            for (int y = 0; y < count[1]; y++)
+                for (int z = 0; z < count[2]; z++) {
+                    double kernel = 0.0;
+                    for (int term = 0; term < terms; term++)
+                        kernel += amplitudes[term] * factors[0][term * count[0] + x] * factors[1][term * count[1] + y]
+                                  * factors[2][term * count[2] + z];
+                    if (kernel < MIN_DRAW)
+                        continue;
+
+                    int pre_rank_idx = ((first[0] + x) * pre.shape[1] + first[1] + y) * pre.shape[2] + first[2] + z;
+                    if (random_uniform_at(stream, post_rank_idx, pre_rank_idx) < kernel)
+                        sparse.pre_rank.push_back(pre_rank_idx);
+                }
+        sparse.row_ptr[post_rank_idx + 1] = sparse.pre_rank.size();
+    }
+    return sparse;
 }
 
-std::vector< std::vector<int> > connect_with_probability(int pre_size, int post_size, float prob){
-    return connect_by_func(probability_func, pre_size, post_size, prob);
+SparseConnectivity connect_gaussian(const Geometry &pre, const Geometry &post, float sigma, uint32_t stream){
+    return connect_by_gaussians(pre, post, {1.0}, {sigma}, stream);
 }
 
-std::vector< std::vector<int> > connect_gaussian(int pre_size, int post_size, float sigma){
-    return connect_by_func(gaussian_func, pre_size, post_size, sigma);
+SparseConnectivity connect_dog(const Geometry &pre, const Geometry &post, float sigma1, float sigma2, uint32_t stream){
+    return connect_by_gaussians(pre, post, {1.0, -1.0}, {sigma1, sigma2}, stream); // FIXME
 }
 
-std::vector< std::vector<int> > connect_dog(int pre_size, int post_size, float sigma1, float sigma2){
-    return connect_by_func(dog_func, pre_size, post_size, sigma1, sigma2);
+SparseConnectivity compress_connectivity(const std::vector< std::vector<int> > &connectivity){
+    SparseConnectivity sparse;
+    sparse.row_ptr = std::vector<int>(connectivity.size() + 1, 0);
+
+    for (int post_rank_idx = 0; post_rank_idx < connectivity.size(); post_rank_idx++)
+        sparse.row_ptr[post_rank_idx + 1] = sparse.row_ptr[post_rank_idx] + connectivity[post_rank_idx].size();
+
+    sparse.pre_rank.reserve(sparse.row_ptr.back());
+    for (const std::vector<int> &row: connectivity)
+        sparse.pre_rank.insert(sparse.pre_rank.end(), row.begin(), row.end());
+    return sparse;
 }
 
-template<class F, typename... Args>
-std::vector< std::vector<int> > connect_by_func(F func, int pre_size, int post_size, Args... args){
+std::vector< std::vector<int> > expand_connectivity(const SparseConnectivity &sparse){
     std::vector< std::vector<int> > connectivity;
 
-    for (int post_rank_idx = 0;post_rank_idx < post_size; post_rank_idx++) {
-        connectivity.push_back(std::vector<int>());
-        for (int pre_rank_idx = 0;pre_rank_idx < pre_size; pre_rank_idx++)
-            if (func(pre_rank_idx, post_rank_idx, args...))
-                connectivity.back().push_back(pre_rank_idx);
-        }
+    for (int post_rank_idx = 0; post_rank_idx + 1 < sparse.row_ptr.size(); post_rank_idx++)
+        connectivity.push_back(std::vector<int>(
+            sparse.pre_rank.begin() + sparse.row_ptr[post_rank_idx],
+            sparse.pre_rank.begin() + sparse.row_ptr[post_rank_idx + 1]
+        ));
     return connectivity;
 }
\ No newline at end of file
@@ -1,14 +1,103 @@
-#include "core.h"
-
-extern std::default_random_engine random_generator;
-bool all_to_all_func(int , int);
-bool probability_func(int, int, float);
-bool gaussian_func(int, int, float);
-bool dog_func(int, int, float, float);
-std::vector< std::vector<int> > connect_all_to_all(int, int);
-std::vector< std::vector<int> > connect_with_probability(int , int, float);
-std::vector< std::vector<int> > connect_gaussian(int, int, float);
-std::vector< std::vector<int> > connect_dog(int, int, float, float);
-
-template<class F, typename... Args>
-std::vector< std::vector<int> > connect_by_func(F, int , int , Args...);
\ No newline at end of file
+#pragma once
+
+#include <vector>
+#include <algorithm>
+#include <cstdlib>
+#include <unordered_set>
+#include <math.h>
+
+#include "random_functions.h"
+
+// random stream of the connectivity of a connection, kept apart from the streams of equations
+inline uint32_t connectivity_stream(int connection_id) { return 0x80000000u | (uint32_t)connection_id; }
+
+// Positions of the neurons of a population: ranks are laid out in row-major order on a grid of up to three axes,
+// `spacing` apart along each axis. A population without a shape is a line of unit spacing.
+struct Geometry {
+    int shape[3];
+    double spacing[3];
+
+    Geometry(int size = 0) : shape{size, 1, 1}, spacing{1.0, 1.0, 1.0} {}
+
+    Geometry(std::vector<int> _shape, std::vector<double> _spacing) {
+        for (int axis = 0; axis < 3; axis++) {
+            shape[axis] = axis < _shape.size() ? _shape[axis] : 1;
+            spacing[axis] = axis < _spacing.size() ? _spacing[axis] : 1.0;
+        }
+    }
+
+    int size() const { return shape[0] * shape[1] * shape[2]; }
+
+    void coordinates(int rank, int *out) const {
+        for (int axis = 2; axis >= 0; axis--) {
+            out[axis] = rank % shape[axis];
+            rank /= shape[axis];
+        }
+    }
+
+    void position(int rank, double *out) const {
+        int grid[3];
+        coordinates(rank, grid);
+        for (int axis = 0; axis < 3; axis++)
+            out[axis] = grid[axis] * spacing[axis];
+    }
+};
+
+// Implicit connectivity of a convolution between two grids: along each axis, post-synaptic coordinate `o` receives
+// from pre-synaptic coordinate `o * stride + k - padding` through kernel tap `k`. Synapses are never stored; taps are
+// numbered in row-major order and shared by all post-synaptic neurons. `weights` holds initial weights of the taps, if
+// any.
+struct Convolution {
+    Geometry pre, post;
+    int kernel[3], stride[3], padding[3];
+    std::vector<double> weights;
+
+    Convolution() : kernel{1, 1, 1}, stride{1, 1, 1}, padding{0, 0, 0} {}
+
+    Convolution(const Geometry &_pre, const Geometry &_post, std::vector<int> _kernel, std::vector<int> _stride,
+                std::vector<int> _padding, std::vector<double> _weights) : pre(_pre), post(_post), weights(_weights) {
+        for (int axis = 0; axis < 3; axis++) {
+            kernel[axis] = axis < _kernel.size() ? _kernel[axis] : 1;
+            stride[axis] = axis < _stride.size() ? _stride[axis] : 1;
+            padding[axis] = axis < _padding.size() ? _padding[axis] : 0;
+        }
+    }
+
+    int taps() const { return kernel[0] * kernel[1] * kernel[2]; }
+
+    // Taps and post-synaptic coordinates along `axis` reached from pre-synaptic coordinate `coordinate`, keeping only
+    // post-synaptic coordinates in [first, last). Returns their number.
+    int reach(int axis, int coordinate, int first, int last, int *tap_out, int *post_out) const {
+        int count = 0;
+        for (int k = 0; k < kernel[axis]; k++) {
+            int offset = coordinate + padding[axis] - k;
+            if (offset < 0 || offset % stride[axis] != 0)
+                continue;
+            int o = offset / stride[axis];
+            if (o < first || o >= last)
+                continue;
+            tap_out[count] = k;
+            post_out[count] = o;
+            count++;
+        }
+        return count;
+    }
+};
+
+struct SparseConnectivity {
+    std::vector<int> row_ptr;
+    std::vector<int> pre_rank;
+};
+
+SparseConnectivity compress_connectivity(const std::vector< std::vector<int> >&);
+std::vector< std::vector<int> > expand_connectivity(const SparseConnectivity&);
+SparseConnectivity connect_all_to_all(int, int);
+SparseConnectivity connect_with_probability(int , int, float, uint32_t);
+void sample_without_replacement(int, int, uint32_t, uint64_t, int*);
+SparseConnectivity connect_fixed_pre_number(int, int, int, uint32_t);
+SparseConnectivity connect_fixed_post_number(int, int, int, uint32_t);
+double gaussian_radius(double);
+SparseConnectivity connect_by_gaussians(const Geometry&, const Geometry&, const std::vector<double>&,
+                                        const std::vector<double>&, uint32_t);
+SparseConnectivity connect_gaussian(const Geometry&, const Geometry&, float, uint32_t);
+SparseConnectivity connect_dog(const Geometry&, const Geometry&, float, float, uint32_t);
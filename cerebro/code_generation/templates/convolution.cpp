@@ -0,0 +1,90 @@
+#include "connection{{ connection.id }}.hpp"
+
+{% set delay = variables | selectattr('name', 'equalto', 'delay') | first %}
+{% set weight = variables | selectattr('name', 'equalto', 'w') | first %}
+
+void Connection{{ connection.id }}::init_connection() {
+    kernel = {{ connect_function }};
+
+    {% for var in variables %}
+        {% if var.scope == 'local' %}
+    if(!keep_connectivity)
+        {{ var.name }} = std::vector<{{ var.c_type }}>(kernel.taps(), {{ var.init }});
+        {% else %}
+    {{ var.name }} = {{ var.init }};
+        {% endif %}
+    {% endfor %}
+    {% if weight.scope == 'local' %}
+    if(!keep_connectivity && !kernel.weights.empty())
+        w = std::vector<{{ weight.c_type }}>(kernel.weights.begin(), kernel.weights.end());
+    {% endif %}
+
+    bind_connectivity();
+
+    _psp_slots = 0;
+    _psp_buffer.clear();
+    fit_psp_buffer();
+}
+
+void Connection{{ connection.id }}::generate_delayed_potentiations() {
+    int post_size = population{{ connection.post.id }}.size;
+    const std::vector<int> &spiked = population{{ connection.pre.id }}.spiked;
+    const int *post_shape = kernel.post.shape;
+
+    // each thread delivers to its own range of post-synaptic coordinates along the first axis, so no two threads
+    // write the same input and the order of accumulation does not depend on the number of threads
+    #pragma omp parallel
+    {
+        long int rows = post_shape[0];
+        int first_row = rows * omp_get_thread_num() / omp_get_num_threads();
+        int last_row = rows * (omp_get_thread_num() + 1) / omp_get_num_threads();
+
+        std::vector<int> taps[3], posts[3];
+        for(int axis = 0; axis < 3; axis++) {
+            taps[axis].resize(kernel.kernel[axis]);
+            posts[axis].resize(kernel.kernel[axis]);
+        }
+
+        for(const int &rank_pre: spiked) {
+            int coordinates[3];
+            kernel.pre.coordinates(rank_pre, coordinates);
+
+            int reach0 = kernel.reach(0, coordinates[0], first_row, last_row, taps[0].data(), posts[0].data());
+            int reach1 = kernel.reach(1, coordinates[1], 0, post_shape[1], taps[1].data(), posts[1].data());
+            int reach2 = kernel.reach(2, coordinates[2], 0, post_shape[2], taps[2].data(), posts[2].data());
+
+            for(int a = 0; a < reach0; a++) {
+                for(int b = 0; b < reach1; b++) {
+                    int tap_row = taps[0][a] * kernel.kernel[1] + taps[1][b];
+                    int post_row = posts[0][a] * post_shape[1] + posts[1][b];
+
+                    for(int c = 0; c < reach2; c++) {
+                        int j = tap_row * kernel.kernel[2] + taps[2][c];
+                        int rank_post = post_row * post_shape[2] + posts[2][c];
+                        {% if delay is not defined %}
+                        int d = 0;
+                        {% elif delay.scope == 'local' %}
+                        int d = std::max(0, (int)delay[j]);
+                        {% else %}
+                        int d = std::max(0, (int)delay);
+                        {% endif %}
+
+                        _psp_buffer[((t + d) % _psp_slots) * post_size + rank_post] += w[j];
+                    }
+                }
+            }
+        }
+    }
+}
+
+void Connection{{ connection.id }}::compute_psp() {
+    int post_size = population{{ connection.post.id }}.size;
+    double *psp = _psp_buffer.data() + (t % _psp_slots) * post_size;
+    std::vector<float> &g_exc = population{{ connection.post.id }}.g_exc;
+
+    #pragma omp parallel for schedule(static)
+    for(int rank_post = 0; rank_post < post_size; rank_post++) {
+        g_exc[rank_post] += psp[rank_post];
+        psp[rank_post] = 0.0;
+    }
+}
@@ -0,0 +1,138 @@
+#pragma once
+
+#include "population{{ connection.pre.id }}.hpp"
+#include "population{{ connection.post.id }}.hpp"
+#include "connectivity.h"
+#include "random_functions.h"
+#include "monitor.h"
+
+extern Population{{ connection.pre.id }} population{{ connection.pre.id }} ;
+extern Population{{ connection.post.id }} population{{ connection.post.id }} ;
+extern long int t;
+extern std::vector<double> _parameters;
+
+{% for var in network_variables %}
+extern {{ var.c_type }} {{ var.name }};
+{% endfor %}
+
+{% set delay = variables | selectattr('name', 'equalto', 'delay') | first %}
+{% set weight = variables | selectattr('name', 'equalto', 'w') | first %}
+struct Connection{{ connection.id }} {
+    // synapses are implicit: the post-synaptic neurons reached by a spike are computed from the kernel when the spike
+    // is delivered, and every local variable is a flat array of one value per kernel tap `j`, shared by all
+    // post-synaptic neurons.
+    Convolution kernel;
+    // delayed input is accumulated in a ring buffer of `_psp_slots` rows, one value per post-synaptic neuron; the row
+    // delivered at step `t` is `t % _psp_slots`, so the buffer holds one more row than the longest delay.
+    int _psp_slots;
+    std::vector<double> _psp_buffer;
+    // set when the local variables are loaded from saved state after initialization, so that `init_connection()` does
+    // not initialize them
+    bool keep_connectivity = false;
+
+    {% for var in variables %}
+    {% if var.scope == 'local' %}
+    std::vector< {{ var.c_type}} > {{ var.name }};
+    {% else %}
+    {{ var.c_type }} {{ var.name }};
+    {% endif %}
+    {% endfor %}
+
+    {% for monitor in monitors %}
+    {% for var in variables if var.name in monitor.variables %}
+    Recorder< {{ var.c_type }} > _monitor{{ monitor.id }}_{{ var.name }};
+    {% endfor %}
+    {% endfor %}
+
+    // the methods carrying the connectivity and the equations of the synapse are defined in
+    // connection{{ connection.id }}.cpp, so that changing them only recompiles that file
+    void init_connection();
+
+    // resets what derives from the taps, after they are initialized or loaded
+    void bind_connectivity() {
+        {% for monitor in monitors %}
+        {% for var in variables if var.name in monitor.variables %}
+        {% if var.scope == 'local' %}
+        _monitor{{ monitor.id }}_{{ var.name }}.reset(monitor_indices());
+        {% else %}
+        _monitor{{ monitor.id }}_{{ var.name }}.reset(std::vector<int>(1, 0));
+        {% endif %}
+        {% endfor %}
+        {% endfor %}
+    }
+
+    void fit_psp_buffer() {
+        {% if delay is not defined %}
+        int max_delay = 0;
+        {% elif delay.scope == 'local' %}
+        int max_delay = delay.empty() ? 0 : std::max(0, (int)*std::max_element(delay.begin(), delay.end()));
+        {% else %}
+        int max_delay = std::max(0, (int)delay);
+        {% endif %}
+        if(max_delay >= _psp_slots)
+            resize_psp_buffer(max_delay);
+    }
+
+    void resize_psp_buffer(int max_delay) {
+        int post_size = population{{ connection.post.id }}.size;
+        int slots = max_delay + 1;
+        std::vector<double> buffer(slots * post_size, 0.0);
+
+        for(int d = 0; d < std::min(_psp_slots, slots); d++) {
+            int old_slot = (t + d) % _psp_slots;
+            int new_slot = (t + d) % slots;
+            std::copy(_psp_buffer.begin() + old_slot * post_size, _psp_buffer.begin() + (old_slot + 1) * post_size,
+                      buffer.begin() + new_slot * post_size);
+        }
+
+        _psp_slots = slots;
+        _psp_buffer = std::move(buffer);
+    }
+
+    // the taps are shared by all post-synaptic neurons, so monitors record every tap whichever ranks they are given
+    std::vector<int> monitor_indices() {
+        std::vector<int> indices;
+        for(int j = 0; j < kernel.taps(); j++)
+            indices.push_back(j);
+        return indices;
+    }
+
+    void record() {
+        {% for monitor in monitors %}
+        {% for var in variables if var.name in monitor.variables %}
+        _monitor{{ monitor.id }}_{{ var.name }}.record({{ var.name }});
+        {% endfor %}
+        {% endfor %}
+    }
+
+    void generate_delayed_potentiations();
+
+    void compute_psp();
+
+    void advance_synapses() {}
+
+    void update_synapse() {}
+
+    {% for monitor in monitors %}
+    void configure_monitor{{ monitor.id }}(std::vector<int> ranks, long int interval, int capacity) {
+        {% for var in variables if var.name in monitor.variables %}
+        _monitor{{ monitor.id }}_{{ var.name }}.configure(ranks, interval, capacity);
+        {% endfor %}
+    }
+
+    {% endfor %}
+
+    {% for var in variables if var.scope != 'local' %}
+    {{var.c_type}} get_{{ var.name }}() {
+        return {{ var.name }};
+    }
+
+    void set_{{ var.name }}({{ var.c_type }} value) {
+        {{ var.name }} = value;
+        {% if var.name == 'delay' %}
+        fit_psp_buffer();
+        {% endif %}
+    }
+
+    {% endfor %}
+};
@@ -1,10 +1,10 @@
 #include "core.h"
 
-std::default_random_engine random_generator(53);
-
 double dt;
 long int t;
 
+std::vector<double> _parameters({{ parameter_count }});
+
 {% for population in populations %}
 Population{{ population.id }} population{{ population.id }};
 {% endfor %}
@@ -23,6 +23,10 @@ void run(int steps) {
     for(int i = 0; i < steps; i++) {
         single_step();
     }
+
+    {% for connection in connections %}
+    connection{{ connection.id }}.advance_synapses();
+    {% endfor %}
 }
 
 void initialize(double _dt) {
@@ -34,6 +38,9 @@ void initialize(double _dt) {
     {% endfor %}
 
     {% for population in populations %}
+    {% if population_sizes[population] %}
+    population{{ population.id }}.set_size((int)({{ population_sizes[population] }}));
+    {% endif %}
     population{{ population.id }}.init_population();
     {% endfor %}
 
@@ -60,6 +67,14 @@ void single_step()
     connection{{ connection.id }}.update_synapse();
     {% endfor %}
 
+    {% for population in populations %}
+    population{{ population.id }}.record();
+    {% endfor %}
+
+    {% for connection in connections %}
+    connection{{ connection.id }}.record();
+    {% endfor %}
+
     t++;
 }
 
@@ -68,6 +83,12 @@ void set_time(long int _t) { t = _t; }
 double get_dt() { return dt; }
 void set_dt(double _dt) { dt = _dt; }
 
+int get_num_threads() { return omp_get_max_threads(); }
+void set_num_threads(int threads) { omp_set_num_threads(threads); }
+
+double get_parameter(int index) { return _parameters[index]; }
+void set_parameter(int index, double value) { _parameters[index] = value; }
+
 {% for var in network_variables %}
 {{ var.c_type }} get_global_{{ var.name }}() {
     return {{ var.name }};
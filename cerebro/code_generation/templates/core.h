@@ -1,16 +1,6 @@
 #pragma once
 
-#include <vector>
-#include <queue>
-#include <map>
-#include <random>
-#include <math.h>
-#include <set>
-#include <unordered_set>
-
-// TODO: remove this after development
-#include <iostream>
-
+#include "common.h"
 
 {% for population in populations %}
 #include "population{{ population.id }}.hpp"
@@ -20,11 +10,13 @@
 #include "connection{{ connection.id }}.hpp"
 {% endfor %}
 
-extern std::default_random_engine random_generator;
+#include "random_functions.h"
 
 extern double dt;
 extern long int t;
 
+extern std::vector<double> _parameters;
+
 {% for var in network_variables %}
 extern {{ var.c_type }} {{ var.name }};
 {% endfor %}
@@ -35,6 +27,9 @@ void set_time(long int _t) ;
 double get_dt() ;
 void set_dt(double _dt);
 
+int get_num_threads();
+void set_num_threads(int threads);
+
 {% for population in populations %}
 extern Population{{ population.id }} population{{ population.id }};
 {% endfor %}
@@ -43,10 +38,14 @@ extern Population{{ population.id }} population{{ population.id }};
 extern Connection{{ connection.id }} connection{{ connection.id }};
 {% endfor %}
 
+double get_parameter(int index);
+void set_parameter(int index, double value);
+
 void initialize(double _dt) ;
 
 void run(int steps);
 
 {% for var in network_variables %}
 {{ var.c_type }} get_global_{{ var.name }}();
+void set_global_{{ var.name }}({{ var.c_type }} value);
 {% endfor %}
\ No newline at end of file
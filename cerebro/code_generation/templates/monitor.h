@@ -0,0 +1,150 @@
+#pragma once
+
+#include <vector>
+#include <algorithm>
+#include <stdint.h>
+
+extern long int t;
+
+// Records a variable every `interval` steps into a preallocated ring buffer of `capacity` records, each holding the
+// elements `indices` of the variable; once the buffer is full, the oldest records are overwritten.
+template<typename T>
+struct Recorder {
+    std::vector<int> ranks;
+    long int interval = 1;
+    int capacity = 0;
+
+    std::vector<int> indices;
+    int width = 0;
+    long int count = 0;
+    std::vector<long int> steps;
+    std::vector<T> data;
+
+    void configure(std::vector<int> _ranks, long int _interval, int _capacity) {
+        ranks = _ranks;
+        interval = _interval > 0 ? _interval : 1;
+        capacity = _capacity > 0 ? _capacity : 0;
+    }
+
+    void reset(std::vector<int> _indices) {
+        indices = _indices;
+        width = indices.size();
+        count = 0;
+        steps = std::vector<long int>(capacity, 0);
+        data = std::vector<T>((long int)capacity * width);
+    }
+
+    bool due() const {
+        return capacity > 0 && t % interval == 0;
+    }
+
+    T *next_record() {
+        int slot = count % capacity;
+        steps[slot] = t;
+        count++;
+        return data.data() + (long int)slot * width;
+    }
+
+    void record(const std::vector<T> &values) {
+        if(!due())
+            return;
+        T *record = next_record();
+        for(int k = 0; k < width; k++)
+            record[k] = values[indices[k]];
+    }
+
+    void record(T value) {
+        if(!due())
+            return;
+        *next_record() = value;
+    }
+};
+
+// Records the spikes of a population as events, appending the step and the rank of every spike of the recorded ranks
+// within the steps [start, stop) to flat arrays of `count` events. The arrays start with room for `capacity` events and
+// double when full; the replaced buffers are kept until the next reset, so that arrays viewing them stay valid.
+struct SpikeRecorder {
+    std::vector<int> ranks;
+    long int start = 0;
+    long int stop = -1;
+    long int capacity = 0;
+
+    std::vector<char> selected;
+    long int count = 0;
+    std::vector<int32_t> steps;
+    std::vector<int32_t> spike_ranks;
+    std::vector< std::vector<int32_t> > _retired;
+
+    void configure(std::vector<int> _ranks, long int _start, long int _stop, long int _capacity) {
+        ranks = _ranks;
+        start = _start;
+        stop = _stop;
+        capacity = _capacity > 0 ? _capacity : 1;
+    }
+
+    void reset(int size) {
+        selected = std::vector<char>(ranks.empty() ? 0 : size, 0);
+        for(const int &rank: ranks)
+            if(rank >= 0 && rank < size)
+                selected[rank] = 1;
+        count = 0;
+        steps = std::vector<int32_t>(capacity);
+        spike_ranks = std::vector<int32_t>(capacity);
+        _retired.clear();
+    }
+
+    void grow() {
+        std::vector<int32_t> grown_steps(2 * steps.size()), grown_ranks(2 * steps.size());
+        std::copy(steps.begin(), steps.begin() + count, grown_steps.begin());
+        std::copy(spike_ranks.begin(), spike_ranks.begin() + count, grown_ranks.begin());
+        _retired.push_back(std::move(steps));
+        _retired.push_back(std::move(spike_ranks));
+        steps = std::move(grown_steps);
+        spike_ranks = std::move(grown_ranks);
+    }
+
+    void record(const std::vector<int> &spiked) {
+        if(t < start || (stop >= 0 && t >= stop))
+            return;
+        for(const int &rank: spiked) {
+            if(!selected.empty() && !selected[rank])
+                continue;
+            if(count == (long int)steps.size())
+                grow();
+            steps[count] = (int32_t)t;
+            spike_ranks[count] = rank;
+            count++;
+        }
+    }
+
+    // number of recorded spikes of each of `size` neurons
+    void counts(long int *out, int size) const {
+        std::fill(out, out + size, 0L);
+        for(long int k = 0; k < count; k++)
+            out[spike_ranks[k]]++;
+    }
+
+    // number of recorded spikes of each of `size` neurons in `bins` bins of `bin` steps from step `first`, one row of
+    // bins per neuron
+    void raster(int32_t *out, int size, long int first, long int bin, long int bins) const {
+        std::fill(out, out + size * bins, 0);
+        for(long int k = 0; k < count; k++) {
+            long int offset = steps[k] - first;
+            if(offset >= 0 && offset < bin * bins)
+                out[spike_ranks[k] * bins + offset / bin]++;
+        }
+    }
+
+    // mean firing rate in Hz of `neurons` neurons in `bins` bins of `bin` steps of `dt` ms from step `first`
+    void rates(double *out, int neurons, long int first, long int bin, long int bins, double dt) const {
+        std::fill(out, out + bins, 0.0);
+        for(long int k = 0; k < count; k++) {
+            long int offset = steps[k] - first;
+            if(offset >= 0 && offset < bin * bins)
+                out[offset / bin]++;
+        }
+        double scale = neurons > 0 ? 1000.0 / (neurons * bin * dt) : 0.0;
+        for(long int b = 0; b < bins; b++)
+            out[b] *= scale;
+    }
+};
@@ -0,0 +1,247 @@
+#include "population{{ population_id }}.hpp"
+
+void Population{{ population_id }}::init_population() {
+
+    {% for variable in variables %}
+    {% if variable.scope == 'shared' %}
+    {{ variable.name }} = {{ variable.init }};
+    {% elif variable.scope == 'local'%}
+    {{ variable.name }} = std::vector<{{ variable.c_type }} >(size, {{ variable.init }});
+    {% endif %}
+    {% endfor %}
+
+    spiked = std::vector<int>(0, 0);
+    r = std::vector<double> (size, 0);
+
+    last_spike = std::vector<long int>(size, -10000L);
+
+    _spike_history = std::vector< std::queue<long int> >(size, std::queue<long int>());
+    _mean_fr_window = 0;
+    _mean_fr_rate = 1.0;
+    {% if spike_source == 'events' %}
+
+    seek();
+    {% elif spike_source == 'poisson' %}
+
+    start_presentations();
+    {% endif %}
+
+    {% for monitor in monitors %}
+    {% for variable in variables if variable.name in monitor.variables %}
+    {% if variable.scope == 'shared' %}
+    _monitor{{ monitor.id }}_{{ variable.name }}.reset(std::vector<int>(1, 0));
+    {% else %}
+    _monitor{{ monitor.id }}_{{ variable.name }}.reset(monitor_indices(_monitor{{ monitor.id }}_{{ variable.name }}.ranks));
+    {% endif %}
+    {% endfor %}
+    {% endfor %}
+    {% for monitor in spike_monitors %}
+    _spike_monitor{{ monitor.id }}.reset(size);
+    {% endfor %}
+}
+
+{% macro source_rates() %}
+if(_mean_fr_window > 0) {
+    for(int i = 0; i < size; i++) {
+        while((_spike_history[i].size() != 0) && (_spike_history[i].front() <= t - _mean_fr_window)) {
+            _spike_history[i].pop();
+        }
+
+        r[i] = _mean_fr_rate * float(_spike_history[i].size());
+    }
+}
+{% endmacro %}
+{% macro source_spike() %}
+spiked.push_back(i);
+last_spike[i] = t;
+
+if(_mean_fr_window > 0)
+    _spike_history[i].push(t);
+{% endmacro %}
+{% if spike_source == 'events' %}
+void Population{{ population_id }}::update() {
+
+    spiked.clear();
+
+    for(; _cursor < (long int)_event_steps.size() && _event_steps[_cursor] <= t; _cursor++) {
+        int i = _event_ranks[_cursor];
+        {{ source_spike() | indent(8) }}
+    }
+
+    {{ source_rates() | indent(4) }}
+}
+{% elif spike_source == 'poisson' %}
+// steps until the next spike of a neuron of rate `rate`: binned by step, a Poisson process fires at most once per step,
+// with probability 1 - exp(-rate * dt), so the interval is geometrically distributed; -1 if it does not fire
+static long int spike_interval(double rate, uint32_t high, uint32_t low) {
+    double steps = ceil(-log(1.0 - random_unit(high, low)) / (rate * dt / 1000.0));
+    if(!(steps < 1e15))
+        return -1;
+    return steps < 1.0 ? 1 : (long int)steps;
+}
+
+// draws of a neuron: the first two words of its block schedule it when a presentation starts, the last two schedule
+// its next spike after it fires, so both can happen in the same step
+static void spike_block(uint32_t block[4], int i) {
+    random_block(block, 0, t, ((uint64_t){{ population_id }} << 32) | (uint32_t)i);
+}
+
+void Population{{ population_id }}::reschedule() {
+    _next_spike = std::vector<long int>(size, -1L);
+    if(presentations() > 0) {
+        const double *rates = _rates.data() + (long int)presentation() * size;
+        for(int i = 0; i < size; i++) {
+            if(rates[i] <= 0.0)
+                continue;
+            uint32_t block[4];
+            spike_block(block, i);
+            long int interval = spike_interval(rates[i], block[0], block[1]);
+            if(interval > 0)
+                _next_spike[i] = t - 1 + interval;
+        }
+    }
+    rebuild_schedule();
+}
+
+void Population{{ population_id }}::rebuild_schedule() {
+    _schedule.clear();
+    for(int i = 0; i < size; i++)
+        if(_next_spike[i] >= 0)
+            _schedule.push_back(std::make_pair(_next_spike[i], i));
+    std::make_heap(_schedule.begin(), _schedule.end(), std::greater< std::pair<long int, int> >());
+}
+
+void Population{{ population_id }}::update() {
+
+    spiked.clear();
+
+    // a new presentation changes the rates, so every neuron is scheduled again
+    long int elapsed = t - _presentation_start;
+    if(_presentation_steps > 0 && elapsed > 0 && elapsed % _presentation_steps == 0 &&
+            elapsed / _presentation_steps < presentations())
+        reschedule();
+
+    // spikes of a step leave the heap in rank order
+    const double *rates = _rates.data() + (long int)presentation() * size;
+    std::greater< std::pair<long int, int> > later;
+    while(!_schedule.empty() && _schedule.front().first <= t) {
+        std::pop_heap(_schedule.begin(), _schedule.end(), later);
+        int i = _schedule.back().second;
+        _schedule.pop_back();
+
+        {{ source_spike() | indent(8) }}
+
+        uint32_t block[4];
+        spike_block(block, i);
+        long int interval = spike_interval(rates[i], block[2], block[3]);
+        _next_spike[i] = interval > 0 ? t + interval : -1L;
+        if(interval > 0) {
+            _schedule.push_back(std::make_pair(_next_spike[i], i));
+            std::push_heap(_schedule.begin(), _schedule.end(), later);
+        }
+    }
+
+    {{ source_rates() | indent(4) }}
+}
+{% else %}
+{% macro update_neuron() %}
+{% for name, expression in optimizer.temporaries %}
+const double {{ name }} = {{ expression }};
+{% endfor %}
+// TODO: add network variable update capability
+{% for equation in update_equations %}
+    {% if equation.equation_type == 'simple' %}
+        {% if equation.variable.scope == 'local' %}
+{{ equation.variable.name }}[i] = {{ equation.expression }};
+        {% else %}
+{{ equation.variable.name }} = {{ equation.expression }};
+    {% endif %}
+    {% endif %}
+{% endfor %}
+
+{% for statement in integrator.step %}
+{{ statement }}
+{% endfor %}
+
+g_exc[i] = 0.0;
+{% endmacro %}
+{% macro fire_neuron() %}
+{% if spike_condition %}
+if({{ spike_condition }}) {
+    {% for equation in reset_equations %}
+        {% if equation.variable.scope == 'local' %}
+    {{ equation.variable.name }}[i] = {{ equation.expression }};
+        {% else %}
+    {{ equation.variable.name }} = {{ equation.expression }};
+        {% endif %}
+    {% endfor %}
+
+    _spiked.push_back(i);
+    last_spike[i] = t;
+
+    if(_mean_fr_window > 0)
+        _spike_history[i].push(t);
+}
+{% endif %}
+
+if(_mean_fr_window > 0) {
+    while((_spike_history[i].size() != 0) && (_spike_history[i].front() <= t - _mean_fr_window)) {
+        _spike_history[i].pop();
+    }
+
+    r[i] = _mean_fr_rate * float(_spike_history[i].size());
+}
+{% endmacro %}
+void Population{{ population_id }}::update() {
+
+    spiked.clear();
+    _thread_spiked.resize(omp_get_max_threads());
+    for(std::vector<int> &_spiked: _thread_spiked)
+        _spiked.clear();
+
+    // local variables are read through pointers that shadow the vectors; they never alias, which lets the compiler
+    // vectorize the equations
+    {% for variable in variables if variable.scope == 'local' %}
+    {{ variable.c_type }} *__restrict__ {{ variable.name }} = this->{{ variable.name }}.data();
+    {% endfor %}
+
+    {% for statement in integrator.prologue %}
+    {{ statement }}
+    {% endfor %}
+    {% for name, expression in optimizer.invariants %}
+    const double {{ name }} = {{ expression }};
+    {% endfor %}
+
+    {% if parallel %}
+    #pragma omp parallel
+    {
+    std::vector<int> &_spiked = _thread_spiked[omp_get_thread_num()];
+
+    // neurons are independent of each other, so the equations are applied in a loop of their own that the compiler
+    // can vectorize, and spikes are detected in a second loop
+    #pragma omp for simd schedule(static)
+    for(int i = 0; i < size; i++) {
+        {{ update_neuron() | indent(8) }}
+    }
+
+    #pragma omp for schedule(static)
+    for(int i = 0; i < size; i++) {
+        {{ fire_neuron() | indent(8) }}
+    }
+    }
+    {% else %}
+    {
+    std::vector<int> &_spiked = _thread_spiked[omp_get_thread_num()];
+
+    for(int i = 0; i < size; i++) {
+        {{ update_neuron() | indent(8) }}
+
+        {{ fire_neuron() | indent(8) }}
+    }
+    }
+    {% endif %}
+
+    for(const std::vector<int> &_spiked: _thread_spiked)
+        spiked.insert(spiked.end(), _spiked.begin(), _spiked.end());
+}
+{% endif %}
@@ -1,12 +1,12 @@
 #pragma once
 
-#include "core.h"
+#include "common.h"
 #include "random_functions.h"
-
-extern std::default_random_engine random_generator;
+#include "monitor.h"
 
 extern double dt;
 extern long int t;
+extern std::vector<double> _parameters;
 {% for var in network_variables %}
 extern {{ var.c_type }} {{ var.name }};
 {% endfor %}
@@ -20,6 +20,8 @@ struct Population{{ population_id }} {
 
     std::vector<long int> last_spike;
     std::vector<int> spiked;
+    // spikes of each thread, concatenated in thread order so that `spiked` stays sorted
+    std::vector< std::vector<int> > _thread_spiked;
     std::vector<double> r;
 
     {% for variable in variables %}
@@ -30,13 +32,13 @@ struct Population{{ population_id }} {
     {% endif %}
     {% endfor %}
 
-    {% for variable in variables %}
-    {% if variable.scope == 'shared' %}
-    std::vector<{{ variable.c_type }}> {{ variable.name }}_history;
-    {% elif variable.scope == 'local' %}
-    std::vector<std::vector< {{ variable.c_type }} > >{{ variable.name }}_history;
-    {% endif %}
-
+    {% for monitor in monitors %}
+    {% for variable in variables if variable.name in monitor.variables %}
+    Recorder< {{ variable.c_type }} > _monitor{{ monitor.id }}_{{ variable.name }};
+    {% endfor %}
+    {% endfor %}
+    {% for monitor in spike_monitors %}
+    SpikeRecorder _spike_monitor{{ monitor.id }};
     {% endfor %}
 
     std::vector< std::queue<long int> > _spike_history;
@@ -63,88 +65,110 @@ struct Population{{ population_id }} {
     {% endif %}
     {% endfor %}
 
-  {% for variable in variables %}
-    {% if variable.scope == 'shared' %}
-    std::vector<{{ variable.c_type }} > get_{{ variable.name }}_history() { return {{ variable.name }}_history; }
-
-    {% elif variable.scope == 'local' %}
-    std::vector< std::vector<{{ variable.c_type }}> > get_{{ variable.name }}_history() { return {{ variable.name }}_history; }
+    // spike times kept for the firing rate, flattened for checkpoints: the number of kept spikes of each neuron,
+    // followed by the kept spikes of all neurons in rank order
+    std::vector<long int> get_spike_history() {
+        std::vector<long int> history;
+        for(const std::queue<long int> &spikes: _spike_history)
+            history.push_back(spikes.size());
+        for(std::queue<long int> spikes: _spike_history)
+            for(; !spikes.empty(); spikes.pop())
+                history.push_back(spikes.front());
+        return history;
+    }
 
-    {% endif %}
-  {% endfor %}
+    {% if spike_source == 'events' %}
+    // precomputed spikes, sorted by step: neuron `_event_ranks[k]` fires at step `_event_steps[k]`. `_cursor` is the
+    // first event that is not yet emitted, so each step only visits the spikes it emits.
+    std::vector<long int> _event_steps;
+    std::vector<int> _event_ranks;
+    long int _cursor = 0;
 
+    // moves the cursor to the first event of the current step or later, after the events or the time are set
+    void seek() {
+        _cursor = std::lower_bound(_event_steps.begin(), _event_steps.end(), t) - _event_steps.begin();
+    }
 
-    void init_population() {
+    {% elif spike_source == 'poisson' %}
+    // rates of the neurons in Hz, one row of `size` rates per presentation. Presentation `p` starts at step
+    // `_presentation_start + p * _presentation_steps`, and the last one is held.
+    std::vector<double> _rates;
+    long int _presentation_steps = 0;
+    long int _presentation_start = 0;
+    // step of the next spike of each neuron, -1 if it does not fire, and the same schedule as a heap of (step, rank)
+    // pairs whose top is the earliest spike, so that each step only visits the neurons firing in it
+    std::vector<long int> _next_spike;
+    std::vector< std::pair<long int, int> > _schedule;
+
+    int presentations() { return size > 0 ? _rates.size() / size : 0; }
+
+    int presentation() {
+        if(_presentation_steps <= 0)
+            return 0;
+        return (int)std::min<long int>((t - _presentation_start) / _presentation_steps, presentations() - 1);
+    }
 
-        {% for variable in variables %}
-        {% if variable.scope == 'shared' %}
-        {{ variable.name }} = {{ variable.init }};
-        {% elif variable.scope == 'local'%}
-        {{ variable.name }} = std::vector<{{ variable.c_type }} >(size, {{ variable.init }});
-        {% endif %}
-        {% endfor %}
+    void start_presentations() {
+        _presentation_start = t;
+        reschedule();
+    }
 
-        spiked = std::vector<int>(0, 0);
-        r = std::vector<double> (size, 0);
+    void reschedule();
 
-        last_spike = std::vector<long int>(size, -10000L);
+    void rebuild_schedule();
 
+    {% endif %}
+    void set_spike_history(const std::vector<long int> &history) {
         _spike_history = std::vector< std::queue<long int> >(size, std::queue<long int>());
-        _mean_fr_window = 0;
-        _mean_fr_rate = 1.0;
+        long int k = size;
+        for(int i = 0; i < size; i++)
+            for(long int n = 0; n < history[i]; n++)
+                _spike_history[i].push(history[k++]);
     }
 
-    void update() {
-
-        spiked.clear();
-        for(int i = 0; i < size; i++) {
-
-            // TODO: ODE
-            // TODO: add network variable update capability
-            {% for equation in update_equations %}
-                {% if equation.equation_type == 'simple' %}
-                    {% if equation.variable.scope == 'local' %}
-            {{ equation.variable.name }}[i] = {{ equation.expression }};
-                    {% else %}
-            {{ equation.variable.name }} = {{ equation.expression }};
-                {% endif %}
-                {% endif %}
-            {% endfor %}
-
-
-            g_exc[i] = 0.0;
-
-            {% if spike_condition %}
-            if({{ spike_condition }}) {
-                {% for equation in reset_equations %}
-                    {% if equation.variable.scope == 'local' %}
-                {{ equation.variable.name }}[i] = {{ equation.expression }};
-                    {% else %}
-                {{ equation.variable.name }} = {{ equation.expression }};
-                    {% endif %}
-                {% endfor %}
-
-                spiked.push_back(i);
-                last_spike[i] = t;
-
-                if(_mean_fr_window > 0)
-                    _spike_history[i].push(t);
-            }
-            {% endif %}
-
-            if(_mean_fr_window > 0) {
-                while((_spike_history[i].size() != 0) && (_spike_history[i].front() <= t - _mean_fr_window)) {
-                    _spike_history[i].pop();
-                }
+    {% for monitor in monitors %}
+    void configure_monitor{{ monitor.id }}(std::vector<int> ranks, long int interval, int capacity) {
+        {% for variable in variables if variable.name in monitor.variables %}
+        _monitor{{ monitor.id }}_{{ variable.name }}.configure(ranks, interval, capacity);
+        {% endfor %}
+    }
 
-                r[i] = _mean_fr_rate * float(_spike_history[i].size());
-            }
+    {% endfor %}
+    {% for monitor in spike_monitors %}
+    void configure_spike_monitor{{ monitor.id }}(std::vector<int> ranks, long int start, long int stop, long int capacity) {
+        _spike_monitor{{ monitor.id }}.configure(ranks, start, stop, capacity);
+    }
 
+    {% endfor %}
+    // ranks of a monitor that are in the population, all ranks if none are given
+    std::vector<int> monitor_indices(const std::vector<int> &ranks) {
+        std::vector<int> indices;
+        if(ranks.empty()) {
+            for(int rank = 0; rank < size; rank++)
+                indices.push_back(rank);
+            return indices;
         }
-        
-        {% for variable in variables %}
-        {{ variable.name }}_history.push_back({{ variable.name }});  // TODO: to be considered
+        for(const int &rank: ranks)
+            if(rank >= 0 && rank < size)
+                indices.push_back(rank);
+        return indices;
+    }
 
+    void record() {
+        {% for monitor in monitors %}
+        {% for variable in variables if variable.name in monitor.variables %}
+        _monitor{{ monitor.id }}_{{ variable.name }}.record({{ variable.name }});
+        {% endfor %}
+        {% endfor %}
+        {% for monitor in spike_monitors %}
+        _spike_monitor{{ monitor.id }}.record(spiked);
         {% endfor %}
     }
+
+
+    // the methods below carry the equations of the neuron; they are defined in population{{ population_id }}.cpp, so that
+    // changing the equations only recompiles that file
+    void init_population();
+
+    void update();
 };
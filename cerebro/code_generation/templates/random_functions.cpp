@@ -1,12 +1,6 @@
 #include "random_functions.h"
 
-double random_uniform(double a, double b) {
-    std::uniform_real_distribution<> dis(a, b);
+unsigned long long random_seed = 53;
 
-    return dis(random_generator);
-}
-double random_normal(double m, double s) {
-    std::normal_distribution<> dis{m, s};
-
-    return dis(random_generator);
-}
\ No newline at end of file
+unsigned long long get_seed() { return random_seed; }
+void set_seed(unsigned long long seed) { random_seed = seed; }
\ No newline at end of file
@@ -1,4 +1,56 @@
-#include "core.h"
+#pragma once
 
-double random_uniform(double a, double b);
-double random_normal(double m, double s);
\ No newline at end of file
+#include <stdint.h>
+#include <math.h>
+
+extern long int t;
+extern unsigned long long random_seed;
+
+unsigned long long get_seed();
+void set_seed(unsigned long long seed);
+
+// Philox4x32-10 counter-based generator: every draw is a pure function of the seed, a stream, a step and an index, so
+// draws neither share state between threads nor depend on the order in which neurons and synapses are visited.
+inline void random_block(uint32_t block[4], uint32_t stream, uint64_t step, uint64_t index) {
+    uint32_t key0 = (uint32_t)random_seed;
+    uint32_t key1 = (uint32_t)(random_seed >> 32);
+    block[0] = (uint32_t)index;
+    block[1] = (uint32_t)(index >> 32);
+    block[2] = (uint32_t)step;
+    block[3] = stream;
+
+    for(int round = 0; round < 10; round++) {
+        uint64_t product0 = (uint64_t)0xD2511F53u * block[0];
+        uint64_t product1 = (uint64_t)0xCD9E8D57u * block[2];
+        uint32_t counter0 = (uint32_t)(product1 >> 32) ^ block[1] ^ key0;
+        uint32_t counter2 = (uint32_t)(product0 >> 32) ^ block[3] ^ key1;
+        block[1] = (uint32_t)product1;
+        block[3] = (uint32_t)product0;
+        block[0] = counter0;
+        block[2] = counter2;
+        key0 += 0x9E3779B9u;
+        key1 += 0xBB67AE85u;
+    }
+}
+
+inline double random_unit(uint32_t high, uint32_t low) {
+    return ((uint64_t)(high >> 5) * 67108864 + (low >> 6)) * (1.0 / 9007199254740992.0);
+}
+
+inline double random_uniform_at(uint32_t stream, uint64_t step, uint64_t index) {
+    uint32_t block[4];
+    random_block(block, stream, step, index);
+    return random_unit(block[0], block[1]);
+}
+
+inline double random_uniform(double a, double b, uint32_t stream, uint64_t index) {
+    return a + (b - a) * random_uniform_at(stream, t, index);
+}
+
+inline double random_normal(double m, double s, uint32_t stream, uint64_t index) {
+    uint32_t block[4];
+    random_block(block, stream, t, index);
+    double u1 = 1.0 - random_unit(block[0], block[1]);
+    double u2 = random_unit(block[2], block[3]);
+    return m + s * sqrt(-2.0 * log(u1)) * cos(2.0 * M_PI * u2);
+}
\ No newline at end of file
@@ -1,14 +1,65 @@
 # cython: embedsignature=True
 from libcpp.vector cimport vector
+from libc.string cimport memcpy
 import numpy as np
 cimport numpy as np
 
-from . import monitoring
+{% set npy_types = {'float': 'np.NPY_FLOAT', 'double': 'np.NPY_DOUBLE', 'int': 'np.NPY_INT', 'long int': 'np.NPY_LONG'} %}
+{% macro monitor_accessors(kind, owner, variable_specs) %}
+{% for monitor in owner.monitors %}
+{% set recorder = kind ~ owner.id ~ '._monitor' ~ monitor.id ~ '_' %}
+    def configure_monitor{{ monitor.id }}(self, vector[int] ranks, long int interval, int capacity):
+        {{ kind }}{{ owner.id }}.configure_monitor{{ monitor.id }}(ranks, interval, capacity)
+
+    def get_monitor{{ monitor.id }}_count(self):
+        return {{ recorder }}{{ monitor.variables[0] }}.count
+
+    def get_monitor{{ monitor.id }}_steps(self):
+        return view({{ recorder }}{{ monitor.variables[0] }}.steps.data(), {{ recorder }}{{ monitor.variables[0] }}.steps.size(),
+                    np.NPY_LONG, self)
+
+    {% for var in variable_specs if var.name in monitor.variables %}
+    def get_monitor{{ monitor.id }}_{{ var.name }}(self):
+        return view({{ recorder }}{{ var.name }}.data.data(), {{ recorder }}{{ var.name }}.data.size(),
+                    {{ npy_types[var.c_type] }}, self).reshape({{ recorder }}{{ var.name }}.capacity, {{ recorder }}{{ var.name }}.width)
+
+    {% endfor %}
+{% endfor %}
+{% endmacro %}
+
+{% macro copy_array(target, value, c_type) %}
+array = np.PyArray_FROMANY({{ value }}, {{ npy_types[c_type] }}, 1, 1, np.NPY_ARRAY_IN_ARRAY)
+{{ target }}.resize(array.shape[0])
+memcpy({{ target }}.data(), np.PyArray_DATA(array), array.nbytes)
+{% endmacro %}
+
+np.import_array()
+
+cdef extern from "monitor.h":
+    cdef cppclass Recorder[T]:
+        long int count
+        int capacity
+        int width
+        vector[long int] steps
+        vector[T] data
+
+    cdef cppclass SpikeRecorder:
+        long int count
+        vector[int] steps
+        vector[int] spike_ranks
+        void counts(long int *, int)
+        void raster(int *, int, long int, long int, long int)
+        void rates(double *, int, long int, long int, long int, double)
+
+cdef extern from "connectivity.h":
+    cdef cppclass Convolution:
+        int taps()
 
 cdef extern from "core.h":
 
     {% for network_variable_spec in network_variable_specs %}
     cdef {{ network_variable_spec.c_type }} get_global_{{ network_variable_spec.name }}();
+    cdef void set_global_{{ network_variable_spec.name }}({{ network_variable_spec.c_type }});
     {% endfor %}
 
     cpdef long int get_time() ;
@@ -17,13 +68,42 @@ cdef extern from "core.h":
     cpdef double get_dt() ;
     cpdef void set_dt(double);
 
+    cpdef unsigned long long get_seed() ;
+    cpdef void set_seed(unsigned long long) ;
+
+    cpdef int get_num_threads() ;
+    cpdef void set_num_threads(int) ;
+
+    cpdef double get_parameter(int) ;
+    cpdef void set_parameter(int, double) ;
+
     cpdef void initialize(double) ;
 
-    cpdef void run(int);
+    cpdef void run(int) nogil
 
 
     {% for population in populations %}
-    cdef struct Population{{ population.id }}:
+    cdef cppclass Population{{ population.id }}:
+        vector[int] spiked
+        vector[long int] last_spike
+        vector[double] r
+        long int _mean_fr_window
+        double _mean_fr_rate
+        vector[long int] get_spike_history()
+        void set_spike_history(vector[long int])
+        {% if population.spike_source == 'events' %}
+        vector[long int] _event_steps
+        vector[int] _event_ranks
+        void seek()
+        {% elif population.spike_source == 'poisson' %}
+        vector[double] _rates
+        long int _presentation_steps
+        long int _presentation_start
+        vector[long int] _next_spike
+        void start_presentations()
+        void rebuild_schedule()
+        {% endif %}
+
         int get_size()
         void set_size(int)
 
@@ -32,6 +112,7 @@ cdef extern from "core.h":
         {{ var.c_type }}  get_{{ var.name }}()
         void set_{{ var.name }}({{ var.c_type }})
         {% elif var.scope == 'local' %}
+        vector[{{ var.c_type }}] {{ var.name }}
         vector[{{ var.c_type }}] get_{{ var.name }}()
         {{ var.c_type }} get_single_{{ var.name }}(int)
         void set_{{ var.name }}(vector[{{ var.c_type }}])
@@ -40,13 +121,16 @@ cdef extern from "core.h":
 
         {% endfor %}
 
-        {% for var in population_variable_specs[population] %}
-        {% if var.scope == 'shared' %}
-        vector[{{ var.c_type }}] get_{{ var.name }}_history()
-        {% elif var.scope == 'local' %}
-        vector[vector[{{ var.c_type }}]] get_{{ var.name }}_history()
-        {% endif %}
+        {% for monitor in population.monitors %}
+        void configure_monitor{{ monitor.id }}(vector[int], long int, int)
+        {% for var in population_variable_specs[population] if var.name in monitor.variables %}
+        Recorder[{{ var.c_type }}] _monitor{{ monitor.id }}_{{ var.name }}
+        {% endfor %}
 
+        {% endfor %}
+        {% for monitor in population.spike_monitors %}
+        void configure_spike_monitor{{ monitor.id }}(vector[int], long int, long int, long int)
+        SpikeRecorder _spike_monitor{{ monitor.id }}
         {% endfor %}
         void compute_firing_rate(double window)
 
@@ -57,28 +141,53 @@ cdef extern from "core.h":
     {% endfor %}
 
     {% for connection in connections %}
-    cdef struct Connection{{ connection.id }}:
+    cdef cppclass Connection{{ connection.id }}:
+        {% if not connection.connection_type.implicit %}
+        vector[int] post_rank
+        vector[int] row_ptr
+        vector[int] pre_rank
+        vector[int] inv_pre_ptr
+        vector[int] inv_pre_rank
+        vector[int] inv_pre_row
+        vector[int] inv_post_rank
+
         int get_size()
         int nb_synapses(int)
         void set_size(int)
 
-        vector[int] get_post_rank()
         vector[vector[int]] get_pre_rank()
         void set_post_rank(vector[int])
         void set_pre_rank(vector[vector[int]])
 
         void inverse_connectivity_matrix()
+        {% else %}
+        Convolution kernel
+        {% endif %}
+        bint keep_connectivity
+        int _psp_slots
+        vector[double] _psp_buffer
+        {% if lazy_synapses[connection] %}
+        vector[long int] _last_update
+        {% endif %}
+        void bind_connectivity()
+        void fit_psp_buffer()
 
+        {% for monitor in connection.monitors %}
+        void configure_monitor{{ monitor.id }}(vector[int], long int, int)
+        {% for var in connection_variable_specs[connection] if var.name in monitor.variables %}
+        Recorder[{{ var.c_type }}] _monitor{{ monitor.id }}_{{ var.name }}
+        {% endfor %}
 
+        {% endfor %}
 
         {% for var in connection_variable_specs[connection] %}
         {% if var.scope == 'local' %}
+        vector[{{ var.c_type }}] {{ var.name }}
+        {% if not connection.connection_type.implicit %}
         vector[vector[{{ var.c_type }}]] get_{{ var.name }}()
-        vector[{{ var.c_type }}] get_dendrite_{{ var.name }}(int)
         {{ var.c_type }} get_synapse_{{ var.name }}(int, int)
-        void set_{{ var.name }}(vector[vector[{{ var.c_type }}]])
-        void set_dendrite_{{ var.name }}(int, vector[{{ var.c_type }}])
         void set_synapse_{{ var.name }}(int, int, {{ var.c_type }})
+        {% endif %}
         {% else %}
         {{ var.c_type }} get_{{ var.name }}()
         void set_{{ var.name }}({{ var.c_type }})
@@ -90,6 +199,13 @@ cdef extern from "core.h":
     Connection{{ connection.id }} connection{{ connection.id }}
     {% endfor %}
 
+cdef np.ndarray view(void *data, np.npy_intp size, int typenum, object owner):
+    # Wraps a C++ buffer into an array without copying it. Writes to the array reach the simulator. The array is valid
+    # until the buffer is reallocated, i.e. until the network is initialized again or a connectivity is replaced.
+    cdef np.ndarray array = np.PyArray_SimpleNewFromData(1, &size, typenum, data)
+    np.set_array_base(array, owner)
+    return array
+
 {% for population in populations %}
 cdef class Population{{ population.id }}Wrapper:
     def __cinit__(self, size):
@@ -108,10 +224,11 @@ cdef class Population{{ population.id }}Wrapper:
         population{{ population.id }}.set_{{ var.name }}(value)
     {% elif var.scope == 'local' %}
     cpdef np.ndarray get_{{ var.name }}(self):
-        return np.array(population{{ population.id }}.get_{{ var.name }}())
+        return view(population{{ population.id }}.{{ var.name }}.data(), population{{ population.id }}.{{ var.name }}.size(),
+                    {{ npy_types[var.c_type] }}, self)
 
-    cpdef set_{{ var.name }}(self, np.ndarray value):
-        population{{ population.id }}.set_{{ var.name }}( value )
+    cpdef set_{{ var.name }}(self, value):
+        self.get_{{ var.name }}()[:] = value
 
     cpdef {{ var.c_type }} get_single_{{ var.name }}(self, int rank):
         return population{{ population.id }}.get_single_{{ var.name }}(rank)
@@ -122,11 +239,102 @@ cdef class Population{{ population.id }}Wrapper:
 
     {% endfor %}
 
-    {% for var in population_variable_specs[population] %}
-    cpdef np.ndarray get_{{ var.name }}_history(self):
-        return np.array(population{{ population.id }}.get_{{ var.name }}_history())
+    cpdef np.ndarray get_spiked(self):
+        return view(population{{ population.id }}.spiked.data(), population{{ population.id }}.spiked.size(), np.NPY_INT, self)
+
+    cpdef np.ndarray get_last_spike(self):
+        return view(population{{ population.id }}.last_spike.data(), population{{ population.id }}.last_spike.size(),
+                    np.NPY_LONG, self)
+
+    def get_state(self):
+        """Arrays of the variables and the spikes of the population, viewing the buffers of the simulator."""
+        return {
+            {% for var in population_variable_specs[population] %}
+            {% if var.scope == 'local' %}
+            '{{ var.name }}': self.get_{{ var.name }}(),
+            {% else %}
+            '{{ var.name }}': np.array(self.get_{{ var.name }}()),
+            {% endif %}
+            {% endfor %}
+            'spiked': self.get_spiked(),
+            'last_spike': self.get_last_spike(),
+            'r': view(population{{ population.id }}.r.data(), population{{ population.id }}.r.size(), np.NPY_DOUBLE, self),
+            '_spike_history': np.array(population{{ population.id }}.get_spike_history(), dtype=np.int_),
+            '_mean_fr_window': np.array(population{{ population.id }}._mean_fr_window),
+            '_mean_fr_rate': np.array(population{{ population.id }}._mean_fr_rate),
+            {% if population.spike_source == 'poisson' %}
+            '_presentation_start': np.array(population{{ population.id }}._presentation_start),
+            '_next_spike': view(population{{ population.id }}._next_spike.data(), population{{ population.id }}._next_spike.size(),
+                                np.NPY_LONG, self),
+            {% endif %}
+        }
+
+    def set_state(self, state):
+        """Copies arrays of `get_state()` into the simulator in a single pass each."""
+        cdef np.ndarray array
+        {% for var in population_variable_specs[population] %}
+        {% if var.scope == 'local' %}
+        {{ copy_array('population' ~ population.id ~ '.' ~ var.name, "state['" ~ var.name ~ "']", var.c_type) | indent(8) }}
+        {% else %}
+        population{{ population.id }}.set_{{ var.name }}(state['{{ var.name }}'])
+        {% endif %}
+        {% endfor %}
+        {{ copy_array('population' ~ population.id ~ '.spiked', "state['spiked']", 'int') | indent(8) }}
+        {{ copy_array('population' ~ population.id ~ '.last_spike', "state['last_spike']", 'long int') | indent(8) }}
+        {{ copy_array('population' ~ population.id ~ '.r', "state['r']", 'double') | indent(8) }}
+        population{{ population.id }}.set_spike_history(state['_spike_history'])
+        population{{ population.id }}._mean_fr_window = state['_mean_fr_window']
+        population{{ population.id }}._mean_fr_rate = state['_mean_fr_rate']
+        {% if population.spike_source == 'events' %}
+        population{{ population.id }}.seek()
+
+    def set_events(self, steps, ranks):
+        """Copies precomputed spikes sorted by step into the simulator, which emits those from its current step on."""
+        cdef np.ndarray array
+        {{ copy_array('population' ~ population.id ~ '._event_steps', 'steps', 'long int') | indent(8) }}
+        {{ copy_array('population' ~ population.id ~ '._event_ranks', 'ranks', 'int') | indent(8) }}
+        population{{ population.id }}.seek()
+        {% elif population.spike_source == 'poisson' %}
+        population{{ population.id }}._presentation_start = state['_presentation_start']
+        {{ copy_array('population' ~ population.id ~ '._next_spike', "state['_next_spike']", 'long int') | indent(8) }}
+        population{{ population.id }}.rebuild_schedule()
+
+    def set_rates(self, rates, long int presentation_steps):
+        """Copies the rates of all presentations into the simulator and starts the presentations over."""
+        cdef np.ndarray array
+        {{ copy_array('population' ~ population.id ~ '._rates', 'rates', 'double') | indent(8) }}
+        population{{ population.id }}._presentation_steps = presentation_steps
+        population{{ population.id }}.start_presentations()
+        {% endif %}
 
-    {% endfor %}
+{{ monitor_accessors('population', population, population_variable_specs[population]) }}
+{% for monitor in population.spike_monitors %}
+{% set recorder = 'population' ~ population.id ~ '._spike_monitor' ~ monitor.id %}
+    def configure_spike_monitor{{ monitor.id }}(self, vector[int] ranks, long int start, long int stop, long int capacity):
+        population{{ population.id }}.configure_spike_monitor{{ monitor.id }}(ranks, start, stop, capacity)
+
+    def get_spike_monitor{{ monitor.id }}_steps(self):
+        return view({{ recorder }}.steps.data(), {{ recorder }}.count, np.NPY_INT, self)
+
+    def get_spike_monitor{{ monitor.id }}_ranks(self):
+        return view({{ recorder }}.spike_ranks.data(), {{ recorder }}.count, np.NPY_INT, self)
+
+    def get_spike_monitor{{ monitor.id }}_counts(self):
+        cdef np.ndarray counts = np.empty(population{{ population.id }}.get_size(), dtype=np.int_)
+        {{ recorder }}.counts(<long int *>np.PyArray_DATA(counts), counts.shape[0])
+        return counts
+
+    def get_spike_monitor{{ monitor.id }}_raster(self, long int first, long int bin, long int bins):
+        cdef np.ndarray raster = np.empty((population{{ population.id }}.get_size(), bins), dtype=np.int32)
+        {{ recorder }}.raster(<int *>np.PyArray_DATA(raster), raster.shape[0], first, bin, bins)
+        return raster
+
+    def get_spike_monitor{{ monitor.id }}_rates(self, int neurons, long int first, long int bin, long int bins):
+        cdef np.ndarray rates = np.empty(bins, dtype=np.double)
+        {{ recorder }}.rates(<double *>np.PyArray_DATA(rates), neurons, first, bin, bins, get_dt())
+        return rates
+
+{% endfor %}
 
     cpdef compute_firing_rate(self, double window):
         population{{ population.id }}.compute_firing_rate(window)
@@ -135,26 +343,117 @@ cdef class Population{{ population.id }}Wrapper:
 
 {% for connection in connections %}
 cdef class Connection{{ connection.id }}Wrapper:
+{% if not connection.connection_type.implicit %}
 
     def nb_synapses(self, rank):
         return connection{{ connection.id }}.nb_synapses(rank)
 
+    def get_post_rank(self):
+        return view(connection{{ connection.id }}.post_rank.data(), connection{{ connection.id }}.post_rank.size(),
+                    np.NPY_INT, self)
+
+    def get_pre_rank(self):
+        return connection{{ connection.id }}.get_pre_rank()
+
+    def set_pre_rank(self, value):
+        connection{{ connection.id }}.set_pre_rank(value)
+
+    def get_row_ptr(self):
+        return view(connection{{ connection.id }}.row_ptr.data(), connection{{ connection.id }}.row_ptr.size(),
+                    np.NPY_INT, self)
+{% else %}
+
+    def nb_taps(self):
+        return connection{{ connection.id }}.kernel.taps()
+{% endif %}
+
+{% set state_arrays = [] if connection.connection_type.implicit else
+    [('post_rank', 'int'), ('row_ptr', 'int'), ('pre_rank', 'int'), ('inv_pre_ptr', 'int'), ('inv_pre_rank', 'int'),
+     ('inv_pre_row', 'int'), ('inv_post_rank', 'int')] %}
+{% for var in connection_variable_specs[connection] if var.scope == 'local' %}
+{% set _ = state_arrays.append((var.name, var.c_type)) %}
+{% endfor %}
+    def get_state(self, bint transient=False):
+        """Arrays of the connectivity, including its inverse order, and the variables of the connection, viewing the
+        buffers of the simulator. If `transient` is true, input on its way to post-synaptic neurons and times of last
+        update of synapses are included, which a checkpoint needs to resume the simulation."""
+        state = {
+            {% for name, c_type in state_arrays %}
+            '{{ name }}': view(connection{{ connection.id }}.{{ name }}.data(), connection{{ connection.id }}.{{ name }}.size(),
+                               {{ npy_types[c_type] }}, self),
+            {% endfor %}
+            {% for var in connection_variable_specs[connection] if var.scope != 'local' %}
+            '{{ var.name }}': np.array(connection{{ connection.id }}.get_{{ var.name }}()),
+            {% endfor %}
+        }
+        if transient:
+            state['_psp_slots'] = np.array(connection{{ connection.id }}._psp_slots)
+            state['_psp_buffer'] = view(connection{{ connection.id }}._psp_buffer.data(),
+                                        connection{{ connection.id }}._psp_buffer.size(), np.NPY_DOUBLE, self)
+            {% if lazy_synapses[connection] %}
+            state['_last_update'] = view(connection{{ connection.id }}._last_update.data(),
+                                         connection{{ connection.id }}._last_update.size(), np.NPY_LONG, self)
+            {% endif %}
+        return state
+
+    def set_state(self, state):
+        """Copies arrays of `get_state()` into the simulator, e.g. memory-mapped ones, in a single pass each."""
+        cdef np.ndarray array
+        {% for name, c_type in state_arrays %}
+        {{ copy_array('connection' ~ connection.id ~ '.' ~ name, "state['" ~ name ~ "']", c_type) | indent(8) }}
+        {% endfor %}
+        {% for var in connection_variable_specs[connection] if var.scope != 'local' %}
+        connection{{ connection.id }}.set_{{ var.name }}(state['{{ var.name }}'])
+        {% endfor %}
+        connection{{ connection.id }}.bind_connectivity()
+        connection{{ connection.id }}.fit_psp_buffer()
+        if '_psp_buffer' in state:
+            connection{{ connection.id }}._psp_slots = state['_psp_slots']
+            {{ copy_array('connection' ~ connection.id ~ '._psp_buffer', "state['_psp_buffer']", 'double') | indent(12) }}
+            {% if lazy_synapses[connection] %}
+            {{ copy_array('connection' ~ connection.id ~ '._last_update', "state['_last_update']", 'long int') | indent(12) }}
+            {% endif %}
+
+    def set_keep_connectivity(self, bint value):
+        connection{{ connection.id }}.keep_connectivity = value
 
+{{ monitor_accessors('connection', connection, connection_variable_specs[connection]) }}
 
     {% for var in connection_variable_specs[connection] %}
     {% if var.name != 'w' %}
+    {% if var.scope == 'local' %}
+    cdef np.ndarray _{{ var.name }}_view(self):
+        return view(connection{{ connection.id }}.{{ var.name }}.data(), connection{{ connection.id }}.{{ var.name }}.size(),
+                    {{ npy_types[var.c_type] }}, self)
+
+    {% if connection.connection_type.implicit %}
+    # values of the kernel taps in row-major order, shared by all synapses
+    {% else %}
+    # values of all synapses in compressed sparse row order, the synapses of row `i` are `row_ptr[i]:row_ptr[i + 1]`
+    {% endif %}
     def get_{{ var.name }}(self):
-        return connection{{ connection.id }}.get_{{ var.name }}()
+        values = self._{{ var.name }}_view()
+        {% if var.name == 'delay' %}
+        # delays are written through the setters, which grow the delivery buffer to the longest delay
+        values.flags.writeable = False
+        {% endif %}
+        return values
 
     def set_{{ var.name }}(self, value):
-        connection{{ connection.id }}.set_{{ var.name }}(value)
+        self._{{ var.name }}_view()[:] = value
+        {% if var.name == 'delay' %}
+        connection{{ connection.id }}.fit_psp_buffer()
+        {% endif %}
+    {% if not connection.connection_type.implicit %}
 
-    {% if var.scope == 'local' %}
     def get_dendrite_{{ var.name }}(self, int rank):
-        return connection{{ connection.id }}.get_dendrite_{{ var.name }}(rank)
+        return self.get_{{ var.name }}()[connection{{ connection.id }}.row_ptr[rank]:connection{{ connection.id }}.row_ptr[rank + 1]]
 
-    def set_dendrite_{{ var.name }}(self, int rank, vector[{{ var.c_type }}] value):
-        connection{{ connection.id }}.set_dendrite_{{ var.name }}(rank, value)
+    def set_dendrite_{{ var.name }}(self, int rank, value):
+        self._{{ var.name }}_view()[connection{{ connection.id }}.row_ptr[rank]:connection{{ connection.id }}.row_ptr[rank + 1]] = value
+        {% if var.name == 'delay' %}
+        connection{{ connection.id }}.fit_psp_buffer()
+        {% endif %}
 
     def get_synapse_{{ var.name }}(self, int rank_post, int rank_pre):
         return connection{{ connection.id }}.get_synapse_{{ var.name }}(rank_post, rank_pre)
@@ -162,45 +461,46 @@ cdef class Connection{{ connection.id }}Wrapper:
     def set_synapse_{{ var.name }}(self, int rank_post, int rank_pre, {{ var.c_type }} value):
         connection{{ connection.id }}.set_synapse_{{ var.name }}(rank_post, rank_pre, value)
     {% endif %}
+    {% else %}
+    def get_{{ var.name }}(self):
+        return connection{{ connection.id }}.get_{{ var.name }}()
 
+    def set_{{ var.name }}(self, value):
+        connection{{ connection.id }}.set_{{ var.name }}(value)
     {% endif %}
-    {% endfor %}
-
-{% endfor %}
 
-
-cpdef get_current_state(): # TODO to be re-checked
-    state = {}
-
-    network_state = {}
-    {% for network_variable_spec in network_variable_specs %}
-    network_state['{{ network_variable_spec.name }}'] = get_global_{{ network_variable_spec.name }}()
+    {% endif %}
     {% endfor %}
-    state["Network"] = network_state
 
-    {% for population in populations %}
-    population{{ population.id }}_state = {}
+{% endfor %}
 
-    {% for var in population_variable_specs[population] %}
-    population{{ population.id }}_state['{{ var.name }}'] = population{{ population.id }}.get_{{ var.name }}()
-    {% endfor %}
 
-    state['Population{{ population.id }}'] = population{{ population.id }}_state
-    {% endfor %}
+def get_globals():
+    """Values of the network variables."""
+    return {
+        {% for network_variable_spec in network_variable_specs %}
+        '{{ network_variable_spec.name }}': get_global_{{ network_variable_spec.name }}(),
+        {% endfor %}
+    }
 
-    {% for connection in connections %}
-    connection{{ connection.id }}_state = {}
 
-    {% for var in connection_variable_specs[connection] %}
-    connection{{ connection.id }}_state['{{ var.name }}'] = connection{{ connection.id }}.get_{{ var.name }}()
+def set_globals(values):
+    """Sets the values of the network variables from a dictionary of `get_globals()`."""
+    {% for network_variable_spec in network_variable_specs %}
+    set_global_{{ network_variable_spec.name }}(values['{{ network_variable_spec.name }}'])
     {% endfor %}
 
-    state['Connection{{ connection.id }}'] = connection{{ connection.id }}_state
-    {% endfor %}
 
-    return state
+def run_wrapper(long int steps, callback=None, long int interval=0):
+    """Runs `steps` steps inside the simulator, calling `callback()` after every `interval` steps if it is given."""
+    cdef long int chunk
+    if callback is None or interval <= 0:
+        interval = steps
 
-cpdef run_wrapper(int steps):
-    for i in range(steps):
-        run(1)
-        monitoring.get_state_callback(get_current_state())
+    while steps > 0:
+        chunk = min(interval, steps)
+        with nogil:
+            run(chunk)
+        steps -= chunk
+        if callback is not None:
+            callback()
@@ -21,6 +21,7 @@
 from collections import defaultdict
 from copy import deepcopy
 import sympy
+from sympy.core.function import AppliedUndef
 
 from .symbol_table import SymbolTable
 from cerebro.globals import ACCEPTABLE_CONSTRAINTS, BUILTIN_VARIABLES, ADJECTIVE_VARIABLE_NAMES
@@ -28,7 +29,9 @@ from cerebro.exceptions import ParseException, SemanticException
 from cerebro.enums import VariableScope, VariableContext, EquationContext, VariableVariability
 from cerebro.globals import FORBIDDEN_VARIABLE_NAMES, RESERVED_WORDS, ACCEPTABLE_PROPRIETOR, INTERNAL_VARIABLES
 from cerebro.code_generation.api import CodeGeneration
-from .tree_converter import Node, Variable, Derivative, Proprietorship
+from cerebro.models.connection_type import ConvolutionConnection
+from .tree_converter import Node, Variable, Derivative, Proprietorship, Function
+from .optimizer import Optimizer
 
 
 class Compiler:
@@ -49,10 +52,13 @@ class Compiler:
         self.population_equations = defaultdict(list)
         self.population_reset_equations = defaultdict(list)
         self.population_spike_condition = {}
+        self.population_optimizers = {}
 
         self.connection_equations = defaultdict(list)
         self.connection_pre_spike = defaultdict(list)
         self.connection_post_spike = defaultdict(list)
+        self.connection_event_driven = {}
+        self.connection_optimizers = {}
 
         self.population_symbol_tables = {}
 
@@ -125,13 +131,25 @@ class Compiler:
             equation.semantic_analyzer(self.symtable, EquationContext.NEURON)
             self.population_equations[population].append(equation)
 
-        spike_expression = Compiler.NeuronExpression.from_parsed(
-            population.neuron.spike,
+        self._integration_semantic_analyzer(
+            self.population_equations[population],
+            population.neuron.method,
             {
                 'self': self.symtable
-            }
+            },
+            'population{}'.format(population.id)
         )
-        spike_expression.semantic_analyzer(self.symtable)
+
+        # neurons without a spike condition never fire by themselves
+        spike_expression = None
+        if population.neuron.spike.strip():
+            spike_expression = Compiler.NeuronExpression.from_parsed(
+                population.neuron.spike,
+                {
+                    'self': self.symtable
+                }
+            )
+            spike_expression.semantic_analyzer(self.symtable)
         self.population_spike_condition[population] = spike_expression
 
         for parsed_equation in population.neuron.reset:
@@ -147,6 +165,17 @@ class Compiler:
             equation.semantic_analyzer(self.symtable, EquationContext.NEURON)
             self.population_reset_equations[population].append(equation)
 
+        self.population_optimizers[population] = self._optimization_pass(
+            self.population_equations[population],
+            self.population_reset_equations[population],
+            population.neuron.method,
+            {
+                'self': self.symtable
+            }
+        )
+
+        self._monitors_semantic_analyzer(population, population_variable_specs)
+
         self.population_symbol_tables[population] = deepcopy(self.symtable)
 
         self.symtable.exit_scope()
@@ -214,6 +243,21 @@ class Compiler:
             )
             self.connection_equations[connection].append(equation)
 
+        self._integration_semantic_analyzer(
+            self.connection_equations[connection],
+            connection.synapse.method,
+            {
+                'self': self.symtable,
+                'pre': self.population_symbol_tables[connection.pre],
+                'post': self.population_symbol_tables[connection.post]
+            },
+            'connection{}'.format(connection.id)
+        )
+        self.connection_event_driven[connection] = connection.synapse.method in (None, 'exact') and all(
+            equation.equation_type == 'ode' and equation.linear is not None
+            for equation in self.connection_equations[connection]
+        )
+
         for parsed_equation in connection.synapse.pre_spike:
             self.parse_expression(
                 parsed_equation.expression,
@@ -275,8 +319,132 @@ class Compiler:
                 connection=connection
             )
             self.connection_post_spike[connection].append(equation)
+
+        self.connection_optimizers[connection] = self._optimization_pass(
+            [] if self.connection_event_driven[connection] else self.connection_equations[connection],
+            self.connection_pre_spike[connection] + self.connection_post_spike[connection],
+            connection.synapse.method,
+            {
+                'self': self.symtable,
+                'pre': self.population_symbol_tables[connection.pre],
+                'post': self.population_symbol_tables[connection.post]
+            },
+            proprietor_symtables={
+                'pre': self.population_symbol_tables[connection.pre],
+                'post': self.population_symbol_tables[connection.post]
+            },
+            connection=connection
+        )
+
+        self._monitors_semantic_analyzer(connection, connection_variable_specs)
+        if isinstance(connection.connection_type, ConvolutionConnection):
+            self._convolution_semantic_analyzer(connection)
         self.symtable.exit_scope()
 
+    @staticmethod
+    def _convolution_semantic_analyzer(connection):
+        """Checks that a convolutional connection fits the grids of its populations and has shared synapses only.
+
+        :param connection: The connection to be analysed.
+
+        :type connection: cerebro.models.connection.Connection
+
+        :raises: SemanticException: If the post-synaptic grid is not the output of the convolution, the weights do not
+            fit the kernel or the synapse has equations.
+        """
+        connection_type = connection.connection_type
+        output_shape = connection_type.output_shape(connection.pre)
+        if output_shape is None or output_shape != connection_type.grid(connection.post):
+            raise SemanticException("Post-synaptic population of connection{} must be of shape {}.".format(
+                connection.id, output_shape
+            ))
+        if connection_type.weights is not None and \
+                connection_type.weights.shape != connection_type.kernel_shape(connection.pre):
+            raise SemanticException("Weights of connection{} must be of shape {}.".format(
+                connection.id, connection_type.kernel_shape(connection.pre)
+            ))
+        if connection.synapse.equations or connection.synapse.pre_spike or connection.synapse.post_spike:
+            raise SemanticException("Synapses of connection{} are shared and cannot have equations.".format(
+                connection.id
+            ))
+
+    @staticmethod
+    def _integration_semantic_analyzer(equations, method, symtables, owner_name):
+        """Prepares the ODEs among equations to be integrated by a method.
+
+        ODEs that can be solved in closed form are linearized unless another method is chosen, and ODEs to be
+        integrated by exponential Euler are differentiated.
+
+        :param equations: Equations of a neuron or synapse.
+        :param method: Method by which the ODEs are integrated, `None` for the default.
+        :param symtables: Symbol tables container.
+        :param owner_name: Name of the population or connection the equations belong to.
+
+        :type equations: list
+        :type method: str
+        :type symtables: dict
+        :type owner_name: str
+
+        :raises: SemanticException: If the method is `exact` and an ODE cannot be solved in closed form.
+        """
+        for equation in equations:
+            if equation.equation_type != 'ode':
+                continue
+            if method in (None, 'exact') and not equation.linearize(symtables) and method == 'exact':
+                raise SemanticException("ODE of {} in {} cannot be solved in closed form.".format(
+                    equation.variable.name, owner_name
+                ))
+            if method == 'exponential_euler':
+                equation.differentiate(symtables)
+
+    @staticmethod
+    def _optimization_pass(equations, spike_equations, method, symtables, **kwargs):
+        """Hoists loop-invariant terms out of the update loop and eliminates common subexpressions of the equations
+        evaluated in it. ODEs solved in closed form are not evaluated in the loop.
+
+        :param equations: Update equations of a neuron or synapse.
+        :param spike_equations: Equations applied on spikes in the same loop, e.g. reset equations of a neuron.
+        :param method: Method by which the ODEs are integrated, `None` for the default.
+        :param symtables: Symbol tables container.
+        :param \**kwargs: Keyword arguments of the semantic analyzer of the rewritten expressions.
+
+        :type equations: list
+        :type spike_equations: list
+        :type method: str
+        :type symtables: dict
+
+        :returns: The optimizer holding the values to be computed ahead of the equations.
+
+        :rtype: cerebro.compiler.optimizer.Optimizer
+        """
+        evaluated = [
+            equation for equation in equations
+            if equation.equation_type != 'ode' or equation.linear is None or method not in (None, 'exact')
+        ]
+        return Optimizer(
+            evaluated, symtables, {equation.variable.name for equation in equations + spike_equations}, **kwargs
+        ).optimize()
+
+    @staticmethod
+    def _monitors_semantic_analyzer(owner, variable_specs):
+        """Checks that monitors of a population or a connection record defined variables only.
+
+        :param owner: The population or connection the monitors belong to.
+        :param variable_specs: Specifications of the variables of the owner.
+
+        :type owner: cerebro.models.population.Population or cerebro.models.connection.Connection
+        :type variable_specs: list
+
+        :raises: SemanticException: If a monitor records a variable which is not defined.
+        """
+        defined = {variable_spec.name for variable_spec in variable_specs}
+        for monitor in owner.monitors:
+            not_defined = [variable for variable in monitor.variables if variable not in defined]
+            if not_defined:
+                raise SemanticException("Monitored variables {} are not defined in {}{}.".format(
+                    not_defined, owner.__class__.__name__.lower(), owner.id
+                ))
+
     def semantic_analyzer(self):
         """Analyse the whole network construction semantically."""
         self._network_variables_semantic_analyzer()
@@ -287,9 +455,51 @@ class Compiler:
         for connection in self.network.connections:
             self._connection_semantic_analyzer(connection)
 
-    def code_gen(self):
+        self._random_streams_allocator()
+
+    def _random_streams_allocator(self):
+        """Gives each random function of the network a stream of its own.
+
+        Draws of the generated code are keyed by (seed, stream, step, index), so they neither depend on the order in
+        which neurons or synapses are visited nor on the number of threads visiting them.
+        """
+        expressions = []
+        for population in self.network.populations:
+            expressions.extend(
+                (equation.expression, 'i') for equation in
+                self.population_equations[population] + self.population_reset_equations[population]
+            )
+            if self.population_spike_condition[population] is not None:
+                expressions.append((self.population_spike_condition[population], 'i'))
+        for connection in self.network.connections:
+            expressions.extend(
+                (equation.expression, 'j') for equation in
+                self.connection_equations[connection] + self.connection_pre_spike[connection] +
+                self.connection_post_spike[connection]
+            )
+
+        streams = iter(range(1, 2 ** 31))
+
+        def bind_stream(node, parent, children, **kwargs):
+            if isinstance(node, Function):
+                node.bind_stream(next(streams), kwargs.get('index'))
+
+        for expression, index in expressions:
+            expression.tree.traverse(bind_stream, index=index)
+
+    def code_gen(self, cache=None, parameters=None, profile='default', dt=None):
         """Generates the wrapper class for the network.
 
+        :param cache: Store of built modules to reuse; `None` uses the default store and `False` disables caching
+        :param parameters: Runtime parameter block to be filled in parametric mode, `None` to paste values as literals
+        :param profile: Build profile, one of `cerebro.globals.BUILD_PROFILES`
+        :param dt: Step size of the training simulation of a profile-guided build
+
+        :type cache: cerebro.code_generation.cache.BuildCache or bool
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
+        :type profile: str
+        :type dt: float
+
         :returns: A wrapper module
 
         :rtype: module
@@ -299,7 +509,10 @@ class Compiler:
                               self.population_variable_specs, self.connection_variable_specs,
                               self.population_equations, self.population_reset_equations,
                               self.population_spike_condition, self.connection_equations,
-                              self.connection_pre_spike, self.connection_post_spike).generate()
+                              self.connection_pre_spike, self.connection_post_spike,
+                              self.connection_event_driven, self.population_optimizers,
+                              self.connection_optimizers, cache=cache, parameters=parameters,
+                              profile=profile, dt=dt).generate()
 
     def parse_expression(self, expression, context, symtables):
         """Parses the right-hand-side expression of an equation by traversing the parse tree.
@@ -485,6 +698,8 @@ class Compiler:
                 if context == EquationContext.NEURON else Compiler.SynapseExpression
             self.expression = expression_cls.from_parsed(expression, symtables)
             self.equation_type = equation_type
+            self.linear = None
+            self.jacobian = None
 
         def semantic_analyzer(self, symbol_table, context, **kwargs):
             """Semantic analysis of the equation.
@@ -508,6 +723,58 @@ class Compiler:
                 self.expression.semantic_analyzer(symbol_table, **kwargs)
             self.variable = var_spec
 
+        def linearize(self, symtables):
+            """Splits the right-hand side of an ODE into `decay * variable + drive`, where neither coefficient changes
+            from one neuron or synapse to another, so that the ODE can be solved in closed form.
+
+            The coefficients are kept in `linear` as a pair of expressions.
+
+            :param symtables: Symbol tables container
+
+            :type symtables: dict
+
+            :returns: Whether the right-hand side is linear with loop-invariant coefficients
+
+            :rtype: bool
+            """
+            name = self.variable.name if isinstance(self.variable, Compiler.Variable) else self.variable
+            variable = sympy.Symbol(name)
+            rhs = self.expression.sympy_expression
+            if rhs is None or rhs.atoms(AppliedUndef):
+                return False
+
+            decay = sympy.diff(rhs, variable)
+            drive = sympy.expand(rhs - decay * variable)
+            for symbol in decay.free_symbols | drive.free_symbols:
+                spec = symtables['self'].get(str(symbol))
+                if spec is None or str(symbol) == 't' or \
+                        (spec.scope != VariableScope.SHARED.value and spec.context != VariableContext.NETWORK):
+                    return False
+
+            self.linear = (
+                Compiler.Expression(Node.extract(decay, symtables), decay),
+                Compiler.Expression(Node.extract(drive, symtables), drive)
+            )
+            return True
+
+        def differentiate(self, symtables):
+            """Differentiates the right-hand side of an ODE by its variable, as exponential Euler integration needs.
+
+            The derivative is kept in `jacobian`.
+
+            :param symtables: Symbol tables container
+
+            :type symtables: dict
+
+            :raises: SemanticException: If the right-hand side cannot be differentiated.
+            """
+            name = self.variable.name if isinstance(self.variable, Compiler.Variable) else self.variable
+            try:
+                derivative = sympy.diff(self.expression.sympy_expression, sympy.Symbol(name))
+            except (TypeError, ValueError):
+                raise SemanticException('Cannot differentiate the equation of variable {}.'.format(name))
+            self.jacobian = Compiler.Expression(Node.extract(derivative, symtables), derivative)
+
         @staticmethod
         def from_parsed(parsed_equation, context, symtables):
             """Generate an Equation object from parsed equation.
@@ -534,17 +801,21 @@ class Compiler:
 
     class Expression:
         """Base class for right-hand-side expression parse tree."""
-        def __init__(self, tree):
+        def __init__(self, tree, sympy_expression=None):
             """
             :param tree: The parse tree root
+            :param sympy_expression: The sympy expression the tree is extracted from
 
             :type tree: cerebro.compiler.tree_converter.Node
+            :type sympy_expression: sympy.Expr
             """
             self.tree = tree
+            self.sympy_expression = sympy_expression
 
         @classmethod
         def from_parsed(cls, expression, symtables):
-            return cls(Node.extract(sympy.sympify(expression), symtables))
+            sympy_expression = sympy.sympify(expression)
+            return cls(Node.extract(sympy_expression, symtables), sympy_expression)
 
         def __str__(self):
             return repr(self)
@@ -552,6 +823,27 @@ class Compiler:
         def __repr__(self):
             return repr(self.tree)
 
+        def render(self, substitutions):
+            """Renders the expression with some of its variables replaced, e.g. by intermediate values of an ODE
+            integrator. Variables of pre- and post-synaptic neurons are never replaced.
+
+            :param substitutions: C++ expressions to be rendered instead of the variables, by variable name
+
+            :type substitutions: dict
+
+            :returns: C++ expression
+
+            :rtype: str
+            """
+            def substitute(node, parent, children, **kwargs):
+                if isinstance(node, Variable) and not isinstance(parent, Proprietorship):
+                    node.substitute = kwargs.get('substitutions').get(str(node.symbol))
+
+            self.tree.traverse(substitute, substitutions=substitutions)
+            rendered = repr(self.tree)
+            self.tree.traverse(substitute, substitutions={})
+            return rendered
+
     class NeuronExpression(Expression):
         """
         Base class for right-hand side expression of a neuron.
@@ -0,0 +1,147 @@
+"""This module optimizes the equations of a neuron or a synapse before the code is generated.
+
+*Classes*:
+
+* **Optimizer**:
+    Hoists loop-invariant terms out of the update loop and eliminates common subexpressions of equations.
+"""
+
+
+import sympy
+from sympy.core.function import AppliedUndef
+
+from cerebro.enums import VariableScope, VariableContext
+from .tree_converter import Node, Proprietorship
+
+
+class Optimizer:
+    """
+    Hoists loop-invariant terms out of the update loop and eliminates common subexpressions of equations.
+
+    The update equations of a population or a connection are evaluated once per neuron or synapse. Terms that only
+    depend on shared and network variables take the same value for all of them, so they are moved to `invariants`,
+    computed once per step before the loop. Subexpressions that occur more than once among the equations are moved to
+    `temporaries`, computed once per neuron or synapse at the start of the loop body. The equations are rewritten to
+    read these values instead.
+
+    Equations are applied one after another, so terms depending on variables the equations change are left in place.
+    Random functions are left in place too, as every occurrence draws its own values. Numeric subexpressions are already
+    folded by sympy when the equations are parsed.
+    """
+    INVARIANT_PREFIX = '_inv'
+    TEMPORARY_PREFIX = '_cse'
+
+    def __init__(self, equations, symtables, assigned, **kwargs):
+        """
+        :param equations: Update equations of a neuron or synapse that are evaluated in the loop, rewritten in place.
+        :param symtables: Symbol tables container.
+        :param assigned: Names of the variables that change in the loop.
+        :param \**kwargs: Keyword arguments of the semantic analyzer of the rewritten expressions, e.g. the connection
+            the synapse is used in.
+
+        :type equations: list
+        :type symtables: dict
+        :type assigned: set
+        """
+        self.equations = equations
+        self.symtables = symtables
+        self.analyzer_kwargs = kwargs
+        self.expression_cls = type(equations[0].expression) if equations else None
+
+        self.invariants = []
+        self.temporaries = []
+
+        self._hoisted = {}
+        self._assigned = {sympy.Symbol(name) for name in assigned}
+
+    def _spec(self, symbol):
+        name = str(symbol)
+        matched = Proprietorship.match(symbol)
+        if matched is not None:
+            groups = matched.groupdict()
+            return self.symtables[groups['OWNER']].get(groups['NAME'])
+        return self.symtables['self'].get(name)
+
+    def _is_invariant(self, expression):
+        if expression.atoms(AppliedUndef):
+            return False
+        for symbol in expression.free_symbols:
+            if symbol in self._assigned or str(symbol).startswith(Optimizer.TEMPORARY_PREFIX):
+                return False
+            if str(symbol).startswith(Optimizer.INVARIANT_PREFIX):
+                continue
+            spec = self._spec(symbol)
+            if spec is None or str(symbol) == 't' or \
+                    (spec.scope != VariableScope.SHARED.value and spec.context != VariableContext.NETWORK):
+                return False
+        return True
+
+    def _hoist_term(self, term):
+        if term.is_Atom:
+            return term
+        if term not in self._hoisted:
+            self._hoisted[term] = sympy.Symbol('{}{}'.format(Optimizer.INVARIANT_PREFIX, len(self._hoisted)))
+        return self._hoisted[term]
+
+    def _hoist(self, expression):
+        if self._is_invariant(expression):
+            return self._hoist_term(expression)
+        if expression.is_Atom or isinstance(expression, AppliedUndef):
+            return expression
+
+        arguments = expression.args
+        if isinstance(expression, (sympy.Add, sympy.Mul)):
+            # invariant operands of a sum or product are gathered into a single hoisted term
+            invariant = [argument for argument in arguments if self._is_invariant(argument)]
+            if len(invariant) > 1 or (invariant and not invariant[0].is_Atom):
+                varying = [argument for argument in arguments if argument not in invariant]
+                return expression.func(
+                    self._hoist_term(expression.func(*invariant)), *[self._hoist(argument) for argument in varying]
+                )
+        return expression.func(*[self._hoist(argument) for argument in arguments])
+
+    def _expression(self, sympy_expression):
+        expression = self.expression_cls(Node.extract(sympy_expression, self.symtables), sympy_expression)
+        expression.semantic_analyzer(self.symtables['self'], **self.analyzer_kwargs)
+        return expression
+
+    def optimize(self):
+        """Rewrites the equations and fills `invariants` and `temporaries`, as lists of (name, expression) pairs in
+        the order they are to be computed.
+
+        :returns: The optimizer
+
+        :rtype: cerebro.compiler.optimizer.Optimizer
+        """
+        if not self.equations:
+            return self
+
+        # random functions are kept out of both passes, so every occurrence still draws its own values
+        expressions, draws = [], {}
+        for equation in self.equations:
+            replaced = {}
+            for call in equation.expression.sympy_expression.atoms(AppliedUndef):
+                replaced[call] = sympy.Symbol('_draw{}'.format(len(draws)))
+                draws[replaced[call]] = call
+            expressions.append(equation.expression.sympy_expression.xreplace(replaced))
+
+        expressions = [self._hoist(expression) for expression in expressions]
+
+        ignored = self._assigned | set(draws)
+        replacements, expressions = sympy.cse(
+            expressions,
+            symbols=sympy.numbered_symbols(Optimizer.TEMPORARY_PREFIX),
+            ignore=list(ignored),
+            order='none'
+        )
+
+        self.invariants = [
+            (str(symbol), self._expression(term)) for term, symbol in self._hoisted.items()
+        ]
+        self.temporaries = [
+            (str(symbol), self._expression(term.xreplace(draws))) for symbol, term in replacements
+        ]
+        for equation, expression in zip(self.equations, expressions):
+            if expression != equation.expression.sympy_expression:
+                equation.expression = self._expression(expression.xreplace(draws))
+        return self
@@ -55,6 +55,9 @@ class Node(ABC):
         if not sympy_object.is_symbol:
             raise Exception('Internal Error: Unknown node type')
 
+        if Temporary.match(sympy_object):
+            return Temporary.extract(sympy_object, symtables)
+
         if Proprietorship.match(sympy_object):
             return Proprietorship.extract(sympy_object, symtables)
 
@@ -157,7 +160,12 @@ class Pow(Operator):
 
     def __repr__(self):
         left_operand, right_operand = self.children
-        return "({}^{})".format(repr(left_operand), repr(right_operand))
+        # small integer powers are folded into divisions and multiplications, which are cheaper than calls to pow()
+        if isinstance(right_operand, Numeral) and right_operand.symbol == -1:
+            return "(1.0/{})".format(repr(left_operand))
+        if isinstance(right_operand, Numeral) and right_operand.symbol == 2 and isinstance(left_operand, Symbol):
+            return "({0}*{0})".format(repr(left_operand))
+        return "pow({}, {})".format(repr(left_operand), repr(right_operand))
 
 
 class Derivative(Operator):
@@ -202,10 +210,13 @@ class Proprietorship(Operator):
         self._display_name = None
 
     def generate_display_name(self, pre_display_name, post_display_name):
+        variable = self.children[0]
         self._display_name = '{0}.{1}'.format(
             pre_display_name if self.owner == 'pre' else post_display_name,
-            repr(self.children[0])
+            variable.symbol
         )
+        if variable.spec is not None and variable.spec.scope != VariableScope.SHARED.value:
+            self._display_name += '[rank_{}]'.format(self.owner)
 
     @staticmethod
     def match(sympy_symbol):
@@ -255,6 +266,11 @@ class Numeral(Symbol):
     def __init__(self, symbol):
         super().__init__(symbol)
 
+    def __repr__(self):
+        if self.symbol.is_Integer:
+            return super().__repr__()
+        return repr(float(self.symbol))
+
 
 class Variable(Symbol):
     """
@@ -272,6 +288,7 @@ class Variable(Symbol):
         """
         super().__init__(symbol)
         self.spec = spec
+        self.substitute = None
 
     @staticmethod
     def match(sympy_symbol):
@@ -282,6 +299,8 @@ class Variable(Symbol):
         return cls(sympy_object, symtable['self'].get(str(sympy_object)))
 
     def __repr__(self):
+        if self.substitute is not None:
+            return self.substitute
         super_repr = str(super().__repr__())
         if self.spec.scope == VariableScope.SHARED.value or \
                 self.spec.context == VariableContext.NETWORK:
@@ -289,7 +308,24 @@ class Variable(Symbol):
         elif self.spec.context == VariableContext.NEURON:
             return super_repr + '[i]'
         else:
-            return super_repr + '[i][j]'
+            return super_repr + '[j]'
+
+
+class Temporary(Symbol):
+    """
+    Class to handle values computed ahead of an equation by the optimizer, e.g. common subexpressions.
+    """
+    _PATTERN = re.compile('^_(inv|cse)[0-9]+$')
+
+    def __init__(self, symbol):
+        super().__init__(symbol)
+
+    @staticmethod
+    def match(sympy_symbol):
+        return Temporary._PATTERN.match(str(sympy_symbol))
+
+    def __repr__(self):
+        return str(self.symbol)
 
 
 class Function(Node):  # TODO generalize it for other mathematical functions
@@ -309,6 +345,20 @@ class Function(Node):  # TODO generalize it for other mathematical functions
         self.function_name = function_name
         self.param_1 = kwargs['param_1']
         self.param_2 = kwargs['param_2']
+        self.stream = 0
+        self.index = '0'
+
+    def bind_stream(self, stream, index):
+        """Sets the random stream the function draws from and the index of its draws within a step.
+
+        :param stream: Identifier of the random stream, unique within the network
+        :param index: C++ expression of the element the function is evaluated for, e.g. `i` or `j`
+
+        :type stream: int
+        :type index: str
+        """
+        self.stream = stream
+        self.index = index
 
     @staticmethod
     def match(sympy_symbol):
@@ -323,4 +373,4 @@ class Function(Node):  # TODO generalize it for other mathematical functions
         return Function(**matched.groupdict())
 
     def __repr__(self):
-        return f"random_{self.function_name}({self.param_1}, {self.param_2})".lower()
+        return f"random_{self.function_name}({self.param_1}, {self.param_2}, {self.stream}, {self.index})".lower()
@@ -26,6 +26,24 @@
 
 * **ACCEPTABLE_PROPRIETOR**: `set`
     Defines valid proprietor words in context equations.
+
+* **ODE_METHODS**: `set`
+    Methods by which ODEs of a neuron or synapse can be integrated.
+
+* **BUILD_PROFILES**: `dict`
+    Optimization flags of the generated code for each build profile.
+
+* **PGO_TRAINING_STEPS**: `int`
+    Number of steps simulated to train a profile-guided build.
+
+* **DEFAULT_SEED**: `int`
+    Seed of the random functions of a network compiled without a seed.
+
+* **DEFAULT_MONITOR_CAPACITY**: `int`
+    Number of records a variable monitor holds before it wraps around.
+
+* **DEFAULT_SPIKE_MONITOR_CAPACITY**: `int`
+    Number of spikes a spike monitor reserves room for before it grows its buffers.
 """
 
 from .enums import VariableContext
@@ -44,6 +62,23 @@ ADJECTIVE_VARIABLE_NAMES = {
 
 ACCEPTABLE_FUNCTION_NAMES = {'Normal', 'Uniform'}
 
+DEFAULT_SEED = 53
+
+ODE_METHODS = {'exact', 'euler', 'exponential_euler', 'rk2', 'rk4'}
+
+BUILD_PROFILES = {
+    'debug': '-O0 -g -D_GLIBCXX_ASSERTIONS',
+    'default': '-O2 -march=native',
+    'release': '-O3 -march=native -fno-math-errno -fno-trapping-math -flto=auto',
+    'pgo': '-O3 -march=native -fno-math-errno -fno-trapping-math -flto=auto',
+}
+
+PGO_TRAINING_STEPS = 200
+
+DEFAULT_MONITOR_CAPACITY = 1000
+
+DEFAULT_SPIKE_MONITOR_CAPACITY = 1 << 16
+
 INTERNAL_VARIABLES = {'t', 'g_exc'}
 
 # TODO: complete list below
@@ -1,7 +1,9 @@
 from cerebro.models.neuron import Neuron
 from cerebro.models.synapse import Synapse
 from cerebro.models.population import Population
+from cerebro.models.spike_source import SpikeSourcePopulation, PoissonPopulation
 from cerebro.models.connection import Connection
+from cerebro.models.monitor import Monitor, SpikeMonitor
 from cerebro.models.network import Network
 from cerebro.models import connection_type
 
@@ -9,7 +11,11 @@ __all__ = [
     'Neuron',
     'Synapse',
     'Population',
+    'SpikeSourcePopulation',
+    'PoissonPopulation',
     'Connection',
+    'Monitor',
+    'SpikeMonitor',
     'Network',
     'connection_type'
 ]
@@ -6,9 +6,15 @@
     Base class to define a connection between two population of neurons.
 """
 
+import os
+
+import numpy as np
+
 from cerebro.models.population import Population
 from cerebro.models.synapse import Synapse
-from cerebro.exceptions import IllegalArgumentException
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.models.monitor import Monitor
+from cerebro.globals import DEFAULT_MONITOR_CAPACITY
 from cerebro.parameter_guards import InstanceGuard
 
 
@@ -17,6 +23,9 @@ class Connection:
     Base class to define a connection between two population of neurons.
     """
     _instance_count = 0
+    # arrays of the connectivity of an explicit connection type, as written by `save`
+    connectivity_arrays = ('post_rank', 'row_ptr', 'pre_rank', 'inv_pre_ptr', 'inv_pre_rank', 'inv_pre_row',
+                           'inv_post_rank')
 
     def __init__(self, pre, post, synapse, connection_type):
         """
@@ -47,10 +56,109 @@ class Connection:
         self.connection_type = connection_type
 
         self.wrapper = None
+        self.monitors = []
+        self.state = None
 
         self.id = Connection._instance_count
         Connection._instance_count += 1
 
+    def monitor(self, variables, ranks=None, interval=1, capacity=DEFAULT_MONITOR_CAPACITY):
+        """Records variables of the connection during simulation; must be called before the network is compiled.
+
+        :param variables: Names of the variables to be recorded.
+        :param ranks: Post-synaptic neurons whose synapses are recorded. `None` records all of them.
+        :param interval: Number of steps between two records.
+        :param capacity: Number of records kept; once exceeded, the oldest records are overwritten.
+
+        :type variables: list of str
+        :type ranks: list of int
+        :type interval: int
+        :type capacity: int
+
+        :returns: The monitor, through which the records are read.
+
+        :rtype: cerebro.models.monitor.Monitor
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        :raises IllegalStateException: If the network is already compiled.
+        """
+        if self.wrapper is not None:
+            raise IllegalStateException("monitors must be added before the network is compiled")
+        monitor = Monitor(self, variables, ranks=ranks, interval=interval, capacity=capacity)
+        self.monitors.append(monitor)
+        return monitor
+
+    def save(self, path):
+        """Writes the connectivity and the variables of the connection to directory `path`, one `.npy` file per array.
+
+        Arrays are written directly from the buffers of the simulator. The inverse order of the connectivity is
+        written as well, so that loading only copies arrays.
+
+        :param path: Directory to write to, created if it does not exist.
+
+        :type path: str
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if self.wrapper is None:
+            raise IllegalStateException("network of the connection is not compiled")
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.wrapper.get_state().items():
+            np.save(os.path.join(path, name + '.npy'), array)
+
+    def load(self, path):
+        """Restores the connectivity and the variables of the connection from a directory written by `save`.
+
+        Files are memory-mapped rather than read. From the next simulation on, the connectivity is not built;
+        instead, the arrays are copied into the simulator whenever the network is initialized.
+
+        :param path: Directory written by `save`.
+
+        :type path: str
+
+        :raises IllegalArgumentException: If the directory does not hold a consistent state, or one that does not fit the
+            populations and the variables of the connection.
+        """
+        if not os.path.isdir(path):
+            raise IllegalArgumentException("{} is not a directory of a saved connection".format(path))
+        state = {
+            name[:-len('.npy')]: np.load(os.path.join(path, name), mmap_mode='r')
+            for name in os.listdir(path) if name.endswith('.npy')
+        }
+
+        connectivity = set() if self.connection_type.implicit else set(Connection.connectivity_arrays)
+        if set(state) != connectivity | {variable.name for variable in self.synapse.variables}:
+            raise IllegalArgumentException(
+                "arrays in {} are not the connectivity and the variables of the connection".format(path)
+            )
+
+        # every array holds one value per synapse, except the row and column pointers and the rows of neurons
+        lengths = {array.shape[0] for name, array in state.items()
+                   if array.ndim == 1 and name not in ('post_rank', 'row_ptr', 'inv_pre_ptr', 'inv_post_rank')}
+        if len(lengths) > 1 or (connectivity and (
+                state['row_ptr'].shape[0] != state['post_rank'].shape[0] + 1 or
+                state['row_ptr'][-1] != state['pre_rank'].shape[0] or
+                state['inv_pre_ptr'][-1] != state['pre_rank'].shape[0])):
+            raise IllegalArgumentException("arrays in {} do not describe the same synapses".format(path))
+        # the simulator indexes the populations and the synapses by these arrays without checking them
+        if connectivity and not (
+                state['inv_pre_ptr'].shape[0] == self.pre.size + 1 and
+                state['post_rank'].shape[0] <= self.post.size and
+                state['inv_post_rank'].shape[0] == self.post.size and
+                Connection._within(state['pre_rank'], self.pre.size) and
+                Connection._within(state['post_rank'], self.post.size) and
+                Connection._within(state['inv_pre_rank'], state['pre_rank'].shape[0]) and
+                Connection._within(state['inv_pre_row'], state['post_rank'].shape[0]) and
+                Connection._within(state['inv_post_rank'], state['post_rank'].shape[0], lowest=-1)):
+            raise IllegalArgumentException(
+                "connectivity in {} does not fit the populations of the connection".format(path)
+            )
+        self.state = state
+
+    @staticmethod
+    def _within(array, size, lowest=0):
+        return not len(array) or (array.min() >= lowest and array.max() < size)
+
     def __repr__(self):
         return self.__class__.__name__ + """(
         Pre synaptic population:
@@ -71,6 +179,3 @@ class Connection:
         if item.startswith('set'):
             return getattr(self.wrapper, item)
         return getattr(self.wrapper, 'get_{}'.format(item))()
-
-    def __hash__(self):
-        return hash('connection.{}'.format(self.id))
@@ -12,28 +12,93 @@
     Base class to connect pre-synaptic neurons to post-synaptic neurons based on Gaussian density.
 * **DoGConnection**:
     Base class to connect pre-synaptic neurons to post-synaptic neurons based on Difference of Gaussian density.
+* **FixedPreNumberConnection**:
+    Base class to connect each post-synaptic neuron to a fixed number of randomly chosen pre-synaptic neurons.
+* **FixedPostNumberConnection**:
+    Base class to connect each pre-synaptic neuron to a fixed number of randomly chosen post-synaptic neurons.
+* **ConvolutionConnection**:
+    Base class to connect two grids of neurons through a kernel of shared synapses.
 """
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.parameter_guards import InstanceGuard, IterableGuard
+
 
 class ConnectionType(ABC):
     """
     Abstract class for different connection types.
+
+    Connection types whose synapses are `implicit` do not store a list of synapses, but compute them from their
+    arguments whenever spikes are delivered.
     """
+    implicit = False
+
     def __init__(self):
         pass
 
     @abstractmethod
-    def get_c_definition(self, connection):
+    def get_c_definition(self, connection, parameters=None):
         """
         :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
 
         :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
 
         :raises NotImplementedError: If the function of abstract class is called directly.
         """
         raise NotImplementedError("Cannot call get_name function of abstract class ConnectionType.")
 
+    def argument(self, name, parameters=None):
+        """
+        :param name: Name of the argument of the connection type.
+        :param parameters: Runtime parameter block to read the argument from, `None` to paste it as a literal.
+
+        :type name: str
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
+
+        :returns: C++ expression of the argument.
+
+        :rtype: str
+        """
+        value = getattr(self, name)
+        if parameters is None:
+            return str(value)
+        return parameters.define(self, name, value)
+
+    @staticmethod
+    def stream(connection):
+        """
+        :param connection: An object of the connection this type is applied to.
+
+        :type connection: cerebro.models.Connection
+
+        :returns: C++ expression of the random stream the connectivity of the connection is drawn from.
+
+        :rtype: str
+        """
+        return f"connectivity_stream({ connection.id })"
+
+    @staticmethod
+    def geometry(population):
+        """
+        :param population: A population connected by this type.
+
+        :type population: cerebro.models.population.Population
+
+        :returns: C++ expression of the positions of the neurons of the population.
+
+        :rtype: str
+        """
+        if population.shape is None:
+            return f"Geometry(population{ population.id }.size)"
+        shape = ', '.join(str(axis) for axis in population.shape)
+        spacing = ', '.join(repr(step) for step in population.spacing)
+        return f"Geometry({{{ shape }}}, {{{ spacing }}})"
+
 
 class AllToAllConnection(ConnectionType):
     """
@@ -42,11 +107,13 @@ class AllToAllConnection(ConnectionType):
     def __init__(self):
         super().__init__()
 
-    def get_c_definition(self, connection):
+    def get_c_definition(self, connection, parameters=None):
         """
         :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
 
         :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
 
         :raises NotImplementedError: If the function of abstract class is called directly.
         """
@@ -66,21 +133,27 @@ class ProbabilityConnection(ConnectionType):
         super().__init__()
         self.probability = probability
 
-    def get_c_definition(self, connection):
+    def get_c_definition(self, connection, parameters=None):
         """
         :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
 
         :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
 
         :raises NotImplementedError: If the function of abstract class is called directly.
         """
         return f"connect_with_probability(" \
-               f"population{ connection.pre.id }.size, population{ connection.post.id }.size, {self.probability})"
+               f"population{ connection.pre.id }.size, population{ connection.post.id }.size, " \
+               f"{ self.argument('probability', parameters) }, " \
+               f"{ self.stream(connection) })"
 
 
 class GaussianConnection(ConnectionType):
     """
     Base class to connect pre-synaptic neurons to post-synaptic neurons based on Gaussian density.
+
+    Distances are measured between the positions of neurons given by the geometry of their populations.
     """
     def __init__(self, sigma):
         """
@@ -91,21 +164,27 @@ class GaussianConnection(ConnectionType):
         super().__init__()
         self.sigma = sigma
 
-    def get_c_definition(self, connection):
+    def get_c_definition(self, connection, parameters=None):
         """
         :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
 
         :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
 
         :raises NotImplementedError: If the function of abstract class is called directly.
         """
         return f"connect_gaussian(" \
-               f"population{ connection.pre.id }.size, population{ connection.post.id }.size, { self.sigma })"
+               f"{ self.geometry(connection.pre) }, { self.geometry(connection.post) }, " \
+               f"{ self.argument('sigma', parameters) }, " \
+               f"{ self.stream(connection) })"
 
 
 class DoGConnection(ConnectionType):
     """
     Base class to connect pre-synaptic neurons to post-synaptic neurons based on Difference of Gaussian density.
+
+    Distances are measured between the positions of neurons given by the geometry of their populations.
     """
     def __init__(self, sigma1, sigma2):
         """
@@ -119,31 +198,184 @@ class DoGConnection(ConnectionType):
         self.sigma1 = sigma1
         self.sigma2 = sigma2
 
-    def get_c_definition(self, connection):
+    def get_c_definition(self, connection, parameters=None):
         """
         :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
 
         :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
 
         :raises NotImplementedError: If the function of abstract class is called directly.
         """
         return f"connect_dog(" \
-               f"population{ connection.pre.id }.size, population{ connection.post.id }.size, { self.sigma1 }, { self.sigma2 })"
+               f"{ self.geometry(connection.pre) }, { self.geometry(connection.post) }, " \
+               f"{ self.argument('sigma1', parameters) }, { self.argument('sigma2', parameters) }, " \
+               f"{ self.stream(connection) })"
 
 
 class FixedPreNumberConnection(ConnectionType):
+    """
+    Base class to connect each post-synaptic neuron to a fixed number of randomly chosen pre-synaptic neurons.
+    """
     def __init__(self, number):
+        """
+        :param number: Number of pre-synaptic neurons of each post-synaptic neuron.
+
+        :type number: int
+        """
         super().__init__()
         self.number = number
 
-    def get_c_definition(self, connection):
-        return f""
+    def get_c_definition(self, connection, parameters=None):
+        """
+        :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
+
+        :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
+        """
+        return f"connect_fixed_pre_number(" \
+               f"population{ connection.pre.id }.size, population{ connection.post.id }.size, " \
+               f"(int)({ self.argument('number', parameters) }), " \
+               f"{ self.stream(connection) })"
 
 
 class FixedPostNumberConnection(ConnectionType):
+    """
+    Base class to connect each pre-synaptic neuron to a fixed number of randomly chosen post-synaptic neurons.
+    """
     def __init__(self, number):
+        """
+        :param number: Number of post-synaptic neurons of each pre-synaptic neuron.
+
+        :type number: int
+        """
         super().__init__()
         self.number = number
 
-    def get_c_definition(self, connection):
-        return f"population"
+    def get_c_definition(self, connection, parameters=None):
+        """
+        :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals.
+
+        :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
+        """
+        return f"connect_fixed_post_number(" \
+               f"population{ connection.pre.id }.size, population{ connection.post.id }.size, " \
+               f"(int)({ self.argument('number', parameters) }), " \
+               f"{ self.stream(connection) })"
+
+
+class ConvolutionConnection(ConnectionType):
+    """
+    Base class to connect two grids of neurons through a kernel of shared synapses.
+
+    Along each axis of the grids, the post-synaptic neuron at coordinate `o` receives from the pre-synaptic neuron at
+    coordinate `o * stride + k - padding` through kernel tap `k`, as in a cross-correlation. All post-synaptic neurons
+    share the synapses of the kernel, so synaptic variables hold one value per tap, in row-major order, and synapses
+    are never stored. The shape of the post-synaptic population must be the output shape of the convolution, and
+    the synapse must not have equations, as a synapse of a tap is shared by many pairs of neurons.
+    """
+    implicit = True
+
+    def __init__(self, kernel, stride=1, padding=0, weights=None):
+        """
+        :param kernel: Number of taps of the kernel, either one for all axes or one per axis.
+        :param stride: Step between the pre-synaptic neurons of neighbouring post-synaptic neurons, either one for all
+            axes or one per axis.
+        :param padding: Number of missing pre-synaptic neurons assumed on both sides of each axis, either one for all
+            axes or one per axis.
+        :param weights: Initial weights of the taps, of the shape of the kernel. `None` initializes them as defined in
+            the synapse.
+
+        :type kernel: int or tuple of int
+        :type stride: int or tuple of int
+        :type padding: int or tuple of int
+        :type weights: numpy.ndarray
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        super().__init__()
+        for name, value, least in (('kernel', kernel, 1), ('stride', stride, 1), ('padding', padding, 0)):
+            values = (value,) if InstanceGuard(int).is_valid(value) else value
+            if not IterableGuard(int).is_valid(values) or not 1 <= len(values) <= 3 or \
+                    any(axis < least for axis in values):
+                raise IllegalArgumentException(
+                    "{}.{} must be one or up to three integers of at least {}".format(
+                        self.__class__.__name__, name, least
+                    )
+                )
+        self.kernel = kernel
+        self.stride = stride
+        self.padding = padding
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+
+    @staticmethod
+    def _axes(value, dimensions):
+        return (value,) * dimensions if isinstance(value, int) else tuple(value)
+
+    @staticmethod
+    def grid(population):
+        """
+        :param population: A population connected by this type.
+
+        :type population: cerebro.models.population.Population
+
+        :returns: Shape of the grid of the population, a line if it has no shape.
+
+        :rtype: tuple of int
+        """
+        return population.shape if population.shape is not None else (population.size,)
+
+    def kernel_shape(self, pre):
+        """
+        :param pre: Pre-synaptic population.
+
+        :type pre: cerebro.models.population.Population
+
+        :returns: Number of taps along each axis.
+
+        :rtype: tuple of int
+        """
+        return self._axes(self.kernel, len(self.grid(pre)))
+
+    def output_shape(self, pre):
+        """
+        :param pre: Pre-synaptic population.
+
+        :type pre: cerebro.models.population.Population
+
+        :returns: Shape the post-synaptic population must have, `None` if the arguments do not fit the grid of `pre`.
+
+        :rtype: tuple of int
+        """
+        shape = self.grid(pre)
+        dimensions = len(shape)
+        kernel, stride, padding = (self._axes(value, dimensions) for value in (self.kernel, self.stride, self.padding))
+        if not len(kernel) == len(stride) == len(padding) == dimensions:
+            return None
+        output = tuple((size + 2 * pad - taps) // step + 1
+                       for size, taps, step, pad in zip(shape, kernel, stride, padding))
+        return output if all(size > 0 for size in output) else None
+
+    def get_c_definition(self, connection, parameters=None):
+        """
+        :param connection: An object of the connection this type is applied to.
+        :param parameters: Runtime parameter block to read the arguments from, `None` to paste them as literals. The
+            arguments shape the generated code, so they are always pasted as literals.
+
+        :type connection: cerebro.models.Connection
+        :type parameters: cerebro.code_generation.parameters.ParameterBlock
+        """
+        dimensions = len(self.grid(connection.pre))
+        kernel, stride, padding = (
+            ', '.join(str(axis) for axis in self._axes(value, dimensions))
+            for value in (self.kernel, self.stride, self.padding)
+        )
+        weights = '' if self.weights is None else ', '.join(repr(float(value)) for value in self.weights.flat)
+        return f"Convolution(" \
+               f"{ self.geometry(connection.pre) }, { self.geometry(connection.post) }, " \
+               f"{{{ kernel }}}, {{{ stride }}}, {{{ padding }}}, " \
+               f"{{{ weights }}})"
@@ -0,0 +1,384 @@
+"""Module containing classes to record variables of a population or a connection and to watch them live.
+
+*Classes*:
+
+* **Monitor**:
+    Base class to record variables of a population or a connection during simulation.
+* **SpikeMonitor**:
+    Records the spikes of a population as a list of events during simulation.
+* **LivePlot**:
+    Simulation callback plotting the records of a monitor while the network runs.
+"""
+
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.globals import DEFAULT_MONITOR_CAPACITY, DEFAULT_SPIKE_MONITOR_CAPACITY
+from cerebro.parameter_guards import InstanceGuard, IterableGuard
+
+
+class Monitor:
+    """
+    Base class to record variables of a population or a connection during simulation.
+
+    Only the requested variables are recorded, and only for the requested ranks every `interval` steps. Records are
+    kept in a buffer of `capacity` records allocated when the network is initialized; once it is full, the oldest
+    records are overwritten. Records are read as arrays viewing that buffer, so they are copied only once the buffer
+    has wrapped around and has to be reordered.
+    """
+    def __init__(self, owner, variables, ranks=None, interval=1, capacity=DEFAULT_MONITOR_CAPACITY):
+        """
+        :param owner: The population or connection whose variables are recorded.
+        :param variables: Names of the variables to be recorded.
+        :param ranks: Neurons to be recorded. For a connection, the synapses of these post-synaptic neurons are
+            recorded. `None` records all of them.
+        :param interval: Number of steps between two records.
+        :param capacity: Number of records kept.
+
+        :type owner: cerebro.models.population.Population or cerebro.models.connection.Connection
+        :type variables: list of str
+        :type ranks: list of int
+        :type interval: int
+        :type capacity: int
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        if isinstance(variables, str):
+            variables = [variables]
+
+        # parameter validation
+        if not IterableGuard(str).is_valid(variables) or not variables:
+            raise IllegalArgumentException(self.__class__.__name__ + ".variables must be a non-empty list of str")
+        if ranks is not None and not IterableGuard((int, np.integer)).is_valid(ranks):
+            raise IllegalArgumentException(self.__class__.__name__ + ".ranks must be an iterable of int")
+        if not InstanceGuard(int).is_valid(interval) or interval < 1:
+            raise IllegalArgumentException(self.__class__.__name__ + ".interval must be a positive integer")
+        if not InstanceGuard(int).is_valid(capacity) or capacity < 1:
+            raise IllegalArgumentException(self.__class__.__name__ + ".capacity must be a positive integer")
+
+        self.owner = owner
+        self.variables = list(dict.fromkeys(variables))
+        self.ranks = [int(rank) for rank in ranks] if ranks is not None else None
+        self.interval = interval
+        self.capacity = capacity
+        self.id = len(owner.monitors)
+
+    def __repr__(self):
+        return '{}({}, variables={}, interval={}, capacity={})'.format(
+            self.__class__.__name__, self.owner.__class__.__name__, self.variables, self.interval, self.capacity
+        )
+
+    def _wrapper_function(self, name):
+        if self.owner.wrapper is None:
+            raise IllegalStateException("network of the monitor is not compiled")
+        return getattr(self.owner.wrapper, name.format(id=self.id))
+
+    def configure(self):
+        """Passes ranks, interval and capacity to the compiled network. Takes effect when the network is initialized.
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        self._wrapper_function('configure_monitor{id}')(
+            self.ranks if self.ranks is not None else [], self.interval, self.capacity
+        )
+
+    def _ordered(self, records):
+        count = self._wrapper_function('get_monitor{id}_count')()
+        if count <= len(records):
+            return records[:count]
+        start = count % len(records)
+        return np.concatenate((records[start:], records[:start]))
+
+    @property
+    def steps(self):
+        """
+        :returns: Steps of the kept records, oldest first.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        return self._ordered(self._wrapper_function('get_monitor{id}_steps')())
+
+    def get(self, variable):
+        """
+        :param variable: Name of a recorded variable.
+
+        :type variable: str
+
+        :returns: Kept records of the variable, one row per record, oldest first.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalArgumentException: If the variable is not recorded by the monitor.
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if variable not in self.variables:
+            raise IllegalArgumentException("variable {} is not recorded by the monitor".format(variable))
+
+        return self._ordered(self._wrapper_function('get_monitor{id}_' + variable)())
+
+    def __getitem__(self, variable):
+        return self.get(variable)
+
+
+class SpikeMonitor:
+    """
+    Records the spikes of a population as a list of events during simulation.
+
+    Every spike of the requested ranks within the requested steps is appended as a (step, rank) pair to two flat int32
+    arrays in the simulator, which start with room for `capacity` spikes and double in size when full, so no spike is
+    dropped and steps without spikes cost nothing. Events are read as arrays viewing these buffers. Buffers that have
+    been outgrown are kept until the network is initialized again, so arrays read before stay valid, but only show the
+    spikes recorded until they were read. Counts, rasters and rates are computed by the simulator.
+    """
+    def __init__(self, population, ranks=None, start=0, stop=None, capacity=DEFAULT_SPIKE_MONITOR_CAPACITY):
+        """
+        :param population: The population whose spikes are recorded.
+        :param ranks: Neurons to be recorded. `None` records all of them.
+        :param start: First step recorded.
+        :param stop: Step the recording stops at, `None` to record until the end.
+        :param capacity: Number of spikes the buffers initially hold.
+
+        :type population: cerebro.models.population.Population
+        :type ranks: list of int
+        :type start: int
+        :type stop: int
+        :type capacity: int
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        # parameter validation
+        if ranks is not None and not IterableGuard((int, np.integer)).is_valid(ranks):
+            raise IllegalArgumentException(self.__class__.__name__ + ".ranks must be an iterable of int")
+        if not InstanceGuard(int).is_valid(start) or start < 0:
+            raise IllegalArgumentException(self.__class__.__name__ + ".start must be a non-negative integer")
+        if stop is not None and (not InstanceGuard(int).is_valid(stop) or stop < start):
+            raise IllegalArgumentException(self.__class__.__name__ + ".stop must be an integer not less than start")
+        if not InstanceGuard(int).is_valid(capacity) or capacity < 1:
+            raise IllegalArgumentException(self.__class__.__name__ + ".capacity must be a positive integer")
+
+        self.owner = population
+        self.ranks = sorted({int(rank) for rank in ranks}) if ranks is not None else None
+        self.start = start
+        self.stop = stop
+        self.capacity = capacity
+        self.id = len(population.spike_monitors)
+
+    def __repr__(self):
+        return '{}({}, start={}, stop={}, capacity={})'.format(
+            self.__class__.__name__, self.owner.__class__.__name__, self.start, self.stop, self.capacity
+        )
+
+    def _wrapper_function(self, name):
+        if self.owner.wrapper is None:
+            raise IllegalStateException("network of the monitor is not compiled")
+        return getattr(self.owner.wrapper, name.format(id=self.id))
+
+    def configure(self):
+        """Passes ranks, steps and capacity to the compiled network. Takes effect when the network is initialized.
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        self._wrapper_function('configure_spike_monitor{id}')(
+            self.ranks if self.ranks is not None else [], self.start, self.stop if self.stop is not None else -1,
+            self.capacity
+        )
+
+    @property
+    def steps(self):
+        """
+        :returns: Steps of the recorded spikes, in the order they were fired.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        return self._wrapper_function('get_spike_monitor{id}_steps')()
+
+    @property
+    def spike_ranks(self):
+        """
+        :returns: Ranks of the neurons of the recorded spikes, in the order they were fired.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        return self._wrapper_function('get_spike_monitor{id}_ranks')()
+
+    def counts(self):
+        """
+        :returns: Number of recorded spikes of every neuron of the population.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        return self._wrapper_function('get_spike_monitor{id}_counts')()
+
+    def _bins(self, bin, first, last):
+        if not InstanceGuard(int).is_valid(bin) or bin < 1:
+            raise IllegalArgumentException(self.__class__.__name__ + " bin must be a positive integer")
+        first = self.start if first is None else first
+        if last is None and self.stop is not None:
+            last = self.stop
+        elif last is None:
+            steps = self.steps
+            last = int(steps[-1]) + 1 if len(steps) else first
+        return first, max(-(-(last - first) // bin), 0)
+
+    def raster(self, bin=1, first=None, last=None):
+        """
+        :param bin: Number of steps of a bin.
+        :param first: First step of the first bin, `None` for the first recorded step.
+        :param last: Step the last bin ends at, `None` for the step the recording stops at or the last recorded spike.
+
+        :type bin: int
+        :type first: int
+        :type last: int
+
+        :returns: Number of recorded spikes of every neuron in every bin, one row of bins per neuron.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        first, bins = self._bins(bin, first, last)
+        return self._wrapper_function('get_spike_monitor{id}_raster')(first, bin, bins)
+
+    def rates(self, bin, first=None, last=None):
+        """
+        :param bin: Number of steps of a bin.
+        :param first: First step of the first bin, `None` for the first recorded step.
+        :param last: Step the last bin ends at, `None` for the step the recording stops at or the last recorded spike.
+
+        :type bin: int
+        :type first: int
+        :type last: int
+
+        :returns: Mean firing rate of the recorded neurons in Hz in every bin.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        first, bins = self._bins(bin, first, last)
+        neurons = len([rank for rank in self.ranks if 0 <= rank < self.owner.size]) if self.ranks is not None else \
+            self.owner.size
+        return self._wrapper_function('get_spike_monitor{id}_rates')(neurons, first, bin, bins)
+
+
+def _draw(figure, axes, variable, steps, values):
+    axes.clear()
+    axes.plot(steps, values)
+    axes.set_xlabel('step')
+    axes.set_ylabel(variable)
+    figure.canvas.draw_idle()
+    figure.canvas.flush_events()
+
+
+def _plot_process(snapshots, variable):
+    import matplotlib.pyplot as plt
+
+    plt.ion()
+    figure, axes = plt.subplots()
+    while True:
+        snapshot = snapshots.get()
+        if snapshot is None:
+            break
+        _draw(figure, axes, variable, *snapshot)
+        plt.pause(0.001)
+    plt.close(figure)
+
+
+class LivePlot:
+    """
+    Simulation callback plotting the records of a monitor while the network runs.
+
+    Pass it as `callback` of `Network.simulate`. Figures are redrawn at most once per `period` seconds, however often
+    the callback fires. In asynchronous mode, a separate process draws the figure and the callback only hands it a
+    copy of the records, dropping it if the process is still busy, so plotting never holds the simulation back.
+    """
+    def __init__(self, monitor, variable, period=0.5, asynchronous=False):
+        """
+        :param monitor: The monitor whose records are plotted.
+        :param variable: Name of the plotted variable.
+        :param period: Least number of seconds between two redraws.
+        :param asynchronous: If true, the figure is drawn by a separate process.
+
+        :type monitor: cerebro.models.monitor.Monitor
+        :type variable: str
+        :type period: float
+        :type asynchronous: bool
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        if not InstanceGuard(Monitor).is_valid(monitor):
+            raise IllegalArgumentException(self.__class__.__name__ + ".monitor must be a " + Monitor.__name__)
+        if variable not in monitor.variables:
+            raise IllegalArgumentException("variable {} is not recorded by the monitor".format(variable))
+
+        self.monitor = monitor
+        self.variable = variable
+        self.period = period
+        self.asynchronous = asynchronous
+
+        self._last_draw = None
+        self._figure = None
+        self._axes = None
+        self._snapshots = None
+        self._process = None
+
+    def __call__(self, network):
+        """Redraws the figure unless it has been drawn within the last `period` seconds.
+
+        :param network: The simulated network.
+
+        :type network: cerebro.models.network.Network
+        """
+        now = time.monotonic()
+        if self._last_draw is not None and now - self._last_draw < self.period:
+            return
+        self._last_draw = now
+
+        steps, values = self.monitor.steps, self.monitor.get(self.variable)
+        if self.asynchronous:
+            self._send(np.array(steps), np.array(values))
+        else:
+            self._show(steps, values)
+
+    def _show(self, steps, values):
+        if self._figure is None:
+            import matplotlib.pyplot as plt
+            plt.ion()
+            self._figure, self._axes = plt.subplots()
+        _draw(self._figure, self._axes, self.variable, steps, values)
+
+    def _send(self, steps, values):
+        if self._process is None:
+            context = multiprocessing.get_context('spawn')
+            self._snapshots = context.Queue(maxsize=1)
+            self._process = context.Process(target=_plot_process, args=(self._snapshots, self.variable), daemon=True)
+            self._process.start()
+        try:
+            self._snapshots.put_nowait((steps, values))
+        except queue.Full:
+            pass
+
+    def close(self):
+        """Stops the plotting process of asynchronous mode."""
+        if self._process is None:
+            return
+        try:
+            self._snapshots.put(None, timeout=self.period)
+        except queue.Full:
+            self._process.terminate()
+        self._process.join()
+        self._process = None
@@ -6,12 +6,19 @@
     Base class to build a network.
 """
 
+import math
+import os
+
+import numpy as np
+
 from cerebro.preprocessors import ImagePopulation
-from cerebro.exceptions import IllegalArgumentException
+from cerebro.globals import DEFAULT_SEED, BUILD_PROFILES
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
 from cerebro.models.population import Population
 from cerebro.models.connection import Connection
 from cerebro.compiler.compiler import Compiler
 from cerebro.compiler.parser import VariableParser
+from cerebro.code_generation.parameters import ParameterBlock
 from cerebro.parameter_guards import IterableGuard, InstanceGuard
 
 
@@ -52,34 +59,298 @@ class Network:
 
         self.c_module = None
         self.compiler = None
+        self.parameters = None
+        self.seed = DEFAULT_SEED
         self.id = Network._instance_count
         Network._instance_count += 1
 
     def _bind_c_instances(self):
         for population in self.populations:
             population.wrapper = getattr(self.c_module, 'Population{}Wrapper'.format(population.id))(population.size)
+            if population.spike_source is not None:
+                population.bind()
         for connection in self.connections:
             connection.wrapper = getattr(self.c_module, 'Connection{}Wrapper'.format(connection.id))()
 
-    def compile(self):
+    def _configure_monitors(self):
+        for owner in list(self.populations) + list(self.connections):
+            for monitor in owner.monitors:
+                monitor.configure()
+        for population in self.populations:
+            for monitor in population.spike_monitors:
+                monitor.configure()
+
+    def compile(self, cache=None, parametric=False, seed=None, profile='default', dt=None):
         """Compiles the code and generates the equivalent C++ code.
 
         c_module will be set after compilation and code generation process.
+
+        :param cache: Store of built modules to reuse when the generated code has been built before. `None` uses the
+            default store, `False` always builds from scratch.
+        :param parametric: If true, initial values of variables, connection type arguments and population sizes are
+            read at run time from a parameter block instead of being pasted into the generated code, so they can be
+            changed through `set_parameter` without compiling again.
+        :param seed: Seed of the random numbers drawn by the network, `None` to keep the current seed.
+        :param profile: Build profile of the generated code. `default` optimizes at `-O2` for the host CPU, `debug`
+            builds without optimization and with debug symbols and bounds checks, `release` optimizes at `-O3` with
+            link-time optimization and math functions that neither set `errno` nor trap, and `pgo` builds like
+            `release`, guided by a profile recorded from a short simulation of the network.
+        :param dt: Step size the network is going to be simulated with, required by the `pgo` profile, whose training
+            simulation runs with it.
+
+        :type cache: cerebro.code_generation.cache.BuildCache or bool
+        :type parametric: bool
+        :type seed: int
+        :type profile: str
+        :type dt: float
+
+        :raises IllegalArgumentException: If the profile is not known, or if it is `pgo` and no positive `dt` is given.
         """
+        if profile not in BUILD_PROFILES:
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".compile profile must be one of " + ", ".join(sorted(BUILD_PROFILES))
+            )
+        if profile == 'pgo' and (not InstanceGuard((int, float)).is_valid(dt) or dt <= 0):
+            raise IllegalArgumentException(self.__class__.__name__ + ".compile dt must be a positive number for pgo")
+        if seed is not None:
+            self.seed = seed
+
+        # populations and connections are numbered within the network, so that the generated code, and hence its
+        # cache key, does not depend on how many of them were created before in the process
+        for index, population in enumerate(self.populations):
+            population.id = index
+        for index, connection in enumerate(self.connections):
+            connection.id = index
 
         self.compiler = Compiler(network=self)
         self.compiler.semantic_analyzer()
-        self.c_module = self.compiler.code_gen()
+        self.parameters = ParameterBlock() if parametric else None
+        self.c_module = self.compiler.code_gen(cache=cache, parameters=self.parameters, profile=profile, dt=dt)
+        if self.parameters is not None:
+            self.parameters.bind(self.c_module)
         self._bind_c_instances()
+        self._configure_monitors()
+
+    def get_parameter(self, owner, name):
+        """Returns a runtime parameter of a network compiled in parametric mode.
+
+        :param owner: The network, a population, a connection or a connection type the parameter belongs to.
+        :param name: Name of the parameter, i.e. a variable name, `size` or a connection type argument.
+
+        :type owner: object
+        :type name: str
+
+        :returns: Value of the parameter.
+
+        :rtype: float
+
+        :raises IllegalStateException: If the network is not compiled in parametric mode.
+        """
+        if self.parameters is None:
+            raise IllegalStateException("network is not compiled in parametric mode")
+        return self.parameters.get(owner, name)
+
+    def fixed_size(self, population):
+        """
+        :param population: A population of the network.
+
+        :type population: cerebro.models.population.Population
+
+        :returns: True if the size of the population is fixed at compile time, i.e. if it is laid out on a grid or
+            connected by a convolution, whose generated code depends on the shape of the grid.
+
+        :rtype: bool
+        """
+        return population.shape is not None or any(
+            connection.connection_type.implicit and population in (connection.pre, connection.post)
+            for connection in self.connections
+        )
+
+    def set_parameter(self, owner, name, value):
+        """Sets a runtime parameter of a network compiled in parametric mode.
+
+        The value takes effect on the next initialization, i.e. the next call to `simulate`. The size of a population
+        is a runtime parameter unless it is fixed at compile time, see `fixed_size`.
+
+        :param owner: The network, a population, a connection or a connection type the parameter belongs to.
+        :param name: Name of the parameter, i.e. a variable name, `size` or a connection type argument.
+        :param value: New value of the parameter.
+
+        :type owner: object
+        :type name: str
+        :type value: float
+
+        :raises IllegalStateException: If the network is not compiled in parametric mode.
+        :raises IllegalArgumentException: If the parameter is the size of a population whose size is fixed.
+        """
+        if self.parameters is None:
+            raise IllegalStateException("network is not compiled in parametric mode")
+        if isinstance(owner, Population) and name == 'size' and self.fixed_size(owner):
+            raise IllegalArgumentException(
+                "size of a population laid out on a grid or connected by a convolution is fixed at compile time"
+            )
+        self.parameters.set(owner, name, value)
+        if isinstance(owner, Population) and name == 'size':
+            owner.size = int(value)
+
+    def simulate(self, duration, dt, threads=None, seed=None, callback=None, callback_interval=None):
+        """Initializes the network and simulates it for `duration` time with `dt` step size.
+
+        The whole duration runs inside the compiled module. If a callback is given, the simulation pauses every
+        `callback_interval` to call it, e.g. to plot monitors through a `cerebro.models.monitor.LivePlot`.
+
+        :param duration: Duration of the simulation.
+        :param dt: Step size of the simulation.
+        :param threads: Number of threads updating neurons and synapses, `None` to keep the current setting.
+        :param seed: Seed of the random numbers drawn by the network, `None` to keep the current seed. Runs with
+            the same seed draw the same numbers regardless of the number of threads.
+        :param callback: Function called with the network during simulation, `None` to run without interruption.
+        :param callback_interval: Simulated time between two calls of `callback`, `None` to call it once at the end.
+
+        :type duration: float
+        :type dt: float
+        :type threads: int
+        :type seed: int
+        :type callback: callable
+        :type callback_interval: float
+        """
+        if threads is not None:
+            self.c_module.set_num_threads(threads)
+        if seed is not None:
+            self.seed = seed
+        self.c_module.set_seed(self.seed)
+        self._configure_monitors()
+        for connection in self.connections:
+            connection.wrapper.set_keep_connectivity(connection.state is not None)
+        self.c_module.initialize(dt)
+        for connection in self.connections:
+            if connection.state is not None:
+                connection.wrapper.set_state(connection.state)
+        # spike times are only allocated once the network is initialized, so the first image is presented afterwards
         for pop in self.populations:
             if isinstance(pop, ImagePopulation.ImagePopulation):
-                pop.wrapper.set_tts(pop.intensity_to_latency())
+                pop.rewind()
 
-    def simulate(self, duration, dt):
-        """Simulates the network for `duration` time with `dt` step size."""
-        self.c_module.initialize(dt)
+        self.run(duration, callback=callback, callback_interval=callback_interval)
+
+    def run(self, duration, callback=None, callback_interval=None):
+        """Continues the simulation for `duration` time from its current state, e.g. after `restore_checkpoint`.
+
+        :param duration: Duration of the simulation.
+        :param callback: Function called with the network during simulation, `None` to run without interruption.
+        :param callback_interval: Simulated time between two calls of `callback`, `None` to call it once at the end.
+
+        :type duration: float
+        :type callback: callable
+        :type callback_interval: float
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if self.c_module is None:
+            raise IllegalStateException("network is not compiled")
+        dt = self.c_module.get_dt()
+
+        steps = int(round(duration / dt))
+        streams = [
+            pop for pop in self.populations if isinstance(pop, ImagePopulation.ImagePopulation) and pop.streaming
+        ]
+        if callback is None and not streams:
+            self.c_module.run_wrapper(steps)
+            return
+
+        interval = max(int(round(callback_interval / dt)), 1) if callback_interval is not None else max(steps, 1)
+        # the simulation pauses at every step a callback or a streamed image is due
+        pause = math.gcd(interval, *(pop.presentation_steps for pop in streams)) if streams else interval
+        start = self.c_module.get_time()
+
+        def on_pause():
+            elapsed = self.c_module.get_time() - start
+            for pop in streams:
+                pop.advance(start + elapsed)
+            if callback is not None and (elapsed % interval == 0 or elapsed == steps):
+                callback(self)
+
+        for pop in streams:
+            pop.advance(start)
+        self.c_module.run_wrapper(steps, on_pause, pause)
+
+    def save_checkpoint(self, path):
+        """Writes the state of the simulation to file `path`, so that `restore_checkpoint` can resume it.
+
+        The checkpoint holds time, step size, seed, network variables, variables and spikes of populations, and
+        connectivity, variables and undelivered input of connections; random numbers are keyed by seed and time, so
+        these determine the draws of the resumed run. Records of monitors are not included. The file is an
+        uncompressed `.npz` archive, written to a temporary file first and then moved to `path`.
+
+        :param path: File to write to.
+
+        :type path: str
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if self.c_module is None:
+            raise IllegalStateException("network is not compiled")
+
+        arrays = {
+            't': np.array(self.c_module.get_time()),
+            'dt': np.array(self.c_module.get_dt()),
+            'seed': np.array(self.seed, dtype=np.uint64)
+        }
+        for name, value in self.c_module.get_globals().items():
+            arrays['network/' + name] = np.array(value)
+        for index, population in enumerate(self.populations):
+            for name, array in population.wrapper.get_state().items():
+                arrays['populations/{}/{}'.format(index, name)] = array
+        for index, connection in enumerate(self.connections):
+            for name, array in connection.wrapper.get_state(transient=True).items():
+                arrays['connections/{}/{}'.format(index, name)] = array
+
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temp_path, path)
+
+    def restore_checkpoint(self, path):
+        """Restores the state of the simulation from a file written by `save_checkpoint`; `run` then resumes it.
+
+        The network must be compiled from the same definitions as the network that wrote the checkpoint. Monitors
+        are configured anew and start recording from the restored time.
+
+        :param path: File written by `save_checkpoint`.
+
+        :type path: str
+
+        :raises IllegalArgumentException: If the checkpoint does not match the populations and connections of the
+            network.
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if self.c_module is None:
+            raise IllegalStateException("network is not compiled")
+
+        states = {}
+        with np.load(path) as checkpoint:
+            for key in checkpoint.files:
+                group, _, name = key.rpartition('/')
+                states.setdefault(group, {})[name] = checkpoint[key]
+
+        groups = {'', 'network'} | {'populations/{}'.format(index) for index in range(len(self.populations))} | \
+            {'connections/{}'.format(index) for index in range(len(self.connections))}
+        if set(states) - {'network'} != groups - {'network'}:
+            raise IllegalArgumentException("checkpoint {} does not match the network".format(path))
+
+        self.seed = int(states['']['seed'])
+        self.c_module.set_seed(self.seed)
+        self._configure_monitors()
+        for connection in self.connections:
+            connection.wrapper.set_keep_connectivity(True)
+        self.c_module.initialize(float(states['']['dt']))
 
-        self.c_module.run_wrapper(duration / self.c_module.get_dt())
+        self.c_module.set_time(int(states['']['t']))
+        self.c_module.set_globals(states.get('network', {}))
+        for index, population in enumerate(self.populations):
+            population.wrapper.set_state(states['populations/{}'.format(index)])
+        for index, connection in enumerate(self.connections):
+            connection.wrapper.set_state(states['connections/{}'.format(index)])
 
     def __hash__(self):
         return hash('network.{}'.format(self.id))
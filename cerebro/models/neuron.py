@@ -10,6 +10,7 @@
 from cerebro.compiler.parser import VariableParser, EquationParser
 from cerebro.parameter_guards import InstanceGuard
 from cerebro.exceptions import IllegalArgumentException
+from cerebro.globals import ODE_METHODS
 
 
 class Neuron:
@@ -17,7 +18,7 @@ class Neuron:
     Base class to define a neuron.
     """
 
-    def __init__(self, variables='', equations='', spike='', reset=''):
+    def __init__(self, variables='', equations='', spike='', reset='', method=None):
         """
         :param variables: A multi-line string, each line of which defines a variable. Template for each variable
             definition is as follows: name_of_variable = initial_value [: constraint_list] where "constraint_list" can
@@ -40,11 +41,15 @@ class Neuron:
             should be placed on left hand side and the rest is placed on right hand side.
         :param spike: A string containing spike condition of the neuron.
         :param reset: A multi-line string indicating equations by which variables should change after neuron resets.
+        :param method: Method by which the ODEs are integrated, one of `exact`, `euler`, `exponential_euler`, `rk2` or
+            `rk4`. `exact` solves linear ODEs whose coefficients are shared by all neurons in closed form and accepts
+            no other ODEs. `None` solves such ODEs in closed form and integrates others by `euler`.
 
         :type variables: str
         :type equations: str
         :type spike: str
         :type reset: str
+        :type method: str
 
         :raises IllegalArgumentException: If arguments are not of appropriate type.
         """
@@ -58,6 +63,10 @@ class Neuron:
             raise IllegalArgumentException(self.__class__.__name__ + ".spike must be a string")
         if not InstanceGuard(str).is_valid(reset):
             raise IllegalArgumentException(self.__class__.__name__ + ".reset must be a string")
+        if method is not None and method not in ODE_METHODS:
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".method must be one of " + ", ".join(sorted(ODE_METHODS))
+            )
 
         if isinstance(variables, str):
             self.variables = VariableParser.from_lines(variables)
@@ -66,6 +75,7 @@ class Neuron:
         self.equations = EquationParser.from_lines(equations)
         self.spike = spike
         self.reset = EquationParser.from_lines(reset)
+        self.method = method
 
     def __repr__(self):
         return self.__class__.__name__ + """(
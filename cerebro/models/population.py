@@ -6,9 +6,13 @@
     Base class to define a population of neurons.
 """
 
-from cerebro.exceptions import IllegalArgumentException
+import numpy as np
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
 from cerebro.models.neuron import Neuron
-from cerebro.parameter_guards import InstanceGuard
+from cerebro.models.monitor import Monitor, SpikeMonitor
+from cerebro.globals import DEFAULT_MONITOR_CAPACITY, DEFAULT_SPIKE_MONITOR_CAPACITY
+from cerebro.parameter_guards import InstanceGuard, IterableGuard
 
 
 class Population:
@@ -16,14 +20,21 @@ class Population:
     Base class to define a population of neurons.
     """
     _instance_count = 0
+    # how the neurons fire instead of following their neuron model, `None` if they follow it
+    spike_source = None
 
-    def __init__(self, size, neuron):
+    def __init__(self, size, neuron, shape=None, spacing=1.0):
         """
         :param size: An integer denoting size of the population, i.e. number of neurons in the population.
         :param neuron: A Neuron object which constructs the population.
+        :param shape: Grid of up to three axes the neurons are laid out on in row-major order, `None` for a line.
+            The product of the axes must equal `size`.
+        :param spacing: Distance between neighbouring neurons, either one for all axes or one per axis.
 
         :type size: int
         :type neuron: cerebro.models.neuron.Neuron
+        :type shape: tuple of int
+        :type spacing: float or tuple of float
 
         :raises IllegalArgumentException: If arguments are not of appropriate type.
         """
@@ -33,13 +44,91 @@ class Population:
             raise IllegalArgumentException(self.__class__.__name__ + ".size must be an integer")
         if not InstanceGuard(Neuron).is_valid(neuron):
             raise IllegalArgumentException(self.__class__.__name__ + ".neuron must be a " + Neuron.__name__)
+        if shape is not None and (not IterableGuard(int).is_valid(shape) or not 1 <= len(shape) <= 3 or
+                                  any(axis < 1 for axis in shape) or int(np.prod(shape)) != size):
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".shape must be up to three positive integers whose product is size"
+            )
+        spacing = tuple(spacing) if IterableGuard((int, float)).is_valid(spacing) else \
+            (spacing,) * (len(shape) if shape is not None else 1)
+        if not IterableGuard((int, float)).is_valid(spacing) or any(step <= 0 for step in spacing) or \
+                len(spacing) != (len(shape) if shape is not None else 1):
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".spacing must be a positive number or one positive number per axis"
+            )
 
         self.size = size
         self.neuron = neuron
+        self.shape = tuple(shape) if shape is not None else None
+        self.spacing = tuple(float(step) for step in spacing)
         self.wrapper = None
+        self.monitors = []
+        self.spike_monitors = []
         self.id = Population._instance_count
         Population._instance_count += 1
 
+    def monitor(self, variables, ranks=None, interval=1, capacity=DEFAULT_MONITOR_CAPACITY):
+        """Records variables of the population during simulation; must be called before the network is compiled.
+
+        :param variables: Names of the variables to be recorded.
+        :param ranks: Neurons to be recorded. `None` records all of them.
+        :param interval: Number of steps between two records.
+        :param capacity: Number of records kept; once exceeded, the oldest records are overwritten.
+
+        :type variables: list of str
+        :type ranks: list of int
+        :type interval: int
+        :type capacity: int
+
+        :returns: The monitor, through which the records are read.
+
+        :rtype: cerebro.models.monitor.Monitor
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        :raises IllegalStateException: If the network is already compiled.
+        """
+        if self.wrapper is not None:
+            raise IllegalStateException("monitors must be added before the network is compiled")
+        monitor = Monitor(self, variables, ranks=ranks, interval=interval, capacity=capacity)
+        self.monitors.append(monitor)
+        return monitor
+
+    def spike_monitor(self, ranks=None, start=0, stop=None, capacity=DEFAULT_SPIKE_MONITOR_CAPACITY):
+        """Records the spikes of the population during simulation; must be called before the network is compiled.
+
+        :param ranks: Neurons to be recorded. `None` records all of them.
+        :param start: First step recorded.
+        :param stop: Step the recording stops at, `None` to record until the end.
+        :param capacity: Number of spikes the buffers initially hold; they grow as needed.
+
+        :type ranks: list of int
+        :type start: int
+        :type stop: int
+        :type capacity: int
+
+        :returns: The monitor, through which the spikes are read.
+
+        :rtype: cerebro.models.monitor.SpikeMonitor
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        :raises IllegalStateException: If the network is already compiled.
+        """
+        if self.wrapper is not None:
+            raise IllegalStateException("monitors must be added before the network is compiled")
+        monitor = SpikeMonitor(self, ranks=ranks, start=start, stop=stop, capacity=capacity)
+        self.spike_monitors.append(monitor)
+        return monitor
+
+    def positions(self):
+        """
+        :returns: Coordinates of the neurons, one row per neuron in rank order.
+
+        :rtype: numpy.ndarray
+        """
+        shape = self.shape if self.shape is not None else (self.size,)
+        grid = np.indices(shape).reshape(len(shape), -1).T
+        return grid * np.array(self.spacing)
+
     def __repr__(self):
         return self.__class__.__name__ + """(
                 Size:
@@ -59,6 +148,3 @@ class Population:
             raise AttributeError('object {} has no attribute \'{}\''.format(self.__class__.__name__, item))
 
         return getattr(self.wrapper, 'get_{}'.format(item))()
-
-    def __hash__(self):
-        return hash('population.{}'.format(self.id))
@@ -0,0 +1,168 @@
+"""Module containing populations whose neurons fire input spikes instead of following a neuron model.
+
+*Classes*:
+
+* **SpikeSourcePopulation**:
+    Population whose neurons fire at given steps instead of following a neuron model.
+* **PoissonPopulation**:
+    Population whose neurons fire as Poisson processes of given rates instead of following a neuron model.
+"""
+
+import numpy as np
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models.neuron import Neuron
+from cerebro.models.population import Population
+
+
+class SpikeSourcePopulation(Population):
+    """
+    Population whose neurons fire at given steps instead of following a neuron model.
+
+    Spikes are kept as events sorted by step. The simulator keeps a cursor on the first event that is not yet emitted,
+    so every step only visits the spikes it emits, and costs in proportion to the number of events rather than the size
+    of the population. Input of connections the population is the post-synaptic population of is ignored.
+    """
+    spike_source = 'events'
+
+    def __init__(self, size, spikes=None, shape=None, spacing=1.0):
+        """
+        :param size: An integer denoting size of the population, i.e. number of neurons in the population.
+        :param spikes: Spikes of the neurons, as accepted by `set_spikes`, `None` for no spikes.
+        :param shape: Grid of up to three axes the neurons are laid out on in row-major order, `None` for a line.
+            The product of the axes must equal `size`.
+        :param spacing: Distance between neighbouring neurons, either one for all axes or one per axis.
+
+        :type size: int
+        :type spikes: tuple or list
+        :type shape: tuple of int
+        :type spacing: float or tuple of float
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        super().__init__(size, Neuron(), shape=shape, spacing=spacing)
+        self.steps = np.empty(0, dtype=np.int_)
+        self.ranks = np.empty(0, dtype=np.intc)
+        if spikes is not None:
+            self.set_spikes(spikes)
+
+    def set_spikes(self, spikes):
+        """Replaces the spikes of the population. Once the network is compiled, the spikes are passed to the simulator,
+        which emits those from its current step on.
+
+        :param spikes: Either a tuple of two arrays `(steps, ranks)`, neuron `ranks[k]` firing at step `steps[k]`, in
+            any order, or a list of one array of steps per neuron.
+
+        :type spikes: tuple or list
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        if isinstance(spikes, tuple):
+            if len(spikes) != 2:
+                raise IllegalArgumentException(self.__class__.__name__ + ".spikes must be a pair (steps, ranks)")
+            steps, ranks = (np.asarray(array).ravel() for array in spikes)
+        else:
+            trains = [np.asarray(train).ravel() for train in spikes]
+            if len(trains) != self.size:
+                raise IllegalArgumentException(self.__class__.__name__ + ".spikes must have one array per neuron")
+            # empty trains are left out, as their type is not known
+            steps = np.concatenate([train for train in trains if len(train)] or [np.empty(0, dtype=np.int_)])
+            ranks = np.repeat(np.arange(self.size), [len(train) for train in trains])
+
+        if len(steps) != len(ranks):
+            raise IllegalArgumentException(self.__class__.__name__ + ".spikes must have as many steps as ranks")
+        if len(steps) and not (np.issubdtype(steps.dtype, np.integer) and np.issubdtype(ranks.dtype, np.integer)):
+            raise IllegalArgumentException(self.__class__.__name__ + ".spikes must be integer steps and ranks")
+        if len(steps) and (steps.min() < 0 or ranks.min() < 0 or ranks.max() >= self.size):
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".spikes must be non-negative steps of ranks of the population"
+            )
+
+        # sorted by step, then by rank, once each, so that the spikes of a step are emitted in rank order
+        events = np.unique(np.stack((steps.astype(np.int_), ranks.astype(np.int_))), axis=1)
+        self.steps = np.ascontiguousarray(events[0])
+        self.ranks = events[1].astype(np.intc)
+        if self.wrapper is not None:
+            self.bind()
+
+    def bind(self):
+        """Passes the spikes to the compiled network."""
+        self.wrapper.set_events(self.steps, self.ranks)
+
+
+class PoissonPopulation(Population):
+    """
+    Population whose neurons fire as Poisson processes of given rates instead of following a neuron model.
+
+    Rates are given in Hz for time in ms, one row of rates per presentation: presentation `p` starts
+    `p * presentation_steps` steps after the rates are set, and the last one lasts until the rates are set again. Each
+    neuron fires at most once per step, i.e. with probability `1 - exp(-rate * dt / 1000)`. Instead of drawing that
+    probability for every neuron on every step, the simulator draws the number of steps until the next spike of a
+    neuron, which is geometrically distributed, and keeps the neurons in a heap ordered by their next spike. Every step
+    only visits the neurons firing in it, so the cost grows with the number of spikes; when a presentation starts, all
+    neurons are scheduled again. Draws are keyed by seed, step and rank, like the random functions of equations.
+    Input of connections the population is the post-synaptic population of is ignored.
+    """
+    spike_source = 'poisson'
+
+    def __init__(self, size, rates, presentation_steps=None, shape=None, spacing=1.0):
+        """
+        :param size: An integer denoting size of the population, i.e. number of neurons in the population.
+        :param rates: Rates of the neurons, as accepted by `set_rates`.
+        :param presentation_steps: Number of steps of each presentation, as accepted by `set_rates`.
+        :param shape: Grid of up to three axes the neurons are laid out on in row-major order, `None` for a line.
+            The product of the axes must equal `size`.
+        :param spacing: Distance between neighbouring neurons, either one for all axes or one per axis.
+
+        :type size: int
+        :type rates: float or numpy.ndarray
+        :type presentation_steps: int
+        :type shape: tuple of int
+        :type spacing: float or tuple of float
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        super().__init__(size, Neuron(), shape=shape, spacing=spacing)
+        self.rates = None
+        self.presentation_steps = None
+        self.set_rates(rates, presentation_steps)
+
+    def set_rates(self, rates, presentation_steps=None):
+        """Replaces the rates of the population. Once the network is compiled, the presentations start over from the
+        current step and all neurons are scheduled again.
+
+        :param rates: Either one rate for all neurons, one rate per neuron, or an array of shape (presentations, size)
+            holding the rates of every presentation.
+        :param presentation_steps: Number of steps of each presentation, required for more than one presentation.
+
+        :type rates: float or numpy.ndarray
+        :type presentation_steps: int
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type.
+        """
+        rates = np.asarray(rates, dtype=np.double)
+        if rates.ndim == 0:
+            rates = np.full((1, self.size), float(rates))
+        elif rates.ndim == 1:
+            rates = rates[np.newaxis]
+        if rates.ndim != 2 or rates.shape[1] != self.size or not len(rates):
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".rates must be a rate, one rate per neuron or rows of rates of presentations"
+            )
+        if not np.all(np.isfinite(rates)) or np.any(rates < 0):
+            raise IllegalArgumentException(self.__class__.__name__ + ".rates must be non-negative")
+        if presentation_steps is None and len(rates) > 1:
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".presentation_steps must be given for more than one presentation"
+            )
+        if presentation_steps is not None and (not isinstance(presentation_steps, int) or presentation_steps < 1):
+            raise IllegalArgumentException(self.__class__.__name__ + ".presentation_steps must be a positive integer")
+
+        self.rates = np.ascontiguousarray(rates)
+        self.presentation_steps = presentation_steps
+        if self.wrapper is not None:
+            self.bind()
+
+    def bind(self):
+        """Passes the rates to the compiled network, which starts the presentations over from its current step."""
+        self.wrapper.set_rates(self.rates.ravel(), self.presentation_steps or 0)
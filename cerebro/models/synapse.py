@@ -7,6 +7,7 @@
 """
 
 from cerebro.exceptions import IllegalArgumentException
+from cerebro.globals import ODE_METHODS
 from cerebro.parameter_guards import InstanceGuard
 from cerebro.compiler.parser import VariableParser, EquationParser
 
@@ -16,7 +17,7 @@ class Synapse:
     Base class to define a synapse.
     """
 
-    def __init__(self, variables='', equations='', pre_spike='', post_spike=''):
+    def __init__(self, variables='', equations='', pre_spike='', post_spike='', method=None):
         """
         :param variables: A multi-line string, each line of which defines a variable. Template for each variable
             definition is as follows: name_of_variable = initial_value [: constraint_list] where "constraint_list" can
@@ -36,9 +37,13 @@ class Synapse:
             the equation and everything else should be placed on the right hand side. In case of a normal equation,
             the variable value of which is meant to be changed should be placed on left hand side and the rest is
             placed on right hand side.
+        :param method: Method by which the ODEs are integrated, one of `exact`, `euler`, `exponential_euler`, `rk2` or
+            `rk4`. `exact` solves linear ODEs whose coefficients are shared by all synapses in closed form and accepts
+            no other ODEs. `None` solves such ODEs in closed form and integrates others by `euler`.
 
         :type variables: str
         :type equations: str
+        :type method: str
 
         :raises IllegalArgumentException: If arguments are not of appropriate type.
         """
@@ -52,6 +57,10 @@ class Synapse:
             raise IllegalArgumentException(self.__class__.__name__ + ".pre_spike must be a string")
         if not InstanceGuard(str).is_valid(post_spike):
             raise IllegalArgumentException(self.__class__.__name__ + ".post_spike must be a string")
+        if method is not None and method not in ODE_METHODS:
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".method must be one of " + ", ".join(sorted(ODE_METHODS))
+            )
 
         if isinstance(variables, str):
             self.variables = VariableParser.from_lines(variables)
@@ -60,6 +69,7 @@ class Synapse:
         self.equations = EquationParser.from_lines(equations)
         self.pre_spike = EquationParser.from_lines(pre_spike)
         self.post_spike = EquationParser.from_lines(post_spike)
+        self.method = method
 
     def __repr__(self):
         return self.__class__.__name__ + """(
@@ -1,18 +1,84 @@
-import cv2
+"""Module containing a population encoding images into spike times.
+
+*Classes*:
+
+* **ImagePopulation**:
+    Population whose neurons fire once per presented image, at latencies encoding filtered pixel intensities.
+"""
+
 import glob
+import math
+import os
 
+import cv2
 import numpy
 
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
 from cerebro.models import Neuron
 from cerebro.models import Population
+from cerebro.preprocessors.ImageStream import ImageStream
 
 
 class ImagePopulation(Population):
+    """
+    Population whose neurons fire once per presented image, at latencies encoding filtered pixel intensities.
 
+    Images are loaded in grayscale, resized to squares and stacked into one array, which the filter bank, i.e. a
+    difference of Gaussians or one Gabor kernel per orientation, and the coding scheme process as a whole. The
+    population has one neuron per pixel and filter, laid out on a (filters, side, side) grid, or a (side, side) grid for
+    a single filter. A neuron fires `tts` steps after `base_time`:
+
+    * **intensity_to_latency**: responses are saturated to [0, 255] and stronger responses fire earlier, at
+      `255 - response`.
+    * **rank_order**: neurons fire one after another, in decreasing order of response.
+
+    By default, all images are loaded and encoded when the population is created, and `present` selects the image the
+    population fires. In stream mode, images are only listed when the simulation starts: an `ImageStream` loads,
+    filters and encodes them in the background, a few images ahead, and the network presents them one after another,
+    one every `presentation_steps` steps of simulated time. Datasets larger than memory can be presented this way.
+    """
     image_type = ["jpg", "png"]
-    image_list = []
+    coding_schemes = ["intensity_to_latency", "rank_order"]
+    # number of images filtered at once, which bounds the memory of the batched transforms
+    batch_size = 64
+
+    def __init__(self, size, path, filter_type, coding_scheme="intensity_to_latency", stream=False,
+                 presentation_steps=None, prefetch=16, workers=1, **filter_params):
+        """
+        :param size: Number of neurons, i.e. the number of filters times the number of pixels of a resized image.
+        :param path: An image file, or a directory whose images are loaded.
+        :param filter_type: Either `DoG` or `Gabor`.
+        :param coding_scheme: One of `coding_schemes`.
+        :param stream: If true, images are streamed while the network runs instead of being loaded at once.
+        :param presentation_steps: Number of steps each streamed image is presented for, `None` for one step more than
+            the longest spike time of the coding scheme.
+        :param prefetch: Number of streamed images encoded ahead of the simulation.
+        :param workers: Number of threads decoding streamed images.
+        :param filter_params: Arguments of `dog_kernels` or `gabor_kernels`.
+
+        :type size: int
+        :type path: str
+        :type filter_type: str
+        :type coding_scheme: str
+        :type stream: bool
+        :type presentation_steps: int
+        :type prefetch: int
+        :type workers: int
+
+        :raises IllegalArgumentException: If arguments are not of appropriate type, or no square image of `size`
+            neurons fits the filters.
+        """
+        if coding_scheme not in ImagePopulation.coding_schemes:
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".coding_scheme must be one of " + ", ".join(ImagePopulation.coding_schemes)
+            )
+        self.kernels = self.filter_bank(filter_type, **filter_params)
+        side = math.isqrt(size // len(self.kernels)) if isinstance(size, int) and size > 0 else 0
+        if side * side * len(self.kernels) != size:
+            raise IllegalArgumentException(
+                self.__class__.__name__ + ".size must be the number of filters times a square number of pixels"
+            )
 
-    def __init__(self, size, path, filter_type, coding_scheme="intensity_to_latency", **filter_params):
         self.neuron = Neuron(
             variables="""
                 tts = 0 : local
@@ -20,75 +86,287 @@ class ImagePopulation(Population):
             """,
             spike="((base_time + tts) >= t) & ((base_time + tts) <= t)",
         )
-        super().__init__(size, self.neuron)
-        self.set_image(path)
-        self.filtered_image_list = self.apply_filter(filter_type, **filter_params)
+        shape = (side, side) if len(self.kernels) == 1 else (len(self.kernels), side, side)
+        super().__init__(size, self.neuron, shape=shape)
+        if presentation_steps is None:
+            presentation_steps = size if coding_scheme == "rank_order" else 256
+        for name, value in (("presentation_steps", presentation_steps), ("prefetch", prefetch), ("workers", workers)):
+            if not isinstance(value, int) or value < 1:
+                raise IllegalArgumentException(self.__class__.__name__ + "." + name + " must be a positive integer")
+        self.side = side
         self.coding_scheme = coding_scheme
+        self.streaming = stream
+        self.presentation_steps = presentation_steps
+        self.prefetch = prefetch
+        self.workers = workers
+        self.paths = []
+        self.stream = None
+        self._next_presentation = None
+
+        self.images = numpy.empty((0, side, side), dtype=numpy.float32)
+        self.filtered_images = numpy.empty((0, len(self.kernels), side, side), dtype=numpy.float32)
+        self.set_image(path)
 
     def load_image(self, name):
-        try:
-            img = cv2.imread(name, cv2.IMREAD_GRAYSCALE)
-        except Exception:
-            raise Exception("there is no image")
+        """
+        :param name: Path of an image file.
 
-        img = cv2.resize(img, (self.size // 2, self.size // 2))
+        :type name: str
 
-        return img
+        :returns: The image in grayscale, resized to `side` x `side` pixels.
 
-    def set_image(self, path):
-        name = path.split('/')[-1]
-        if '.' in name:
-            self.image_list.append(self.load_image(name))
+        :rtype: numpy.ndarray
+
+        :raises IllegalArgumentException: If the file is not a readable image.
+        """
+        img = cv2.imread(name, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise IllegalArgumentException("there is no image at " + name)
+
+        return cv2.resize(img, (self.side, self.side), interpolation=cv2.INTER_AREA)
+
+    def image_names(self, path):
+        """
+        :param path: An image file or a directory.
+
+        :type path: str
+
+        :returns: The file, or the images of the directory in alphabetical order.
+
+        :rtype: list of str
+
+        :raises IllegalArgumentException: If no image is found.
+        """
+        if os.path.isfile(path):
+            names = [path]
         else:
-            for j in self.image_type:
-                for i in glob.glob(path + "/*." + j):
-                    self.image_list.append(self.load_image(i))
+            names = sorted(
+                name for extension in self.image_type for name in glob.glob(os.path.join(path, "*." + extension))
+            )
+        if not names:
+            raise IllegalArgumentException("there is no image at " + path)
+        return names
+
+    def set_image(self, path):
+        """Loads an image file, or all images of a directory, appends them to `images` and filters them. In stream
+        mode, the path is only appended to the streamed `paths`, and read once the simulation starts.
+
+        :param path: An image file or a directory.
+
+        :type path: str
+
+        :raises IllegalArgumentException: If no image is found.
+        """
+        self.paths.append(path)
+        if self.streaming:
+            return
+
+        names = self.image_names(path)
+        images = numpy.stack([self.load_image(name) for name in names]).astype(numpy.float32)
+        self.images = numpy.concatenate((self.images, images))
+        self.filtered_images = numpy.concatenate((self.filtered_images, self.apply_filter(images)))
 
-    def apply_filter(self, filter_type, **params):
+    def filter_bank(self, filter_type, **params):
+        """
+        :param filter_type: Either `DoG` or `Gabor`.
+        :param params: Arguments of `dog_kernels` or `gabor_kernels`.
+
+        :type filter_type: str
+
+        :returns: The kernels of the filters, stacked along the first axis.
+
+        :rtype: numpy.ndarray
+
+        :raises IllegalArgumentException: If the filter type is unknown.
+        """
         if filter_type == "Gabor":
-            filtered_image = self.gabor_filter(**params)
-        elif filter_type == "DoG":
-            filtered_image = self.dog_filter(**params)
-        else:
-            raise Exception("wrong filter")
-
-        return filtered_image
-
-    def dog_filter(self, size_of_gaussian_1, size_of_gaussian_2):
-        image_with_dog_list = []
-        for i in self.image_list:
-            dog_img_1 = cv2.GaussianBlur(i, (size_of_gaussian_1, size_of_gaussian_1), 0)
-            dog_img_2 = cv2.GaussianBlur(i, (size_of_gaussian_2, size_of_gaussian_2), 0)
-            image_with_dog_list.append(dog_img_1 - dog_img_2)
-
-        return image_with_dog_list
-
-    def gabor_filter(self, gabor_size, sigma,
-                     theta_list, lambd, gamma, psi, k_type):
-
-        image_with_gabor_list = []
-        for i in self.image_list:
-            for j in theta_list:
-                g_kernel = cv2.getGaborKernel((gabor_size, gabor_size), sigma, j, lambd, gamma, psi, ktype=k_type)
-                image_with_gabor_list.append(cv2.filter2D(i, cv2.CV_8UC3, g_kernel))
-        return image_with_gabor_list
-
-    def intensity_to_latency(self):
-        if self.filtered_image_list is None:
-            raise Exception('no image list exist !')
-        tmp = []
-        for k in range(len(self.filtered_image_list)):
-            for i in range(len(self.filtered_image_list[k])):
-                for j in range(len(self.filtered_image_list[k][i])):
-                    # tmp.append((k, i, j, self.filtered_image_list[k][i][j]))
-                    tmp.append(self.filtered_image_list[k][i][j])
-                    # k is index of pictures
-                    # (i,j) shows location of each point in kth photo
-                    # img_list[k][i][j] shows spike
-
-        # tmp.sort(key=lambda tup: tup[3], reverse=True)
-        # # print(tmp[0][3])
-        # for i in range(len(tmp)):
-        #     tmp[i] = (tmp[i][0], tmp[i][1], tmp[i][2], abs(tmp[i][3] - 255))
-
-        return numpy.asarray(tmp)
+            return self.gabor_kernels(**params)
+        if filter_type == "DoG":
+            return self.dog_kernels(**params)
+        raise IllegalArgumentException(self.__class__.__name__ + ".filter_type must be either DoG or Gabor")
+
+    @staticmethod
+    def dog_kernels(size_of_gaussian_1, size_of_gaussian_2):
+        """
+        :param size_of_gaussian_1: Odd size of the Gaussian kernel the other one is subtracted from.
+        :param size_of_gaussian_2: Odd size of the subtracted Gaussian kernel.
+
+        :type size_of_gaussian_1: int
+        :type size_of_gaussian_2: int
+
+        :returns: The difference of the two Gaussian kernels, as a single filter.
+
+        :rtype: numpy.ndarray
+        """
+        size = max(size_of_gaussian_1, size_of_gaussian_2)
+        kernel = numpy.zeros((size, size), dtype=numpy.float32)
+        for sign, ksize in ((1, size_of_gaussian_1), (-1, size_of_gaussian_2)):
+            gaussian = cv2.getGaussianKernel(ksize, 0).astype(numpy.float32)
+            offset = (size - ksize) // 2
+            kernel[offset:offset + ksize, offset:offset + ksize] += sign * (gaussian @ gaussian.T)
+        return kernel[numpy.newaxis]
+
+    @staticmethod
+    def gabor_kernels(gabor_size, sigma, theta_list, lambd, gamma, psi, k_type=cv2.CV_32F):
+        """
+        :param gabor_size: Size of the kernels.
+        :param sigma: Standard deviation of the Gaussian envelope.
+        :param theta_list: Orientations of the kernels, one filter each.
+        :param lambd: Wavelength of the sinusoidal factor.
+        :param gamma: Spatial aspect ratio.
+        :param psi: Phase offset.
+        :param k_type: OpenCV type of the kernel coefficients.
+
+        :type gabor_size: int
+        :type sigma: float
+        :type theta_list: list of float
+        :type lambd: float
+        :type gamma: float
+        :type psi: float
+        :type k_type: int
+
+        :returns: The Gabor kernels, one per orientation.
+
+        :rtype: numpy.ndarray
+        """
+        return numpy.stack([
+            cv2.getGaborKernel((gabor_size, gabor_size), sigma, theta, lambd, gamma, psi, ktype=k_type)
+            for theta in theta_list
+        ]).astype(numpy.float32)
+
+    def apply_filter(self, images):
+        """Correlates a stack of images with every kernel of the filter bank at once, in the frequency domain.
+
+        Borders are reflected as in `cv2.filter2D`, and the responses are computed in floating point, so negative and
+        large responses are kept for the coding scheme to handle.
+
+        :param images: Images of shape (images, side, side).
+
+        :type images: numpy.ndarray
+
+        :returns: Responses of shape (images, filters, side, side).
+
+        :rtype: numpy.ndarray
+        """
+        size = self.kernels.shape[-1]
+        before, after = size // 2, size - 1 - size // 2
+        padded_shape = (self.side + size - 1,) * 2
+        # correlation is the convolution with the flipped kernel; the circular convolution of the padded images equals
+        # the linear one away from the first `size - 1` rows and columns, which are dropped
+        kernels = numpy.fft.rfft2(self.kernels[:, ::-1, ::-1], s=padded_shape)
+
+        responses = numpy.empty((len(images), len(self.kernels), self.side, self.side), dtype=numpy.float32)
+        for start in range(0, len(images), self.batch_size):
+            batch = numpy.pad(
+                images[start:start + self.batch_size], ((0, 0), (before, after), (before, after)), mode='reflect'
+            )
+            convolved = numpy.fft.irfft2(numpy.fft.rfft2(batch)[:, numpy.newaxis] * kernels, s=padded_shape)
+            responses[start:start + self.batch_size] = convolved[..., size - 1:, size - 1:]
+        return responses
+
+    def _filtered(self, index):
+        return self.filtered_images if index is None else self.filtered_images[index:index + 1]
+
+    def encode(self, index=None):
+        """
+        :param index: Index of an image in `images`, `None` for all images.
+
+        :type index: int
+
+        :returns: Spike times of the images relative to `base_time`, one row of `size` values per image, in the
+            smallest unsigned type holding them.
+
+        :rtype: numpy.ndarray
+        """
+        return self.encode_responses(self._filtered(index))
+
+    def encode_responses(self, filtered_images, coding_scheme=None):
+        """
+        :param filtered_images: Responses of the filter bank, as returned by `apply_filter`.
+        :param coding_scheme: One of `coding_schemes`, `None` for the scheme of the population.
+
+        :type filtered_images: numpy.ndarray
+        :type coding_scheme: str
+
+        :returns: Spike times of the images relative to `base_time`, one row of `size` values per image, in the
+            smallest unsigned type holding them.
+
+        :rtype: numpy.ndarray
+        """
+        responses = filtered_images.reshape(len(filtered_images), -1)
+        if (coding_scheme or self.coding_scheme) == "rank_order":
+            # stable sort, so that equal responses fire in the order of their ranks
+            order = numpy.argsort(-responses, axis=1, kind='stable')
+            latencies = numpy.empty(responses.shape, dtype=numpy.min_scalar_type(self.size - 1))
+            numpy.put_along_axis(
+                latencies, order, numpy.arange(self.size, dtype=latencies.dtype)[numpy.newaxis], axis=1
+            )
+            return latencies
+        intensities = numpy.clip(numpy.rint(responses), 0, 255).astype(numpy.uint8)
+        return 255 - intensities
+
+    def intensity_to_latency(self, index=None):
+        """
+        :param index: Index of an image in `images`, `None` for all images.
+
+        :type index: int
+
+        :returns: Spike times of the images relative to `base_time`, one row of `size` values per image: responses are
+            saturated to [0, 255] and stronger ones fire earlier.
+
+        :rtype: numpy.ndarray
+        """
+        return self.encode_responses(self._filtered(index), "intensity_to_latency")
+
+    def present(self, index, base_time=0):
+        """Sets the spike times of the compiled population to those of an image.
+
+        :param index: Index of the image in `images`.
+        :param base_time: Step the spike times are relative to.
+
+        :type index: int
+        :type base_time: int
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if self.wrapper is None:
+            raise IllegalStateException("network of the population is not compiled")
+        self.wrapper.set_tts(self.encode(index)[0])
+        self.wrapper.set_base_time(base_time)
+
+    def rewind(self):
+        """Starts the presentation over: presents the first image, or in stream mode, restarts the stream from the
+        first image, which `advance` presents next.
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if not self.streaming:
+            self.present(0)
+            return
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = ImageStream(self, self.paths, prefetch=self.prefetch, workers=self.workers)
+        self._next_presentation = None
+
+    def advance(self, t):
+        """Presents the next streamed image at step `t` if the presentation window of the previous one has ended. Once
+        the stream is exhausted, the population stays silent.
+
+        :param t: Current step of the simulation.
+
+        :type t: int
+
+        :raises IllegalStateException: If the network is not compiled.
+        """
+        if not self.streaming or (self._next_presentation is not None and t < self._next_presentation):
+            return
+        if self.wrapper is None:
+            raise IllegalStateException("network of the population is not compiled")
+        if self.stream is None:
+            self.rewind()
+
+        latencies = next(self.stream, None)
+        if latencies is not None:
+            self.wrapper.set_tts(latencies)
+            self.wrapper.set_base_time(t)
+        self._next_presentation = t + self.presentation_steps
@@ -0,0 +1,112 @@
+"""Module containing the background pipeline streaming the images of a population into spike times.
+
+*Classes*:
+
+* **ImageStream**:
+    Iterator over the spike times of images that are loaded, filtered and encoded ahead of time by a background thread.
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+
+class ImageStream:
+    """
+    Iterator over the spike times of images that are loaded, filtered and encoded ahead of time by a background thread.
+
+    The thread lists the image files of the population's paths, decodes and resizes them by a pool of `workers`
+    threads, filters and encodes them by batches of `population.batch_size` images, and puts the spike times of every
+    image into a queue of `prefetch` images. It blocks while the queue is full, so only a batch and the queue are held
+    in memory whatever the size of the dataset. OpenCV and the NumPy transforms release the GIL, so the thread runs
+    alongside the simulation. Errors of the thread are raised by the iteration that reaches them.
+    """
+    _END = object()
+
+    def __init__(self, population, paths, prefetch=16, workers=1):
+        """
+        :param population: The image population whose loader, filter bank and coding scheme are used.
+        :param paths: Image files and directories, streamed in this order.
+        :param prefetch: Number of encoded images kept ahead of the simulation.
+        :param workers: Number of threads decoding images.
+
+        :type population: cerebro.preprocessors.ImagePopulation.ImagePopulation
+        :type paths: list of str
+        :type prefetch: int
+        :type workers: int
+        """
+        self.population = population
+        self.paths = list(paths)
+        self.prefetch = prefetch
+        self.workers = workers
+        self.presented = 0
+
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """
+        :returns: Spike times of the next image relative to its presentation, one value per neuron.
+
+        :rtype: numpy.ndarray
+
+        :raises StopIteration: If all images have been streamed.
+        """
+        if self._done:
+            raise StopIteration
+        item = self._queue.get()
+        if item is ImageStream._END:
+            self._done = True
+            raise StopIteration
+        if isinstance(item, Exception):
+            self._done = True
+            raise item
+        self.presented += 1
+        return item
+
+    def _put(self, item):
+        # waits for room in the queue, giving up once the stream is closed
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        try:
+            names = itertools.chain.from_iterable(self.population.image_names(path) for path in self.paths)
+            with ThreadPoolExecutor(self.workers) as executor:
+                while not self._stop.is_set():
+                    batch = list(itertools.islice(names, self.population.batch_size))
+                    if not batch:
+                        break
+                    images = numpy.stack(list(executor.map(self.population.load_image, batch))).astype(numpy.float32)
+                    for latencies in self.population.encode_responses(self.population.apply_filter(images)):
+                        if not self._put(latencies):
+                            return
+        except Exception as exception:
+            self._put(exception)
+            return
+        self._put(ImageStream._END)
+
+    def close(self):
+        """Stops the background thread and drops the prefetched images."""
+        self._stop.set()
+        self._done = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join()
@@ -1,5 +1,5 @@
-from cerebro.code_generation.templates.monitoring import plot
 from cerebro.models import Neuron, Synapse, Network, Population, Connection, connection_type
+from cerebro.models.monitor import LivePlot
 from cerebro.preprocessors.ImagePopulation import ImagePopulation
 import os
 
@@ -44,6 +44,7 @@ image_pop = ImagePopulation(400, '/home/atenagm/cnrl/code/cerebro/aks.jpg', "DoG
 # image_pop.set_image('/home/atenagm/cnrl/code/cerebro/akse.jpg')
 
 pop = Population(neuron=neuron, size=10)
+monitor = pop.monitor('v')
 
 conn = Connection(pre=image_pop, post=pop, synapse=synapse, connection_type=connection_type.AllToAllConnection())
 
@@ -51,5 +52,4 @@ net = Network(populations=[pop, image_pop], connections=[conn], variables="n = 2
 
 net.compile()
 
-plot("Population1", 'v')
-net.simulate(10, 0.1)
+net.simulate(10, 0.1, callback=LivePlot(monitor, 'v'), callback_interval=1)
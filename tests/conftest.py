@@ -0,0 +1,52 @@
+"""Fixtures and helpers shared by the tests.
+
+Networks are built in a temporary directory, which is put first on the path so that their modules can be imported,
+and share a build cache, so that a network is compiled once however many tests build it.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from cerebro.code_generation.cache import BuildCache
+from cerebro.models import Neuron
+
+# fires every 20 steps or so, sooner with input
+neuron = Neuron(variables="v = 0", equations="v = v + Uniform(0, 0.5) + g_exc", spike="v > 5", reset="v = 0")
+
+
+def record(network, populations, duration, dt=1.0, restart=True, **simulate_kwargs):
+    """Runs the network step by step and returns the spikes every population fired, as rows of (step, rank).
+
+    A new simulation is started with `dt` and `simulate_kwargs` if `restart` is true, otherwise the current one is
+    continued.
+    """
+    events = {pop: [] for pop in populations}
+
+    def collect(net):
+        for pop in populations:
+            events[pop].extend((net.c_module.get_time() - 1, rank) for rank in pop.wrapper.get_spiked())
+
+    if restart:
+        network.simulate(duration, dt, callback=collect, callback_interval=dt, **simulate_kwargs)
+    else:
+        network.run(duration, callback=collect, callback_interval=network.c_module.get_dt())
+    return {pop: np.array(pairs, dtype=int).reshape(-1, 2) for pop, pairs in events.items()}
+
+
+@pytest.fixture(scope='session', autouse=True)
+def build_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('networks')
+    cwd = os.getcwd()
+    os.chdir(path)
+    sys.path.insert(0, str(path))
+    yield path
+    sys.path.remove(str(path))
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def cache(build_dir):
+    return BuildCache(str(build_dir / 'cache'))
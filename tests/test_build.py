@@ -0,0 +1,43 @@
+import glob
+import os
+import subprocess
+import sys
+
+import cerebro
+
+script = """
+import sys
+from cerebro.models import Synapse, Population, Connection, Network, connection_type
+from conftest import neuron
+
+changed = Synapse(variables="w = 0.05", equations="", pre_spike="w = w + " + sys.argv[1], post_spike="")
+kept = Synapse(variables="w = 0.05", equations="", pre_spike="w = w + 0.1", post_spike="")
+a = Population(50, neuron)
+b = Population(50, neuron)
+network = Network(populations=[a, b], connections=[
+    Connection(a, b, changed, connection_type.ProbabilityConnection(0.2)),
+    Connection(b, a, kept, connection_type.ProbabilityConnection(0.2)),
+])
+network.compile(cache=False)
+network.simulate(10, 0.5)
+"""
+
+
+def build(path, increment):
+    # a network module cannot be reloaded in a process, so each build runs in its own
+    paths = [os.path.dirname(os.path.dirname(cerebro.__file__)), os.path.dirname(__file__)]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(paths))
+    subprocess.run([sys.executable, '-c', script, increment], cwd=str(path), env=environment, check=True,
+                   stdout=subprocess.DEVNULL)
+    return {os.path.basename(name): os.path.getmtime(name) for name in glob.glob(str(path / 'build/net0/*.o'))}
+
+
+def test_rebuilds_changed_units_only(tmp_path):
+    built = build(tmp_path, '0.01')
+    assert {'core.o', 'population0.o', 'population1.o', 'connection0.o', 'connection1.o'} <= set(built)
+
+    unchanged = build(tmp_path, '0.01')
+    assert unchanged == built
+
+    rebuilt = build(tmp_path, '0.02')
+    assert {name for name in built if rebuilt[name] != built[name]} == {'connection0.o'}
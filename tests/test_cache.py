@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+
+from cerebro.code_generation.api import CodeGeneration
+from cerebro.code_generation.cache import BuildCache
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+
+def build(cache, drive=0.5, unused=0):
+    # populations created but left out of the network must not change the generated code
+    for _ in range(unused):
+        Population(10, Neuron(variables="v = 0"))
+    neuron = Neuron(variables="v = 0", equations="v = v + Uniform(0, {}) + g_exc".format(drive), spike="v > 5",
+                    reset="v = 0")
+    synapse = Synapse(variables="w = 0.05", equations="", pre_spike="w = w + 0.01", post_spike="")
+    pre = Population(100, neuron)
+    post = Population(100, neuron)
+    connection = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.2))
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+    network.simulate(20, 1)
+    return np.array(post.v)
+
+
+def write(path, content):
+    with open(path, 'w') as file:
+        file.write(content)
+    return str(path)
+
+
+def test_key_follows_content(tmp_path):
+    write(tmp_path / 'a.cpp', 'int a;')
+    write(tmp_path / 'b.cpp', 'int b;')
+    key = BuildCache.key(str(tmp_path))
+    assert BuildCache.key(str(tmp_path), ['b.cpp', 'a.cpp']) == key
+    assert BuildCache.key(str(tmp_path), ['a.cpp']) != key
+
+    write(tmp_path / 'a.cpp', 'int a = 1;')
+    assert BuildCache.key(str(tmp_path)) != key
+
+
+def test_store_and_lookup(tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'))
+    module = write(tmp_path / 'wrapper.so', 'module')
+    assert cache.lookup('k') is None
+
+    cache.store('k', module)
+    with open(cache.lookup('k')) as file:
+        assert file.read() == 'module'
+    assert [entry.key for entry in cache.entries()] == ['k']
+
+    cache.clear()
+    assert cache.lookup('k') is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'), max_size=25)
+    module = write(tmp_path / 'wrapper.so', '0123456789')
+    for index, key in enumerate(['a', 'b']):
+        cache.store(key, module)
+        os.utime(cache.lookup(key), (index, index))
+    cache.lookup('a')
+
+    cache.store('c', module)
+    assert sorted(entry.key for entry in cache.entries()) == ['a', 'c']
+    assert cache.size() <= 25
+
+
+def test_abi_tag_names_compiler_and_target():
+    tag = BuildCache.abi_tag()
+    assert BuildCache.compiler_tag() in tag
+    assert '-march=' in BuildCache.compiler_tag()
+
+
+def test_repeated_build_hits(tmp_path, monkeypatch):
+    cache = BuildCache(str(tmp_path / 'cache'))
+    first = build(cache)
+    assert len(cache.entries()) == 1
+
+    def compile_files(self):
+        raise AssertionError('module was compiled instead of taken from the cache')
+    monkeypatch.setattr(CodeGeneration, 'compile_files', compile_files)
+    second = build(cache, unused=3)
+    assert len(cache.entries()) == 1
+    np.testing.assert_array_equal(second, first)
+
+
+def test_changed_network_misses(tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'))
+    build(cache)
+    build(cache, drive=0.25)
+    assert len(cache.entries()) == 2
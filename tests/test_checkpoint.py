@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+neuron = Neuron(variables="v = 0", equations="v = v + Uniform(0, 0.5) + g_exc", spike="v > 5",
+                reset="v = Normal(0, 1)")
+plastic = Synapse(variables="w = 0.05\ndelay = 3\nx = 0", equations="dx/dt = -x / 10",
+                  pre_spike="w = w + 0.01 * x\nx = x + 1", post_spike="w = w - 0.005")
+shared = Synapse(variables="w = 0.5\ndelay = 2", equations="", pre_spike="", post_spike="")
+
+
+def build(cache):
+    a = Population(500, neuron)
+    b = Population(400, neuron)
+    grid = Population(100, neuron, shape=(10, 10))
+    output = Population(64, neuron, shape=(8, 8))
+    connections = [
+        Connection(a, b, plastic, connection_type.ProbabilityConnection(0.05)),
+        Connection(b, a, plastic, connection_type.FixedPreNumberConnection(20)),
+        Connection(grid, output, shared, connection_type.ConvolutionConnection(3)),
+    ]
+    network = Network(variables="gain = 3", populations=[a, b, grid, output], connections=connections)
+    network.compile(cache=cache)
+    return network
+
+
+def snapshot(network):
+    a, b = network.populations[:2]
+    state = network.connections[0].wrapper.get_state()
+    return {
+        'a.v': np.array(a.v), 'b.v': np.array(b.v), 'b.last_spike': np.array(b.last_spike),
+        'w': np.array(state['w']), 'x': np.array(state['x']), 'pre_rank': np.array(state['pre_rank']),
+        'output.v': np.array(network.populations[3].v), 't': network.c_module.get_time(),
+    }
+
+
+def test_restored_run_matches_uninterrupted_run(cache, tmp_path):
+    network = build(cache)
+    network.simulate(100, 0.5, threads=2, seed=5)
+    network.save_checkpoint(str(tmp_path / 'checkpoint.npz'))
+    network.run(75)
+    expected = snapshot(network)
+
+    network = build(cache)
+    network.simulate(10, 0.5, seed=9)
+    network.restore_checkpoint(str(tmp_path / 'checkpoint.npz'))
+    assert network.seed == 5
+    network.c_module.set_num_threads(3)
+    network.run(75)
+    actual = snapshot(network)
+    assert actual['t'] == 350
+    for name in expected:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+
+def test_rejects_checkpoint_of_other_network(cache, tmp_path):
+    network = build(cache)
+    network.simulate(1, 1)
+    network.save_checkpoint(str(tmp_path / 'checkpoint.npz'))
+
+    other = Network(populations=network.populations[:2], connections=network.connections[:1])
+    other.compile(cache=cache)
+    with pytest.raises(IllegalArgumentException):
+        other.restore_checkpoint(str(tmp_path / 'checkpoint.npz'))
+
+
+def test_requires_compiled_network(tmp_path):
+    network = Network(populations=[Population(10, neuron)])
+    with pytest.raises(IllegalStateException):
+        network.save_checkpoint(str(tmp_path / 'checkpoint.npz'))
+    with pytest.raises(IllegalStateException):
+        network.restore_checkpoint(str(tmp_path / 'checkpoint.npz'))
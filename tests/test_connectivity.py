@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models import Synapse, Population, Connection, Network, connection_type
+
+from conftest import neuron
+
+synapse = Synapse(variables="w = 0.05\nx = 0", equations="", pre_spike="x = x + 1", post_spike="")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    pre = Population(300, neuron)
+    post = Population(200, neuron)
+    connection = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.1))
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+    network.simulate(50, 1)
+    return network, pre, post, connection
+
+
+def test_rows_are_compressed(network):
+    network, pre, post, connection = network
+    state = connection.wrapper.get_state()
+    row_ptr, post_rank, pre_rank = state['row_ptr'], state['post_rank'], state['pre_rank']
+    assert len(row_ptr) == len(post_rank) + 1
+    assert row_ptr[0] == 0 and row_ptr[-1] == len(pre_rank) == len(connection.x)
+    assert np.all(np.diff(row_ptr) >= 0)
+    assert len(np.unique(post_rank)) == len(post_rank)
+    assert pre_rank.min() >= 0 and pre_rank.max() < pre.size
+    for row in range(len(post_rank)):
+        ranks = pre_rank[row_ptr[row]:row_ptr[row + 1]]
+        assert len(np.unique(ranks)) == len(ranks)
+
+
+def test_columns_index_the_rows(network):
+    network, pre, post, connection = network
+    state = connection.wrapper.get_state()
+    row_ptr, pre_rank = state['row_ptr'], state['pre_rank']
+    inv_pre_ptr, inv_pre_rank, inv_pre_row = state['inv_pre_ptr'], state['inv_pre_rank'], state['inv_pre_row']
+
+    assert len(inv_pre_ptr) == pre.size + 1
+    np.testing.assert_array_equal(np.sort(inv_pre_rank), np.arange(len(pre_rank)))
+    np.testing.assert_array_equal(np.diff(inv_pre_ptr), np.bincount(pre_rank, minlength=pre.size))
+    for rank in range(pre.size):
+        synapses = inv_pre_rank[inv_pre_ptr[rank]:inv_pre_ptr[rank + 1]]
+        rows = inv_pre_row[inv_pre_ptr[rank]:inv_pre_ptr[rank + 1]]
+        assert np.all(pre_rank[synapses] == rank)
+        assert np.all((row_ptr[rows] <= synapses) & (synapses < row_ptr[rows + 1]))
+
+
+def test_variables_follow_row_order(network):
+    network, pre, post, connection = network
+    state = connection.wrapper.get_state()
+    row_ptr = state['row_ptr']
+    x = connection.x
+    assert x.sum() > 0
+
+    row = int(np.argmax(np.diff(row_ptr)))
+    np.testing.assert_array_equal(connection.wrapper.get_dendrite_x(row), x[row_ptr[row]:row_ptr[row + 1]])
+    assert connection.wrapper.get_synapse_x(row, 1) == x[row_ptr[row] + 1]
+
+
+@pytest.fixture(scope='module')
+def sparse(cache):
+    pre = Population(1000, neuron)
+    post = Population(400, neuron)
+    random = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.05))
+    gaussian = Connection(pre, post, synapse, connection_type.GaussianConnection(3.0))
+    network = Network(populations=[pre, post], connections=[random, gaussian])
+    network.compile(cache=cache)
+    network.simulate(0, 1)
+    return network, random, gaussian
+
+
+def test_probability_sets_density(sparse):
+    network, random, gaussian = sparse
+    state = random.wrapper.get_state()
+    row_ptr, pre_rank = state['row_ptr'], state['pre_rank']
+    assert abs(row_ptr[-1] / (1000 * 400) - 0.05) < 0.002
+    for row in range(400):
+        assert np.all(np.diff(pre_rank[row_ptr[row]:row_ptr[row + 1]]) > 0)
+    # pre-synaptic neurons are drawn uniformly
+    in_degree = np.bincount(pre_rank, minlength=1000)
+    assert abs(in_degree[:500].sum() / in_degree.sum() - 0.5) < 0.02
+
+
+def test_gaussian_follows_distance(sparse):
+    network, random, gaussian = sparse
+    state = gaussian.wrapper.get_state()
+    rows = np.repeat(state['post_rank'], np.diff(state['row_ptr']))
+    distances = np.abs(state['pre_rank'] - rows)
+    # pairs at distance d: every post-synaptic neuron has a pre-synaptic one d ranks ahead, and all but d one behind
+    d = np.arange(12)
+    frequencies = np.bincount(distances, minlength=12)[:12] / np.where(d == 0, 400, 800 - d)
+    np.testing.assert_allclose(frequencies, np.exp(-d ** 2 / (2 * 3.0 ** 2)), atol=0.06)
+    assert distances.max() < 3.0 * 6
+
+
+def test_seed_draws_connectivity(sparse):
+    network, random, gaussian = sparse
+    network.simulate(0, 1, seed=1)
+    first = np.array(random.wrapper.get_state()['pre_rank'])
+    network.simulate(0, 1, seed=2)
+    assert not np.array_equal(random.wrapper.get_state()['pre_rank'], first)
+    network.simulate(0, 1, seed=1)
+    np.testing.assert_array_equal(random.wrapper.get_state()['pre_rank'], first)
+
+
+def test_fixed_numbers(cache):
+    pre = Population(300, neuron)
+    post = Population(200, neuron)
+    fan_in = Connection(pre, post, synapse, connection_type.FixedPreNumberConnection(20))
+    fan_out = Connection(pre, post, synapse, connection_type.FixedPostNumberConnection(15))
+    network = Network(populations=[pre, post], connections=[fan_in, fan_out])
+    network.compile(cache=cache)
+    network.simulate(0, 1)
+
+    state = fan_in.wrapper.get_state()
+    assert np.all(np.diff(state['row_ptr']) == 20)
+    for row in range(len(state['post_rank'])):
+        assert len(np.unique(state['pre_rank'][state['row_ptr'][row]:state['row_ptr'][row + 1]])) == 20
+    assert len(np.unique(state['pre_rank'])) > 0.9 * pre.size
+
+    state = fan_out.wrapper.get_state()
+    assert np.all(np.diff(state['inv_pre_ptr']) == 15)
+    rows = np.repeat(state['post_rank'], np.diff(state['row_ptr']))
+    assert len(set(zip(state['pre_rank'], rows))) == 15 * pre.size
+
+
+def test_positions_follow_shape_and_spacing():
+    grid = Population(6, neuron, shape=(2, 3), spacing=(1.0, 0.5))
+    np.testing.assert_array_equal(grid.positions(), [[0, 0], [0, 0.5], [0, 1], [1, 0], [1, 0.5], [1, 1]])
+    np.testing.assert_array_equal(Population(3, neuron).positions(), [[0], [1], [2]])
+    with pytest.raises(IllegalArgumentException):
+        Population(7, neuron, shape=(2, 3))
+    with pytest.raises(IllegalArgumentException):
+        Population(6, neuron, shape=(2, 3), spacing=(1.0, 1.0, 1.0))
+
+
+def test_gaussian_on_grids_follows_distance(cache):
+    pre = Population(30 * 30, neuron, shape=(30, 30))
+    post = Population(15 * 15, neuron, shape=(15, 15), spacing=2.0)
+    connection = Connection(pre, post, synapse, connection_type.GaussianConnection(1.5))
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+    network.simulate(0, 1)
+
+    state = connection.wrapper.get_state()
+    connected = np.zeros((post.size, pre.size), dtype=bool)
+    connected[np.repeat(state['post_rank'], np.diff(state['row_ptr'])), state['pre_rank']] = True
+    squared = ((post.positions()[:, np.newaxis] - pre.positions()[np.newaxis]) ** 2).sum(axis=2)
+    for distance in [0, 1, 2, 4, 5, 8]:
+        pairs = squared == distance
+        assert abs(connected[pairs].mean() - np.exp(-distance / (2 * 1.5 ** 2))) < 0.06
+    assert squared[connected].max() < (1.5 * 6) ** 2
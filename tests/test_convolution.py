@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import SemanticException
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+source = Neuron(variables="v = 0", equations="v = v + Uniform(0, 1)", spike="v > 3", reset="v = 0")
+accumulator = Neuron(variables="v = 0", equations="v = v + g_exc", spike="v > 1e30", reset="v = 0")
+synapse = Synapse(variables="w = 0.5", equations="", pre_spike="", post_spike="")
+
+
+def spike_counts(monitor, steps):
+    # spikes of the last step have not been delivered yet
+    return (monitor.get('v') == 0)[:steps - 1].sum(axis=0)
+
+
+def test_matches_cross_correlation(cache):
+    kernel = np.arange(9.0).reshape(3, 3) - 4
+    pre = Population(20 * 17, source, shape=(20, 17))
+    convolution = connection_type.ConvolutionConnection((3, 3), stride=2, padding=1, weights=kernel)
+    height, width = convolution.output_shape(pre)
+    post = Population(height * width, accumulator, shape=(height, width))
+    line = Population(30, source)
+    line_post = Population(28, accumulator)
+    connection = Connection(pre, post, synapse, convolution)
+    line_connection = Connection(line, line_post, synapse, connection_type.ConvolutionConnection(3))
+    monitor, line_monitor = pre.monitor('v'), line.monitor('v')
+    network = Network(populations=[pre, post, line, line_post], connections=[connection, line_connection])
+    network.compile(cache=cache)
+    network.simulate(50, 1)
+    assert connection.wrapper.nb_taps() == 9 and line_connection.wrapper.nb_taps() == 3
+
+    padded = np.pad(spike_counts(monitor, 50).reshape(20, 17), 1)
+    expected = np.array([[(padded[2 * y:2 * y + 3, 2 * x:2 * x + 3] * kernel).sum() for x in range(width)]
+                         for y in range(height)])
+    assert np.abs(expected).sum() > 0
+    np.testing.assert_allclose(post.v.reshape(height, width), expected, rtol=1e-5)
+
+    counts = spike_counts(line_monitor, 50)
+    np.testing.assert_allclose(line_post.v, [0.5 * counts[o:o + 3].sum() for o in range(28)], rtol=1e-5)
+
+
+def test_rejects_post_of_wrong_shape(cache):
+    pre = Population(36, source, shape=(6, 6))
+    post = Population(36, accumulator, shape=(6, 6))
+    connection = Connection(pre, post, synapse, connection_type.ConvolutionConnection(3))
+    with pytest.raises(SemanticException):
+        Network(populations=[pre, post], connections=[connection]).compile(cache=cache)
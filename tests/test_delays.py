@@ -0,0 +1,29 @@
+import numpy as np
+
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+clock = Neuron(variables="v = 0", equations="v = v + 1", spike="v > 4.5", reset="v = 0")
+counter = Neuron(variables="u = 0", equations="u = u + g_exc", spike="u < -1", reset="u = 0")
+synapse = Synapse(variables="delay = 0\nw = 1")
+
+
+def test_input_arrives_after_its_delay(cache):
+    pre = Population(1, clock)
+    post = Population(3, counter)
+    connection = Connection(pre, post, synapse, connection_type.AllToAllConnection())
+    monitor = post.monitor('u', capacity=100)
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+
+    delays = [0, 3, 7]
+    network.simulate(1, 1)
+    np.testing.assert_array_equal(connection.wrapper.get_post_rank(), np.arange(3))
+    # longer delays than any seen before grow the ring buffer
+    connection.wrapper.set_delay(delays)
+    network.run(60)
+
+    u = monitor.get('u')[1:]
+    assert u[-1, 0] >= 10
+    for neuron, delay in enumerate(delays):
+        np.testing.assert_array_equal(u[delay:, neuron], u[:len(u) - delay, 0])
+        assert np.all(u[:delay, neuron] == 0)
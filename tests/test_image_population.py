@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models import Network
+from cerebro.preprocessors.ImagePopulation import ImagePopulation
+
+gabor = dict(gabor_size=5, sigma=2.0, theta_list=[0, np.pi / 4, np.pi / 2], lambd=4.0, gamma=0.5, psi=0)
+
+
+@pytest.fixture(scope='module')
+def images(tmp_path_factory):
+    path = tmp_path_factory.mktemp('images')
+    generator = np.random.default_rng(0)
+    for index in range(3):
+        cv2.imwrite(str(path / 'image{}.png'.format(index)), generator.integers(0, 256, (24, 24), dtype=np.uint8))
+    return path
+
+
+def test_filters_match_opencv(images):
+    pop = ImagePopulation(3 * 16 * 16, str(images), 'Gabor', **gabor)
+    assert pop.images.shape == (3, 16, 16) and pop.shape == (3, 16, 16)
+    for image, responses in zip(pop.images, pop.filtered_images):
+        for kernel, response in zip(pop.kernels, responses):
+            np.testing.assert_allclose(response, cv2.filter2D(image, cv2.CV_32F, kernel), atol=1e-2)
+
+    pop = ImagePopulation(16 * 16, str(images / 'image1.png'), 'DoG', size_of_gaussian_1=3, size_of_gaussian_2=5)
+    image = pop.images[0]
+    expected = cv2.GaussianBlur(image, (3, 3), 0) - cv2.GaussianBlur(image, (5, 5), 0)
+    np.testing.assert_allclose(pop.filtered_images[0, 0], expected, atol=1e-2)
+
+
+def test_coding_schemes(images):
+    pop = ImagePopulation(16 * 16, str(images), 'DoG', size_of_gaussian_1=3, size_of_gaussian_2=5)
+    responses = pop.filtered_images.reshape(3, -1)
+    latencies = pop.encode()
+    assert latencies.dtype == np.uint8
+    np.testing.assert_array_equal(latencies, 255 - np.clip(np.rint(responses), 0, 255))
+
+    ranks = pop.encode_responses(pop.filtered_images, 'rank_order')
+    for image_ranks, image_responses in zip(ranks, responses):
+        np.testing.assert_array_equal(np.sort(image_ranks), np.arange(pop.size))
+        assert np.all(np.diff(image_responses[np.argsort(image_ranks)]) <= 0)
+
+
+def test_fires_at_latencies(images, cache):
+    pop = ImagePopulation(16 * 16, str(images), 'DoG', size_of_gaussian_1=3, size_of_gaussian_2=5)
+    network = Network(populations=[pop])
+    network.compile(cache=cache)
+    network.simulate(256, 1)
+    latencies = pop.encode(0)[0]
+    np.testing.assert_array_equal(pop.last_spike, latencies)
+
+    pop.present(2, base_time=256)
+    network.run(256)
+    np.testing.assert_array_equal(pop.last_spike, 256 + pop.encode(2)[0].astype(int))
+
+
+def test_rejects_invalid_arguments(images):
+    with pytest.raises(IllegalArgumentException):
+        ImagePopulation(16 * 15, str(images), 'DoG', size_of_gaussian_1=3, size_of_gaussian_2=5)
+    with pytest.raises(IllegalArgumentException):
+        ImagePopulation(16 * 16, str(images), 'Sobel')
+    with pytest.raises(IllegalArgumentException):
+        ImagePopulation(16 * 16, str(images / 'missing'), 'DoG', size_of_gaussian_1=3, size_of_gaussian_2=5)
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models import Network
+from cerebro.preprocessors.ImagePopulation import ImagePopulation
+from cerebro.preprocessors.ImageStream import ImageStream
+
+dog = dict(size_of_gaussian_1=3, size_of_gaussian_2=5)
+
+
+@pytest.fixture(scope='module')
+def images(tmp_path_factory):
+    path = tmp_path_factory.mktemp('images')
+    generator = np.random.default_rng(1)
+    for index in range(7):
+        cv2.imwrite(str(path / 'image{}.png'.format(index)), generator.integers(0, 256, (20, 20), dtype=np.uint8))
+    return path
+
+
+def test_streams_the_encoded_images(images, monkeypatch):
+    expected = ImagePopulation(12 * 12, str(images), 'DoG', **dog).encode()
+    pop = ImagePopulation(12 * 12, str(images), 'DoG', stream=True, **dog)
+    assert len(pop.images) == 0
+    # batches smaller than the dataset, and a queue smaller than a batch
+    monkeypatch.setattr(pop, 'batch_size', 3)
+    stream = ImageStream(pop, [str(images), str(images / 'image0.png')], prefetch=2, workers=2)
+    streamed = list(stream)
+    assert stream.presented == 8
+    np.testing.assert_array_equal(streamed, np.concatenate((expected, expected[:1])))
+
+
+def test_raises_errors_of_the_thread(images, monkeypatch):
+    pop = ImagePopulation(12 * 12, str(images), 'DoG', stream=True, **dog)
+    monkeypatch.setattr(pop, 'batch_size', 1)
+    stream = ImageStream(pop, [str(images / 'image0.png'), str(images / 'missing')])
+    next(stream)
+    with pytest.raises(IllegalArgumentException):
+        next(stream)
+    assert next(stream, None) is None
+
+
+def test_close_stops_the_thread(images):
+    pop = ImagePopulation(12 * 12, str(images), 'DoG', stream=True, **dog)
+    stream = ImageStream(pop, [str(images)], prefetch=1)
+    next(stream)
+    stream.close()
+    assert not stream._thread.is_alive()
+    assert next(stream, None) is None
+
+
+def test_network_presents_streamed_images(images, cache):
+    expected = ImagePopulation(12 * 12, str(images), 'DoG', **dog).encode().astype(int)
+    pop = ImagePopulation(12 * 12, str(images), 'DoG', stream=True, presentation_steps=300, **dog)
+    network = Network(populations=[pop])
+    network.compile(cache=cache)
+    last_spikes = []
+    network.simulate(900, 1, callback=lambda net: last_spikes.append(np.array(pop.last_spike)), callback_interval=300)
+    for index, last_spike in enumerate(last_spikes):
+        np.testing.assert_array_equal(last_spike, 300 * index + expected[index])
+
+    # a new simulation starts the stream over
+    network.simulate(300, 1)
+    np.testing.assert_array_equal(pop.last_spike, expected[0])
+    pop.stream.close()
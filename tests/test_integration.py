@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import SemanticException
+from cerebro.models import Neuron, Population, Network
+
+variables = "v = 1 : double\ntau = 10 : shared\nvr = 2 : shared"
+methods = ['euler', 'rk2', 'rk4', 'exponential_euler']
+
+
+def decay(method):
+    return Neuron(variables=variables, equations="dv/dt = (vr - v) / tau", spike="v > 100", reset="v = 0",
+                  method=method)
+
+
+def quadratic(method):
+    # dv/dt = -v^2 from v = 1 is solved by v = 1 / (1 + t)
+    return Neuron(variables=variables, equations="dv/dt = -v * v", spike="v > 100", reset="v = 0", method=method)
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    populations = {'exact': Population(2, decay(None))}
+    populations.update({method: Population(2, quadratic(method)) for method in methods})
+    network = Network(populations=list(populations.values()))
+    network.compile(cache=cache)
+    return network, populations
+
+
+def errors(network, dt, duration=5.0):
+    network, populations = network
+    network.simulate(duration, dt)
+    return {method: abs(populations[method].v[0] - 1 / (1 + duration)) for method in methods}
+
+
+def test_linear_equations_are_solved_exactly(network):
+    network[0].simulate(5.0, 0.5)
+    assert abs(network[1]['exact'].v[0] - (2 - np.exp(-5.0 / 10))) < 1e-12
+
+
+def test_methods_converge_at_their_order(network):
+    coarse, fine = errors(network, 0.1), errors(network, 0.05)
+    assert coarse['rk4'] < coarse['rk2'] < coarse['euler'] < 0.01
+    assert coarse['exponential_euler'] < 0.01
+    for method, order in [('euler', 1), ('rk2', 2), ('rk4', 4)]:
+        assert abs(np.log2(coarse[method] / fine[method]) - order) < 0.2, method
+    assert np.log2(coarse['exponential_euler'] / fine['exponential_euler']) > 0.8
+
+
+def test_exact_method_rejects_nonlinear_equations(cache):
+    network = Network(populations=[Population(2, quadratic('exact'))])
+    with pytest.raises(SemanticException):
+        network.compile(cache=cache)
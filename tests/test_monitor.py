@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.models import Synapse, Population, Connection, Network, connection_type
+
+from conftest import neuron
+
+synapse = Synapse(variables="w = 0.05\nx = 0", equations="", pre_spike="x = x + 1", post_spike="")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    pre = Population(50, neuron)
+    post = Population(40, neuron)
+    connection = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.2))
+    monitors = {
+        'full': pre.monitor(['v', 'g_exc'], capacity=1000),
+        'decimated': pre.monitor('v', ranks=[0, 3, 7], interval=5, capacity=4),
+        'synapses': connection.monitor('x', ranks=[1, 2]),
+        'decimated synapses': connection.monitor('x', ranks=[1, 2], interval=10),
+    }
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+    network.simulate(50, 1)
+    return network, pre, connection, monitors
+
+
+def test_records_every_step(network):
+    network, pre, connection, monitors = network
+    full = monitors['full']
+    np.testing.assert_array_equal(full.steps, np.arange(50))
+    assert full.get('v').shape == full['g_exc'].shape == (50, pre.size)
+    np.testing.assert_array_equal(full.get('v')[-1], pre.v)
+
+
+def test_keeps_last_records_of_ranks_at_interval(network):
+    network, pre, connection, monitors = network
+    full, decimated = monitors['full'], monitors['decimated']
+    np.testing.assert_array_equal(decimated.steps, [30, 35, 40, 45])
+    np.testing.assert_array_equal(decimated.get('v'), full.get('v')[30:50:5][:, [0, 3, 7]])
+
+
+def test_records_synapses_of_ranks(network):
+    network, pre, connection, monitors = network
+    synapses, decimated = monitors['synapses'], monitors['decimated synapses']
+    last = np.concatenate([connection.wrapper.get_dendrite_x(1), connection.wrapper.get_dendrite_x(2)])
+    assert synapses.get('x').shape == (50, len(last))
+    np.testing.assert_array_equal(synapses.get('x')[-1], last)
+    np.testing.assert_array_equal(decimated.steps, [0, 10, 20, 30, 40])
+    np.testing.assert_array_equal(decimated.get('x'), synapses.get('x')[::10])
+
+
+def test_starts_over_on_simulate(network):
+    network, pre, connection, monitors = network
+    network.simulate(7, 1)
+    np.testing.assert_array_equal(monitors['full'].steps, np.arange(7))
+    np.testing.assert_array_equal(monitors['decimated'].steps, [0, 5])
+    network.simulate(50, 1)
+
+
+def test_rejects_unknown_variables_and_late_monitors(network):
+    network, pre, connection, monitors = network
+    with pytest.raises(IllegalArgumentException):
+        monitors['decimated'].get('g_exc')
+    with pytest.raises(IllegalStateException):
+        pre.monitor('v')
@@ -0,0 +1,41 @@
+import numpy as np
+
+from cerebro.models import Neuron, Population, Network
+
+variables = "v = 0\nu = 0\nk = 1\na = 0.5 : shared\nb = 0.2 : shared"
+# a * b is the same for all neurons, (k + 1) * (k + 1) is shared by both equations
+neuron = Neuron(variables=variables,
+                equations="v = v + a * b * (k + 1) * (k + 1) - a * b * v\nu = u + (k + 1) * (k + 1) / a",
+                spike="v > 1e9", reset="v = 0")
+noise = Neuron(variables="v = 0\nu = 0\nk = 1", equations="v = Uniform(0, 1) + k\nu = Uniform(0, 1) + k",
+               spike="v > 1e9", reset="v = 0")
+
+
+def test_rewritten_equations_give_the_same_results(cache):
+    pop = Population(4, neuron)
+    network = Network(populations=[pop])
+    network.compile(cache=cache)
+    optimizer = network.compiler.population_optimizers[pop]
+    assert optimizer.invariants and optimizer.temporaries
+
+    network.simulate(0, 1)
+    pop.wrapper.set_k(np.arange(4))
+    network.run(10)
+    k = np.array([0, 1, 2, 3])
+    v, u = np.zeros(4), np.zeros(4)
+    for _ in range(10):
+        v = v + 0.1 * (k + 1) ** 2 - 0.1 * v
+        u = u + (k + 1) ** 2 / 0.5
+    np.testing.assert_allclose(pop.v, v, rtol=1e-5)
+    np.testing.assert_allclose(pop.u, u, rtol=1e-5)
+
+
+def test_random_functions_draw_separately(cache):
+    pop = Population(100, noise)
+    network = Network(populations=[pop])
+    network.compile(cache=cache)
+    assert not network.compiler.population_optimizers[pop].temporaries
+
+    network.simulate(1, 1)
+    assert np.all(pop.v >= 1) and np.all(pop.v < 2)
+    assert np.count_nonzero(pop.v != pop.u) > 90
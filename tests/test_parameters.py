@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+
+def build():
+    neuron = Neuron(variables="v = 0\ndrive = 0.5", equations="v = v + drive", spike="v > 1e9", reset="v = 0")
+    synapse = Synapse(variables="w = 0.05", equations="", pre_spike="", post_spike="")
+    pre = Population(100, neuron)
+    post = Population(50, neuron)
+    grid = Population(12, neuron, shape=(3, 4))
+    connection = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.1))
+    network = Network(populations=[pre, post, grid], connections=[connection])
+    return network, pre, post, grid, connection
+
+
+def test_variables_are_read_at_initialization(cache):
+    network, pre, post, grid, connection = build()
+    network.compile(cache=cache, parametric=True)
+    network.simulate(10, 1)
+    np.testing.assert_allclose(pre.v, 5.0)
+
+    network.set_parameter(pre, 'drive', 0.25)
+    assert network.get_parameter(pre, 'drive') == 0.25
+    network.simulate(10, 1)
+    np.testing.assert_allclose(pre.v, 2.5)
+    np.testing.assert_allclose(post.v, 5.0)
+
+
+def test_sizes_and_connection_arguments_are_read_at_initialization(cache):
+    network, pre, post, grid, connection = build()
+    network.compile(cache=cache, parametric=True)
+    network.set_parameter(post, 'size', 80)
+    network.set_parameter(connection.connection_type, 'probability', 1.0)
+    network.simulate(1, 1)
+    assert post.size == 80
+    assert len(post.v) == 80
+    assert connection.wrapper.get_row_ptr()[-1] == 100 * 80
+
+    network.set_parameter(connection.connection_type, 'probability', 0.0)
+    network.simulate(1, 1)
+    assert connection.wrapper.get_row_ptr()[-1] == 0
+
+
+def test_size_of_grid_is_fixed(cache):
+    network, pre, post, grid, connection = build()
+    network.compile(cache=cache, parametric=True)
+    assert network.fixed_size(grid) and not network.fixed_size(post)
+    with pytest.raises(IllegalArgumentException):
+        network.set_parameter(grid, 'size', 20)
+    with pytest.raises(IllegalArgumentException):
+        network.get_parameter(grid, 'size')
+
+
+def test_unknown_parameter(cache):
+    network, pre, post, grid, connection = build()
+    network.compile(cache=cache, parametric=True)
+    with pytest.raises(IllegalArgumentException):
+        network.set_parameter(pre, 'missing', 1.0)
+
+
+def test_requires_parametric_mode():
+    network, pre, post, grid, connection = build()
+    with pytest.raises(IllegalStateException):
+        network.set_parameter(pre, 'drive', 1.0)
+    with pytest.raises(IllegalStateException):
+        network.get_parameter(pre, 'drive')
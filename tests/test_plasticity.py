@@ -0,0 +1,54 @@
+import numpy as np
+
+from cerebro.models import Neuron, Synapse, Population, SpikeSourcePopulation, Connection, Network, connection_type
+
+spiking = Neuron(variables="v = 0\nu = 0", equations="v = v + Uniform(0, 0.5)", spike="v > 3", reset="v = 0")
+variables = "w = 0.05\nx = 0\ntau = 10 : shared constant"
+pre_spike = "x = x + 1"
+post_spike = "w = w + 0.01 * x"
+# the trace only decays between spikes, so it is advanced in closed form when a spike touches it
+event_driven = Synapse(variables=variables, equations="dx/dt = -x / tau", pre_spike=pre_spike, post_spike=post_spike)
+# the same trace reading a post-synaptic variable, which stays 0, has to be integrated every step, by a method that is
+# exact for it
+clock_driven = Synapse(variables=variables, equations="dx/dt = -x / tau + _post_u", pre_spike=pre_spike,
+                       post_spike=post_spike, method='exponential_euler')
+
+
+def test_event_driven_matches_clock_driven(cache):
+    pre = Population(40, spiking)
+    post = Population(30, spiking)
+    lazy = Connection(pre, post, event_driven, connection_type.AllToAllConnection())
+    eager = Connection(pre, post, clock_driven, connection_type.AllToAllConnection())
+    network = Network(populations=[pre, post], connections=[lazy, eager])
+    network.compile(cache=cache)
+    assert network.compiler.connection_event_driven[lazy]
+    assert not network.compiler.connection_event_driven[eager]
+
+    network.simulate(100, 0.5)
+    lazy_w, eager_w = lazy.wrapper.get_state()['w'], eager.wrapper.get_state()['w']
+    assert lazy.x.max() > 1
+    assert np.any(lazy_w > 0.05)
+    np.testing.assert_allclose(lazy.x, eager.x, rtol=1e-4, atol=1e-6)
+    np.testing.assert_allclose(lazy_w, eager_w, rtol=1e-4, atol=1e-6)
+
+
+def test_transmits_lazily_integrated_weights(cache):
+    # no spike rule touches the synapses, so the decaying weight is only brought up to date when it is transmitted
+    decaying = Synapse(variables="w = 1\ntau = 10 : shared", equations="dw/dt = -w / tau", pre_spike="",
+                       post_spike="")
+    reference = Synapse(variables="w = 1\ntau = 10 : shared", equations="dw/dt = -w / tau + _post_v",
+                        pre_spike="", post_spike="", method='exponential_euler')
+    integrator = Neuron(variables="v = 0\nu = 0", equations="u = u + g_exc", spike="v > 1", reset="v = 0")
+    pre = SpikeSourcePopulation(1, spikes=[np.arange(0, 100, 5)])
+    lazy_post, eager_post = Population(1, integrator), Population(1, integrator)
+    lazy = Connection(pre, lazy_post, decaying, connection_type.AllToAllConnection())
+    eager = Connection(pre, eager_post, reference, connection_type.AllToAllConnection())
+    network = Network(populations=[pre, lazy_post, eager_post], connections=[lazy, eager])
+    network.compile(cache=cache)
+    assert network.compiler.connection_event_driven[lazy]
+
+    network.simulate(100, 1)
+    # every spike delivers the weight decayed since the start, exp(-(s + 1) / 10) for a spike at step s
+    expected = np.exp(-(np.arange(0, 100, 5) + 1) / 10).sum()
+    np.testing.assert_allclose(eager_post.u, expected, rtol=1e-4)
+    np.testing.assert_allclose(lazy_post.u, eager_post.u, rtol=1e-4)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models import PoissonPopulation, Network
+
+from conftest import record
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    pop = PoissonPopulation(1000, rates=np.repeat([0.0, 100.0], 500))
+    network = Network(populations=[pop])
+    network.compile(cache=cache)
+    return network, pop
+
+
+def test_fires_at_rates(network):
+    network, pop = network
+    events = record(network, [pop], 1000, dt=1.0, seed=1)[pop]
+    counts = np.bincount(events[:, 1], minlength=pop.size)
+    assert not counts[:500].any()
+    assert len(np.unique(events, axis=0)) == len(events)
+    expected = 1000 * (1 - np.exp(-100 * 1.0 / 1000))
+    assert abs(counts[500:].mean() / expected - 1) < 0.02
+    # Poisson counts have a variance close to their mean
+    assert abs(counts[500:].var() / expected - 1) < 0.25
+
+    events = record(network, [pop], 1000, dt=0.25, seed=1)[pop]
+    assert abs(len(events) / 500 / (4000 * (1 - np.exp(-100 * 0.25 / 1000))) - 1) < 0.02
+
+
+def test_draws_depend_on_seed_only(network):
+    network, pop = network
+    events = record(network, [pop], 200, seed=4)[pop]
+    np.testing.assert_array_equal(record(network, [pop], 200, seed=4, threads=3)[pop], events)
+    assert not np.array_equal(record(network, [pop], 200, seed=5)[pop], events)
+
+
+def test_presentations(network):
+    network, pop = network
+    rates = np.zeros((3, pop.size))
+    rates[0, :10] = 1000
+    rates[2, 10:20] = 1000
+    pop.set_rates(rates, presentation_steps=50)
+    try:
+        events = record(network, [pop], 300)[pop]
+    finally:
+        pop.set_rates(np.repeat([0.0, 100.0], 500))
+    first, second = events[events[:, 0] < 50], events[(events[:, 0] >= 100)]
+    assert set(first[:, 1]) == set(range(10))
+    assert not np.any((events[:, 0] >= 50) & (events[:, 0] < 100))
+    assert set(second[:, 1]) == set(range(10, 20))
+    # the last presentation lasts until the rates are set again
+    assert np.max(second[:, 0]) > 250
+
+
+def test_rejects_invalid_rates():
+    pop = PoissonPopulation(3, 10.0)
+    for rates, steps in [([1, 2], None), (-1, None), (np.nan, None), ([[1, 2, 3], [1, 2, 3]], None),
+                         ([[1, 2, 3], [1, 2, 3]], 0), (1, 2.5)]:
+        with pytest.raises(IllegalArgumentException):
+            pop.set_rates(rates, steps)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models import Neuron, Synapse, Population, PoissonPopulation, Connection, Network, connection_type
+
+neuron = Neuron(variables="v = 0\ntau = 10 : shared", equations="dv/dt = -v / tau + g_exc", spike="v > 1",
+                reset="v = 0")
+synapse = Synapse(variables="w = 0.3", equations="", pre_spike="", post_spike="")
+
+
+def build(cache, profile, dt=None):
+    source = PoissonPopulation(100, rates=np.linspace(10, 200, 100))
+    post = Population(50, neuron)
+    connection = Connection(source, post, synapse, connection_type.ProbabilityConnection(0.2))
+    network = Network(populations=[source, post], connections=[connection])
+    network.compile(cache=cache, seed=3, profile=profile, dt=dt)
+    network.simulate(200, 0.5)
+    return np.array(post.v), np.array(post.last_spike)
+
+
+def test_profiles_give_the_same_results(cache):
+    v, last_spike = build(cache, 'default')
+    assert np.any(last_spike > 0)
+    for profile, dt in [('debug', None), ('pgo', 0.5)]:
+        other_v, other_last_spike = build(cache, profile, dt)
+        np.testing.assert_allclose(other_v, v, rtol=1e-5, atol=1e-6, err_msg=profile)
+        np.testing.assert_array_equal(other_last_spike, last_spike, err_msg=profile)
+
+
+@pytest.mark.parametrize('profile, dt', [('fast', None), ('pgo', None), ('pgo', 0)])
+def test_rejects_invalid_profile(profile, dt):
+    network = Network(populations=[Population(10, neuron)])
+    with pytest.raises(IllegalArgumentException):
+        network.compile(cache=False, profile=profile, dt=dt)
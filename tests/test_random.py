@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from cerebro.globals import DEFAULT_SEED
+from cerebro.models import Neuron, Population, Network
+
+neuron = Neuron(variables="u = 0\nn = 0", equations="u = Uniform(2, 3)\nn = Normal(1, 2)", spike="u > 10",
+                reset="u = 0")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    population = Population(20000, neuron)
+    monitor = population.monitor(['u', 'n'], ranks=list(range(100)))
+    network = Network(populations=[population])
+    network.compile(cache=cache)
+    return network, population, monitor
+
+
+def test_distributions(network):
+    network, population, monitor = network
+    network.simulate(1, 1)
+    u, n = np.array(population.u), np.array(population.n)
+    assert u.min() >= 2 and u.max() < 3
+    assert abs(u.mean() - 2.5) < 0.01
+    assert abs(n.mean() - 1) < 0.05
+    assert abs(n.std() - 2) < 0.05
+
+
+def test_draws_are_independent_across_steps(network):
+    network, population, monitor = network
+    network.simulate(200, 1)
+    u = monitor.get('u')
+    assert abs(np.corrcoef(u[1:].ravel(), u[:-1].ravel())[0, 1]) < 0.05
+    assert abs(np.corrcoef(u[:, 1:].ravel(), u[:, :-1].ravel())[0, 1]) < 0.05
+
+
+def test_seed_determines_draws(network):
+    network, population, monitor = network
+    network.simulate(5, 1, seed=DEFAULT_SEED)
+    first = np.array(population.n)
+    network.simulate(5, 1, seed=7)
+    assert network.seed == 7
+    other = np.array(population.n)
+    network.simulate(5, 1, seed=DEFAULT_SEED)
+    np.testing.assert_array_equal(population.n, first)
+    assert not np.array_equal(other, first)
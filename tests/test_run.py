@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalStateException
+from cerebro.models import Synapse, Population, Connection, Network, connection_type
+
+from conftest import neuron
+
+synapse = Synapse(variables="w = 0.05", equations="", pre_spike="w = w + 0.01", post_spike="")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    pre = Population(200, neuron)
+    post = Population(100, neuron)
+    connection = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.2))
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+    return network, post
+
+
+def test_runs_without_callback(network):
+    network, post = network
+    network.simulate(100, 0.5)
+    assert network.c_module.get_time() == 200
+    assert np.any(post.v > 0)
+
+
+def test_calls_back_at_interval_and_end(network):
+    network, post = network
+    times = []
+    network.simulate(100, 0.5, callback=lambda net: times.append(net.c_module.get_time()), callback_interval=15)
+    assert times == [30, 60, 90, 120, 150, 180, 200]
+
+    times.clear()
+    network.run(10, callback=lambda net: times.append(net.c_module.get_time()))
+    assert times == [220]
+
+
+def test_runs_continue_the_simulation(network):
+    network, post = network
+    network.simulate(100, 0.5)
+    expected = np.array(post.v)
+
+    network.simulate(40, 0.5)
+    network.run(25)
+    network.run(35, callback=lambda net: None, callback_interval=3)
+    assert network.c_module.get_time() == 200
+    np.testing.assert_array_equal(post.v, expected)
+
+
+def test_requires_compiled_network():
+    with pytest.raises(IllegalStateException):
+        Network(populations=[Population(10, neuron)]).run(10)
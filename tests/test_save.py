@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.models import Synapse, Population, Connection, Network, connection_type
+
+from conftest import neuron
+
+plastic = Synapse(variables="w = 0.05\ndelay = 2\ngain = 1 : shared", equations="", pre_spike="w = w + 0.01",
+                  post_spike="")
+shared = Synapse(variables="w = 0.5", equations="", pre_spike="", post_spike="")
+
+
+def build(cache, probability, weights=None):
+    a = Population(300, neuron)
+    b = Population(300, neuron)
+    grid = Population(100, neuron, shape=(10, 10))
+    output = Population(64, neuron, shape=(8, 8))
+    connection = Connection(a, b, plastic, connection_type.ProbabilityConnection(probability))
+    convolution = Connection(grid, output, shared, connection_type.ConvolutionConnection(3, weights=weights))
+    network = Network(populations=[a, b, grid, output], connections=[connection, convolution])
+    network.compile(cache=cache)
+    return network, connection, convolution
+
+
+def test_round_trip(cache, tmp_path):
+    weights = np.linspace(0, 1, 9).reshape(3, 3)
+    network, connection, convolution = build(cache, 0.05, weights)
+    network.simulate(20, 1)
+    connection.wrapper.set_delay(np.arange(len(connection.delay)) % 4)
+    connection.wrapper.set_gain(3.0)
+    saved = {name: np.array(array) for name, array in connection.wrapper.get_state().items()}
+    connection.save(str(tmp_path / 'connection'))
+    convolution.save(str(tmp_path / 'convolution'))
+    assert os.path.isfile(tmp_path / 'connection' / 'pre_rank.npy')
+
+    network, connection, convolution = build(cache, 0.2)
+    connection.load(str(tmp_path / 'connection'))
+    convolution.load(str(tmp_path / 'convolution'))
+    network.simulate(0, 1)
+    for name, array in connection.wrapper.get_state().items():
+        np.testing.assert_array_equal(array, saved[name], err_msg=name)
+    np.testing.assert_allclose(convolution.wrapper.get_state()['w'], weights.ravel(), rtol=1e-6)
+
+    # the loaded connectivity is kept by later simulations, whose plasticity starts from the loaded weights
+    network.simulate(5, 1)
+    np.testing.assert_array_equal(connection.wrapper.get_state()['pre_rank'], saved['pre_rank'])
+    assert np.all(connection.wrapper.get_state()['w'] >= saved['w'])
+
+
+def test_rejects_missing_and_inconsistent_state(cache, tmp_path):
+    network, connection, convolution = build(cache, 0.2)
+    with pytest.raises(IllegalArgumentException):
+        connection.load(str(tmp_path / 'missing'))
+
+    network.simulate(1, 1)
+    connection.save(str(tmp_path / 'connection'))
+    # state of larger populations, or of another synapse, is checked before the simulator indexes by it
+    for pre, post, synapse in [(50, 50, plastic), (300, 50, plastic), (50, 300, plastic), (300, 300, shared)]:
+        other = Connection(Population(pre, neuron), Population(post, neuron), synapse,
+                           connection_type.ProbabilityConnection(0.2))
+        with pytest.raises(IllegalArgumentException):
+            other.load(str(tmp_path / 'connection'))
+    other.synapse = plastic
+    other.load(str(tmp_path / 'connection'))
+
+    np.save(tmp_path / 'connection' / 'pre_rank.npy', connection.wrapper.get_state()['pre_rank'] + 300)
+    with pytest.raises(IllegalArgumentException):
+        connection.load(str(tmp_path / 'connection'))
+    np.save(tmp_path / 'connection' / 'w.npy', np.zeros(3))
+    with pytest.raises(IllegalArgumentException):
+        connection.load(str(tmp_path / 'connection'))
+
+
+def test_save_requires_compiled_network(tmp_path):
+    connection = Connection(Population(3, neuron), Population(3, neuron), plastic,
+                            connection_type.AllToAllConnection())
+    with pytest.raises(IllegalStateException):
+        connection.save(str(tmp_path / 'connection'))
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException, IllegalStateException
+from cerebro.models import Neuron, Population, PoissonPopulation, Network
+
+from conftest import record
+
+neuron = Neuron(variables="v = 0", equations="v = v + Uniform(0, 0.5)", spike="v > 5", reset="v = 0")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    source = PoissonPopulation(300, 50.0)
+    pop = Population(200, neuron)
+    monitors = {
+        'source': source.spike_monitor(capacity=4),
+        'window': source.spike_monitor(ranks=[3, 7, 250, 9999], start=100, stop=700),
+        'pop': pop.spike_monitor(),
+    }
+    network = Network(populations=[source, pop])
+    network.compile(cache=cache)
+    return network, source, pop, monitors
+
+
+def test_records_fired_spikes(network):
+    network, source, pop, monitors = network
+    events = record(network, [source, pop], 200, dt=0.5)
+    early = monitors['source'].steps
+    early_copy = np.array(early)
+    later = record(network, [source, pop], 200, dt=0.5, restart=False)
+    # arrays read before the buffers grew are still valid
+    np.testing.assert_array_equal(early, early_copy)
+
+    for name, owner in [('source', source), ('pop', pop)]:
+        expected = np.concatenate((events[owner], later[owner]))
+        assert len(expected) > 100
+        np.testing.assert_array_equal(monitors[name].steps, expected[:, 0])
+        np.testing.assert_array_equal(monitors[name].spike_ranks, expected[:, 1])
+        np.testing.assert_array_equal(monitors[name].counts(), np.bincount(expected[:, 1], minlength=owner.size))
+
+    expected = np.concatenate((events[source], later[source]))
+    selected = expected[np.isin(expected[:, 1], [3, 7, 250]) & (expected[:, 0] >= 100) & (expected[:, 0] < 700)]
+    np.testing.assert_array_equal(monitors['window'].steps, selected[:, 0])
+    np.testing.assert_array_equal(monitors['window'].spike_ranks, selected[:, 1])
+
+    # a new simulation starts the recording over
+    events = record(network, [source], 10, dt=0.5)
+    np.testing.assert_array_equal(monitors['source'].steps, events[source][:, 0])
+
+
+def test_raster_and_rates(network):
+    network, source, pop, monitors = network
+    events = record(network, [source], 400, dt=0.5)[source]
+    expected = np.zeros((source.size, 16), dtype=int)
+    np.add.at(expected, (events[:, 1], events[:, 0] // 50), 1)
+    raster = monitors['source'].raster(bin=50)
+    np.testing.assert_array_equal(raster[:, :expected.shape[1]], expected)
+    assert not raster[:, expected.shape[1]:].any()
+
+    # rates in Hz of the steps of 0.5 ms, which fire with probability 1 - exp(-rate * dt / 1000)
+    rates = monitors['source'].rates(100)
+    np.testing.assert_allclose(rates, expected.reshape(source.size, -1, 2).sum(axis=2).mean(axis=0) / 0.05)
+    assert abs(rates.mean() / (1000 * (1 - np.exp(-50 * 0.5 / 1000)) / 0.5) - 1) < 0.1
+
+    window = monitors['window']
+    assert window.raster(200).shape == (source.size, 3)
+    np.testing.assert_allclose(window.rates(200), window.raster(200).sum(axis=0) / 3 / 0.1)
+
+    with pytest.raises(IllegalArgumentException):
+        window.raster(0)
+
+
+def test_rejects_invalid_monitors():
+    pop = Population(10, neuron)
+    for arguments in [dict(ranks=3), dict(start=-1), dict(start=5, stop=4), dict(capacity=0)]:
+        with pytest.raises(IllegalArgumentException):
+            pop.spike_monitor(**arguments)
+    with pytest.raises(IllegalStateException):
+        pop.spike_monitor().steps
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from cerebro.exceptions import IllegalArgumentException
+from cerebro.models import Neuron, Synapse, Population, SpikeSourcePopulation, Connection, Network, connection_type
+
+from conftest import record
+
+neuron = Neuron(variables="v = 0", equations="v = v + g_exc", spike="v > 1e9", reset="v = 0")
+synapse = Synapse(variables="w = 1", equations="", pre_spike="", post_spike="")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    source = SpikeSourcePopulation(6, spikes=[[3, 0, 3], [], [5, 1], [9], [0], [40]])
+    post = Population(6, neuron)
+    connection = Connection(source, post, synapse, connection_type.ConvolutionConnection(1))
+    network = Network(populations=[source, post], connections=[connection])
+    network.compile(cache=cache)
+    return network, source, post
+
+
+def test_emits_given_spikes(network):
+    network, source, post = network
+    events = record(network, [source], 20)[source]
+    assert events.tolist() == [[0, 0], [0, 4], [1, 2], [3, 0], [5, 2], [9, 3]]
+    np.testing.assert_array_equal(post.v, [2, 0, 2, 1, 1, 0])
+
+    # a new simulation emits the spikes again
+    np.testing.assert_array_equal(record(network, [source], 20)[source], events)
+
+
+def test_set_spikes_at_run_time(network):
+    network, source, post = network
+    network.simulate(10, 1)
+    # spikes before the current step are never emitted
+    source.set_spikes((np.array([12, 4, 10, 12]), np.array([5, 1, 1, 0])))
+    assert record(network, [source], 10, restart=False)[source].tolist() == [[10, 1], [12, 0], [12, 5]]
+
+
+def test_restored_checkpoint_continues_emission(network, tmp_path):
+    network, source, post = network
+    source.set_spikes([[2, 30], [7, 31], [], [], [], [45]])
+    network.simulate(20, 1)
+    network.save_checkpoint(str(tmp_path / 'checkpoint.npz'))
+    expected = record(network, [source], 30, restart=False)[source]
+    assert expected.tolist() == [[30, 0], [31, 1], [45, 5]]
+
+    network.simulate(35, 1)
+    network.restore_checkpoint(str(tmp_path / 'checkpoint.npz'))
+    np.testing.assert_array_equal(record(network, [source], 30, restart=False)[source], expected)
+
+
+def test_rejects_invalid_spikes():
+    source = SpikeSourcePopulation(3)
+    for spikes in [([1, 2], [0]), ([1.5], [0]), ([-1], [0]), ([1], [3]), [[1], [2]], ([1], [0], [2])]:
+        with pytest.raises(IllegalArgumentException):
+            source.set_spikes(spikes)
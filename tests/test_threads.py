@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+neuron = Neuron(variables="v = 0\ndrive = 0.3", equations="v = v + drive + Uniform(0, 0.2) + g_exc", spike="v > 5",
+                reset="v = Normal(0, 1)")
+stdp = Synapse(variables="delay = 3\nw = 0.05\nx = 0\ntau = 20 : shared constant", equations="dx/dt = -x / tau",
+               pre_spike="x = x + 1", post_spike="w = w + 0.001 * x")
+decay = Synapse(variables="w = 0.02\ny = 0", equations="y = 0.9 * y + _pre_v * 0.01", pre_spike="w = w + 0.0001",
+                post_spike="w = w - 0.0001")
+
+
+@pytest.fixture(scope='module')
+def network(cache):
+    a = Population(800, neuron)
+    b = Population(600, neuron)
+    forward = Connection(a, b, stdp, connection_type.ProbabilityConnection(0.1))
+    backward = Connection(b, a, decay, connection_type.ProbabilityConnection(0.05))
+    network = Network(populations=[a, b], connections=[forward, backward])
+    network.compile(cache=cache)
+    return network, a, b, forward, backward
+
+
+def snapshot(network):
+    network, a, b, forward, backward = network
+    return [np.array(a.v), np.array(b.v), np.array(forward.x), np.array(forward.wrapper.get_state()['w']),
+            np.array(backward.y), np.array(backward.wrapper.get_state()['pre_rank'])]
+
+
+def test_results_do_not_depend_on_threads(network):
+    results = []
+    for threads in (1, 3, 4):
+        network[0].simulate(100, 0.5, threads=threads, seed=11)
+        results.append(snapshot(network))
+    assert np.any(results[0][0] != 0)
+    for result in results[1:]:
+        for expected, actual in zip(results[0], result):
+            np.testing.assert_array_equal(actual, expected)
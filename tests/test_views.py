@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from cerebro.models import Neuron, Synapse, Population, Connection, Network, connection_type
+
+neuron = Neuron(variables="v = 0\ndrive = 0.3", equations="v = v + drive + g_exc", spike="v > 5", reset="v = 0")
+synapse = Synapse(variables="delay = 2\nw = 0.05\nx = 0", equations="", pre_spike="x = x + 1", post_spike="")
+
+
+@pytest.fixture
+def network(cache):
+    pre = Population(50, neuron)
+    post = Population(40, neuron)
+    connection = Connection(pre, post, synapse, connection_type.ProbabilityConnection(0.2))
+    network = Network(populations=[pre, post], connections=[connection])
+    network.compile(cache=cache)
+    network.simulate(10, 1)
+    return network, pre, connection
+
+
+def test_variables_view_the_simulator(network):
+    network, pre, connection = network
+    v = pre.v
+    assert isinstance(v, np.ndarray) and not v.flags.owndata
+    np.testing.assert_allclose(v, 3.0, rtol=1e-6)
+
+    v[:] = 1.5
+    assert pre.wrapper.get_single_v(3) == 1.5
+    network.run(1)
+    np.testing.assert_allclose(v, 1.8, rtol=1e-6)
+
+
+def test_setters_write_into_the_simulator(network):
+    network, pre, connection = network
+    v = pre.v
+    pre.wrapper.set_drive(np.zeros(pre.size))
+    network.run(5)
+    np.testing.assert_array_equal(pre.v, v)
+    np.testing.assert_array_equal(pre.drive, 0)
+
+
+def test_synapse_variables_view_the_simulator(network):
+    network, pre, connection = network
+    x = connection.x
+    assert len(x) == connection.wrapper.get_row_ptr()[-1] and not x.flags.owndata
+    connection.wrapper.set_dendrite_x(1, 7)
+    assert np.all(connection.wrapper.get_dendrite_x(1) == 7)
+    row_ptr = connection.wrapper.get_row_ptr()
+    assert np.all(x[row_ptr[1]:row_ptr[2]] == 7)
+
+
+def test_delays_are_read_only_views(network):
+    network, pre, connection = network
+    delay = connection.delay
+    assert not delay.flags.writeable
+    with pytest.raises(ValueError):
+        delay[0] = 5
+    connection.wrapper.set_delay(np.full(len(delay), 5))
+    assert np.all(delay == 5)